@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""Standalone benchmark scripts; run with ``python -m benchmarks.<name>``."""
+
+__author__ = 'fenzl'
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Memory held by a loaded 200k-card deck: list of objects vs. the columnar CardCollection.
+
+Run: ``python -m benchmarks.bench_card_memory``
+"""
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+from models.card_collection import CardCollection
+from models.deck import CardData
+
+
+__author__ = 'fenzl'
+
+CARDS = 200_000
+
+
+@dataclass
+class DictCardData:
+    """CardData as it was before slots, for comparison."""
+    id: int
+    question: str
+    answer: str
+    score: int
+
+
+def rows():
+    # Text comes from the DB as fresh strings per card, so it is built inside the measurement too.
+    for index in range(CARDS):
+        yield index + 1, f"Question number {index}?", f"Answer number {index}.", index % 7
+
+
+def retained(label: str, build: Callable[[], object]) -> None:
+    """Print the memory still allocated by the structure ``build`` returns."""
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    print(f"{label:<40} {size / 1024 / 1024:8.1f} MiB ({size / CARDS:5.0f} B/card)")
+
+
+def main() -> None:
+    print(f"-- {CARDS} cards")
+    retained("list of dataclass (with __dict__)", lambda: [
+        DictCardData(id=card_id, question=question, answer=answer, score=score)
+        for card_id, question, answer, score in rows()
+    ])
+    retained("list of CardData (slots)", lambda: [
+        CardData(id=card_id, question=question, answer=answer, score=score)
+        for card_id, question, answer, score in rows()
+    ])
+    retained("CardCollection (columnar)", lambda: CardCollection(cards=(
+        CardData(id=card_id, question=question, answer=answer, score=score)
+        for card_id, question, answer, score in rows()
+    )))
+
+
+if __name__ == "__main__":
+    main()
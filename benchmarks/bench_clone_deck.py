@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Cloning a template deck to another user: server-side INSERT ... SELECT vs. a client-side copy loop.
+
+Run: ``python -m benchmarks.bench_clone_deck``
+"""
+from benchmarks.common import measure, seed_deck, temp_database
+from models.deck import DeckService
+from models.user import UserRecord
+
+
+__author__ = 'fenzl'
+
+DECK_SIZES = (1_000, 10_000, 100_000)
+# The per-card loop commits once per card (~6 ms each); beyond this size it only shows the same slope.
+CLIENT_COPY_MAX = 1_000
+
+
+def client_copy(service: DeckService, deck_id: int, target_user_id: int) -> None:
+    """What a caller had to do before clone_deck: read every card and add it again."""
+    deck = service.get_deck(user_id=1, deck_id=deck_id)
+    copy = service.create_deck(user_id=target_user_id, name=deck.name, description=deck.description)
+    for card in service.list_cards(user_id=1, deck_id=deck_id):
+        answer = service.get_answer(user_id=1, card_id=card.id)
+        service.add_card(user_id=target_user_id, deck_id=copy.id, question=card.question, answer=answer)
+
+
+def main() -> None:
+    for size in DECK_SIZES:
+        with temp_database() as (_engine, session_factory):
+            deck_id = seed_deck(session_factory=session_factory, cards=size, answer_size=256)
+            with session_factory() as session:
+                session.add(UserRecord(id=2, username="student", full_name="Student", password_hash="x"))
+                session.commit()
+            service = DeckService(session_factory=session_factory)
+            print(f"-- {size:,} cards")
+            measure(
+                "clone_deck (INSERT ... SELECT)",
+                lambda: service.clone_deck(source_user_id=1, source_deck_id=deck_id, target_user_id=2),
+            )
+            if size <= CLIENT_COPY_MAX:
+                measure(
+                    "list_cards + add_card per card",
+                    lambda: client_copy(service=service, deck_id=deck_id, target_user_id=2),
+                    repeat=1,
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Deck list with per-deck stats: one query over deck_stats (plus min/max index seeks) against a
+list_cards call per deck.
+
+Run: ``python -m benchmarks.bench_deck_summaries``
+"""
+from sqlalchemy import insert
+
+from benchmarks.common import measure, temp_database
+from models.deck import CardRecord, DeckRecord, DeckService
+from models.user import UserRecord
+
+
+__author__ = 'fenzl'
+
+DECK_COUNTS = (10, 100, 1_000)
+CARDS_PER_DECK = 50
+
+
+def seed(session_factory, decks: int) -> None:
+    with session_factory() as session:
+        session.add(UserRecord(id=1, username="bench", full_name="Bench", password_hash="x"))
+        session.flush()  # decks reference the user
+        session.add_all(
+            DeckRecord(id=deck_id, name=f"Deck {deck_id:05d}", user_id=1) for deck_id in range(1, decks + 1)
+        )
+        session.flush()
+        rows = [
+            {"question": f"Q{i}", "answer": "A", "score": i % 7, "deck_id": deck_id, "user_id": 1}
+            for deck_id in range(1, decks + 1)
+            for i in range(CARDS_PER_DECK)
+        ]
+        session.execute(insert(CardRecord), rows)
+        session.commit()
+
+
+def per_deck_queries(service: DeckService) -> list:
+    summaries = []
+    for deck in service.list_decks(user_id=1):
+        scores = [card.score for card in service.list_cards(user_id=1, deck_id=deck.id)]
+        summaries.append((deck.id, len(scores), sum(scores) / len(scores) if scores else None))
+    return summaries
+
+
+def main() -> None:
+    for decks in DECK_COUNTS:
+        with temp_database() as (_engine, session_factory):
+            seed(session_factory=session_factory, decks=decks)
+            service = DeckService(session_factory=session_factory)
+            print(f"-- {decks} decks x {CARDS_PER_DECK} cards")
+            measure("list_deck_summaries (1 query)", lambda: service.list_deck_summaries(user_id=1))
+            measure("list_deck_summaries_page (first page)", lambda: service.list_deck_summaries_page(user_id=1))
+            measure(f"list_decks + list_cards ({decks + 1} queries)", lambda: per_deck_queries(service=service))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""Peak memory of streaming exports as decks grow; it should stay flat.
+
+Run: ``python -m benchmarks.bench_export``
+"""
+import os
+import tempfile
+
+from benchmarks.common import measure, seed_deck, temp_database
+from models.deck import DeckService
+
+
+__author__ = 'fenzl'
+
+DECK_SIZES = (1_000, 10_000, 100_000)
+
+
+def main() -> None:
+    for size in DECK_SIZES:
+        with temp_database() as (_engine, session_factory), tempfile.TemporaryDirectory() as directory:
+            deck_id = seed_deck(session_factory=session_factory, cards=size, answer_size=512)
+            service = DeckService(session_factory=session_factory)
+            print(f"-- {size} cards")
+            for file_format in ("csv", "jsonl", "sql"):
+                path = os.path.join(directory, f"export.{file_format}")
+                measure(
+                    f"export_deck ({file_format})",
+                    lambda: service.export_deck(user_id=1, deck_id=deck_id, path=path),
+                    repeat=1,
+                )
+
+
+if __name__ == "__main__":
+    main()
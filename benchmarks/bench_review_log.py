@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Review analytics as the review_log grows: cost should follow one user's rows, not the table size.
+
+Run: ``python -m benchmarks.bench_review_log``
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from benchmarks.common import measure, seed_deck, temp_database
+from models.deck import DeckService
+
+
+__author__ = 'fenzl'
+
+LOG_SIZES = (100_000, 1_000_000, 5_000_000)
+USERS = 100
+CARDS = 1_000
+NOW = datetime(2026, 6, 1)
+
+# The other users the log rows belong to (seed_deck creates user 1).
+SEED_USERS = """
+    WITH RECURSIVE n(i) AS (SELECT 2 UNION ALL SELECT i + 1 FROM n WHERE i < :users)
+    INSERT INTO users (id, username, full_name, password_hash) SELECT i, 'bench' || i, 'Bench', 'x' FROM n
+"""
+
+# Rows spread over USERS users and the 365 days before NOW; every 4th rating is a lapse.
+SEED_LOG = """
+    WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < :rows)
+    INSERT INTO review_log (card_id, deck_id, user_id, reviewed_at, delta, score, response_ms)
+    SELECT (i / :users) % :cards + 1, 1, i % :users + 1,
+           strftime('%Y-%m-%d %H:%M:%f', :now, '-' || (i % 525600) || ' minutes'),
+           CASE WHEN i % 4 = 0 THEN -1 ELSE 1 END, i % 5, 1500
+    FROM n
+"""
+
+
+def main() -> None:
+    for rows in LOG_SIZES:
+        with temp_database() as (engine, session_factory):
+            seed_deck(session_factory=session_factory, cards=CARDS)
+            with engine.begin() as connection:
+                connection.execute(text(SEED_USERS), {"users": USERS})
+                connection.execute(
+                    text(SEED_LOG), {"rows": rows, "users": USERS, "cards": CARDS, "now": NOW.isoformat(" ")}
+                )
+            service = DeckService(session_factory=session_factory)
+            print(f"-- {rows:,} review_log rows, {USERS} users")
+            measure("reviews_per_day (30 days)", lambda: service.reviews_per_day(user_id=1, days=30, now=NOW))
+            measure("reviews_per_day (365 days)", lambda: service.reviews_per_day(user_id=1, days=365, now=NOW))
+            measure("lapse_counts (deck)", lambda: service.lapse_counts(user_id=1, deck_id=1))
+            measure("lapse_counts (all decks)", lambda: service.lapse_counts(user_id=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Full-text search latency against a LIKE scan on a large card table.
+
+Run: ``python -m benchmarks.bench_search`` (seeding 500k cards takes a little while).
+"""
+from random import Random
+
+from sqlalchemy import insert, or_, select
+
+from benchmarks.common import measure, temp_database
+from models.deck import CardRecord, DeckRecord, DeckService
+from models.user import UserRecord
+
+
+__author__ = 'fenzl'
+
+CARDS = 500_000
+WORDS = [f"term{i}" for i in range(20_000)]
+
+
+def seed(session_factory) -> None:
+    rng = Random(7)
+    with session_factory() as session:
+        session.add(UserRecord(id=1, username="bench", full_name="Bench", password_hash="x"))
+        session.flush()  # decks reference the user
+        session.add_all(DeckRecord(id=deck_id, name=f"Deck {deck_id}", user_id=1) for deck_id in range(1, 51))
+        session.flush()
+        for start in range(0, CARDS, 50_000):
+            rows = [
+                {
+                    "question": " ".join(rng.choices(WORDS, k=8)),
+                    "answer": " ".join(rng.choices(WORDS, k=40)),
+                    "score": 0,
+                    "deck_id": 1 + index % 50,
+                    "user_id": 1,
+                }
+                for index in range(start, min(CARDS, start + 50_000))
+            ]
+            session.execute(insert(CardRecord), rows)
+        session.commit()
+
+
+def like_scan(service: DeckService, word: str) -> list:
+    with service._session() as session:
+        pattern = f"%{word}%"
+        return session.execute(
+            select(CardRecord.id)
+            .where(CardRecord.user_id == 1, or_(CardRecord.question.like(pattern), CardRecord.answer.like(pattern)))
+        ).all()
+
+
+def main() -> None:
+    with temp_database() as (_engine, session_factory):
+        seed(session_factory=session_factory)
+        service = DeckService(session_factory=session_factory)
+        print(f"-- {CARDS} cards")
+        measure("search_cards('term1234')", lambda: service.search_cards(user_id=1, query="term1234"))
+        measure("search_cards('term1234 term34') AND", lambda: service.search_cards(user_id=1, query="term1234 term34"))
+        measure("search_cards in one deck", lambda: service.search_cards(user_id=1, query="term1234", deck_id=7))
+        measure("LIKE scan (all matches, unranked)", lambda: like_scan(service=service, word="term1234 "))
+
+
+if __name__ == "__main__":
+    main()
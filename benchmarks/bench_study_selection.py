@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Compare full-row hydration with the (id, score) projection used to build the study sampler.
+
+Run: ``python -m benchmarks.bench_study_selection``
+"""
+from typing import List
+
+from benchmarks.common import measure, seed_deck, temp_database
+from models.deck import CardData, CardRecord, DeckService
+
+
+__author__ = 'fenzl'
+
+DECK_SIZES = (1_000, 10_000, 40_000)
+# Paragraph-of-code sized answers.
+ANSWER_SIZE = 4096
+
+
+def full_rows(service: DeckService, deck_id: int) -> List[CardData]:
+    # The pre-projection approach: every CardRecord, with question and answer, per draw.
+    with service._session() as session:
+        cards = session.query(CardRecord).filter(CardRecord.deck_id == deck_id, CardRecord.user_id == 1).all()
+        return [CardData(id=c.id, question=c.question, answer=c.answer, score=c.score) for c in cards]
+
+
+def projected_draw(service: DeckService, deck_id: int) -> None:
+    # Cold draw: (id, score) projection into the sampler, then one primary-key fetch for the winner.
+    service._samplers.clear()
+    service._study_cards.clear()
+    service.next_card_for_study(user_id=1, deck_id=deck_id)
+
+
+def main() -> None:
+    for size in DECK_SIZES:
+        with temp_database() as (_engine, session_factory):
+            deck_id = seed_deck(session_factory=session_factory, cards=size, answer_size=ANSWER_SIZE)
+            service = DeckService(session_factory=session_factory)
+            print(f"-- {size} cards, {ANSWER_SIZE} B answers")
+            measure("full rows (ORM, all columns)", lambda: full_rows(service=service, deck_id=deck_id))
+            measure("projection + winner by PK (cold)", lambda: projected_draw(service=service, deck_id=deck_id))
+            service.next_card_for_study(user_id=1, deck_id=deck_id)
+            measure("warm draw (sampler built)", lambda: service.next_card_for_study(user_id=1, deck_id=deck_id))
+
+
+if __name__ == "__main__":
+    main()
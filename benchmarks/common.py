@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Iterator, Tuple
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from models.deck import CardRecord, DeckRecord
+from models.storage import Base, enable_foreign_keys
+from models.user import UserRecord
+
+
+__author__ = 'fenzl'
+
+
+@contextmanager
+def temp_database() -> Iterator[Tuple[Engine, sessionmaker]]:
+    """File-backed SQLite DB in a temp dir, so timings include real page reads."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}", future=True)
+        enable_foreign_keys(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        try:
+            yield engine, sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+        finally:
+            engine.dispose()
+
+
+def seed_deck(session_factory: sessionmaker, cards: int, answer_size: int = 64, user_id: int = 1) -> int:
+    """Insert a user (if needed) and one deck with ``cards`` cards; returns the deck id."""
+    with session_factory() as session:
+        if session.get(UserRecord, user_id) is None:
+            session.add(UserRecord(id=user_id, username=f"bench{user_id}", full_name="Bench", password_hash="x"))
+            session.flush()  # the deck's foreign key needs the user row first
+        deck = DeckRecord(name="Bench", description="", user_id=user_id)
+        session.add(deck)
+        session.flush()
+        answer = "x" * answer_size
+        rows = [
+            {"question": f"Q{i}", "answer": answer, "score": i % 7, "deck_id": deck.id, "user_id": user_id}
+            for i in range(cards)
+        ]
+        session.execute(insert(CardRecord), rows)
+        session.commit()
+        return deck.id
+
+
+def measure(label: str, fn: Callable[[], object], repeat: int = 3) -> None:
+    """Print best wall time and peak traced allocation of ``fn``."""
+    best = float("inf")
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{label:<40} {best * 1000:9.1f} ms  {peak / 1024 / 1024:8.2f} MiB peak")
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from models.logs import get_logger
+from views.main import MainView
+
+__author__ = 'fenzl'
+
+# Interval (ms) at which the Tk loop checks for finished model calls.
+POLL_INTERVAL_MS = 15
+
+logger = get_logger("ui")
+
+
+@dataclass
+class Request:
+    future: Future
+    frame: str
+    key: Optional[str]
+    on_done: Callable[[Any], None]
+    on_error: Optional[Callable[[Exception], None]]
+    # False for writes: they always run, cancelling only drops their callbacks.
+    cancellable: bool = True
+    cancelled: bool = False
+    delivered: bool = False
+
+    @property
+    def active(self) -> bool:
+        """Still going to call back: neither cancelled nor delivered yet."""
+        return not self.cancelled and not self.delivered
+
+
+class DBExecutor:
+    """Run model calls off the Tk thread and deliver their results back on it.
+
+    One worker keeps calls in submission order, so a refresh queued after a save sees the save.
+    Each request belongs to a frame: while it is pending that frame shows a busy cursor, and
+    switching to another frame cancels it (queued calls never run, running ones are ignored).
+    Submitting with a ``key`` also cancels the frame's earlier requests with that key. Writes are
+    submitted with ``cancellable=False``: they are never superseded, and leaving their frame only
+    drops their callbacks, so a queued save or delete still runs.
+    """
+
+    def __init__(self, main_view: MainView):
+        self.main_view = main_view
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        self._requests: List[Request] = []
+        self._polling = False
+        self._busy: Dict[str, bool] = {}
+        self.main_view.add_switch_listener(self._on_switch)
+
+    def submit(
+            self,
+            frame: str,
+            fn: Callable[[], Any],
+            on_done: Callable[[Any], None],
+            on_error: Optional[Callable[[Exception], None]] = None,
+            key: Optional[str] = None,
+            cancellable: bool = True,
+    ) -> Request:
+        """Run ``fn()`` on the worker, then ``on_done(result)`` or ``on_error(exception)`` on the Tk thread.
+
+        Without ``on_error`` the exception message is shown on the frame.
+        """
+        if key is not None:
+            self.cancel(frame=frame, key=key)
+        request = Request(
+            future=self._worker.submit(fn), frame=frame, key=key, on_done=on_done, on_error=on_error,
+            cancellable=cancellable,
+        )
+        self._requests.append(request)
+        self._update_busy()
+        if not self._polling:
+            self._polling = True
+            self.main_view.root.after(POLL_INTERVAL_MS, self._poll)
+        return request
+
+    def cancel(self, frame: Optional[str] = None, key: Optional[str] = None) -> None:
+        """Cancel pending reads of ``frame`` (all frames if None), only those with ``key`` if given."""
+        for request in self._requests:
+            if not request.cancellable:
+                continue
+            if (frame is None or request.frame == frame) and (key is None or request.key == key):
+                request.cancelled = True
+                request.future.cancel()
+        self._update_busy()
+
+    def _on_switch(self, name: str) -> None:
+        # Results for a frame the user has left would only overwrite it in the background. Writes still
+        # run; only their callbacks are dropped.
+        for request in self._requests:
+            if request.frame != name:
+                request.cancelled = True
+                if request.cancellable:
+                    request.future.cancel()
+        self._update_busy()
+
+    def _poll(self) -> None:
+        # Callbacks may submit follow-up requests; collect those separately from this round.
+        requests, self._requests = self._requests, []
+        finished = []
+        for request in requests:
+            (finished if request.future.done() else self._requests).append(request)
+        try:
+            for request in finished:
+                if request.future.cancelled():
+                    continue
+                if request.cancelled:
+                    if not request.cancellable and request.future.exception() is not None:
+                        # Nobody is left to show it; do not lose a failed write silently.
+                        logger.warning("Write for frame %s failed: %s", request.frame, request.future.exception())
+                    continue
+                request.delivered = True
+                try:
+                    self._deliver(request=request)
+                except Exception:  # noqa: BLE001 - one failing callback must not stop the others
+                    self.main_view.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self._update_busy()
+            if self._requests:
+                self.main_view.root.after(POLL_INTERVAL_MS, self._poll)
+            else:
+                self._polling = False
+
+    def _deliver(self, request: Request) -> None:
+        exception = request.future.exception()
+        if exception is None:
+            request.on_done(request.future.result())
+        elif request.on_error is not None:
+            request.on_error(exception)  # type: ignore
+        else:
+            self.main_view.frames[request.frame].set_message(message=str(exception))  # type: ignore
+
+    def _update_busy(self) -> None:
+        busy = {request.frame for request in self._requests if not request.cancelled}
+        for frame in set(self._busy) | busy:
+            if self._busy.get(frame, False) != (frame in busy):
+                self._busy[frame] = frame in busy
+                self.main_view.set_busy(name=frame, busy=frame in busy)
+
+    def close(self) -> None:
+        self.cancel()
+        self._worker.shutdown(wait=True)
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+from typing import Optional
+
+from controllers.background import DBExecutor, Request
 from controllers.utils import require_user
 from models.deck import CardData
 from models.main import MainModel
@@ -8,15 +11,17 @@ __author__ = 'fenzl'
 
 
 class CardFormController:
-    def __init__(self, main_model: MainModel, main_view: MainView, deck_detail_controller):
+    def __init__(self, main_model: MainModel, main_view: MainView, executor: DBExecutor, deck_detail_controller):
         """Handle create/edit of cards via the card form view."""
         self.main_model = main_model
         self.main_view = main_view
+        self.executor = executor
         self.deck_detail_controller = deck_detail_controller
         self.frame = self.main_view.frames["card_form"]
         self.current_deck_id: int | None = None
         self.current_deck_name: str = ""
         self.current_card_id: int | None = None
+        self._save_request: Optional[Request] = None
         self._bind()
 
     def _bind(self) -> None:
@@ -42,11 +47,31 @@ class CardFormController:
         self.frame.set_message(message="")
         self.frame.clear_inputs()
         self.frame.set_question(card.question)
-        self.frame.set_answer(card.answer)
         self.main_view.switch(name="card_form")
+        if card.answer is not None:
+            self.frame.set_answer(card.answer)
+            return
+        # Card lists leave the answer out; load it for editing. A save queued behind this runs after it.
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        self.executor.submit(
+            frame="card_form",
+            fn=lambda: self.main_model.decks.get_answer(user_id=user.id, card_id=card.id),
+            on_done=self._answer_loaded,
+            key="answer",
+        )
+
+    def _answer_loaded(self, answer: str) -> None:
+        if not self.frame.get_answer().strip():  # keep anything typed while it was loading
+            self.frame.set_answer(answer)
 
     def save(self) -> None:
         """Persist changes and return to deck detail."""
+        if self._save_request is not None and self._save_request.active:
+            return  # a second click while saving would write twice
         question = self.frame.get_question().strip()
         answer = self.frame.get_answer().strip()
         if self.current_deck_id is None:
@@ -54,19 +79,26 @@ class CardFormController:
             return
         try:
             user = require_user(auth=self.main_model.users)
-            if self.current_card_id is None:
-                self.main_model.decks.add_card(
-                    user_id=user.id, deck_id=self.current_deck_id, question=question, answer=answer
-                )
-            else:
-                self.main_model.decks.update_card(
-                    user_id=user.id, card_id=self.current_card_id, question=question, answer=answer
-                )
-            self.deck_detail_controller.load_deck(deck_id=self.current_deck_id)
-            self.main_view.switch(name="deck_detail")
         except ValueError as exception:
-            # Validation errors (empty fields) or missing auth/deck context.
             self.frame.set_message(message=str(exception))
+            return
+        deck_id, card_id = self.current_deck_id, self.current_card_id
+        if card_id is None:
+            write = lambda: self.main_model.decks.add_card(  # noqa: E731
+                user_id=user.id, deck_id=deck_id, question=question, answer=answer
+            )
+        else:
+            write = lambda: self.main_model.decks.update_card(  # noqa: E731
+                user_id=user.id, card_id=card_id, question=question, answer=answer
+            )
+        # Validation errors (empty fields) or a missing deck/card are shown on the form.
+        self._save_request = self.executor.submit(
+            frame="card_form", fn=write, on_done=lambda _card: self._saved(deck_id=deck_id), cancellable=False
+        )
+
+    def _saved(self, deck_id: int) -> None:
+        self.deck_detail_controller.load_deck(deck_id=deck_id)
+        self.main_view.switch(name="deck_detail")
 
     def cancel(self) -> None:
         self.main_view.switch(name="deck_detail")
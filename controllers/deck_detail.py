@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
-from tkinter import messagebox
-from typing import List, Optional, TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Event
+from tkinter import filedialog, messagebox
+from typing import Any, Callable, List, Optional, Tuple, TYPE_CHECKING
 
+from controllers.background import DBExecutor, Request
 from controllers.utils import require_user, truncate_and_pad
-from models.deck import CardData
+from models.card_collection import CardCollection
+from models.deck import CardData, DeckData, Page
+from models.importer import ImportResult
 from models.main import MainModel
 from views.main import MainView
 
@@ -13,18 +18,36 @@ if TYPE_CHECKING:
     from controllers.card_form import CardFormController
     from controllers.study import StudyController
 
+# How often (ms) the Tk loop checks on a running import.
+IMPORT_POLL_MS = 100
+# Most search hits shown in the card list.
+SEARCH_LIMIT = 200
+
 
 class DeckDetailController:
-    def __init__(self, main_model: MainModel, main_view: MainView):
+    def __init__(self, main_model: MainModel, main_view: MainView, executor: DBExecutor):
         """Show cards for a deck and route add/edit/study actions to other controllers."""
         self.main_model = main_model
         self.main_view = main_view
+        self.executor = executor
         self.frame = self.main_view.frames["deck_detail"]
         self.study_controller: "StudyController | None" = None
         self.card_form_controller: "CardFormController | None" = None
         self.current_deck_id: int | None = None
         self.current_deck_name: str = ""
-        self.current_cards: List[CardData] = []
+        # Columnar list: a large deck costs its text plus a few bytes per card, not an object per card.
+        self.current_cards = CardCollection()
+        # Keyset cursor (last card id) of the next page, None once every card is listed.
+        self._next_cursor: int | None = None
+        self._page_request: Optional[Request] = None
+        # The user's other decks, in the order offered as Move/Copy targets.
+        self._target_decks: List[DeckData] = []
+        # Imports run on their own worker; progress is written there and read on the Tk thread.
+        self._import_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import")
+        self._import_future: Optional[Future] = None
+        self._import_cancel = Event()
+        self._import_deck_id: int | None = None
+        self._import_progress: Tuple[int, float] = (0, 0.0)
         self._bind()
 
     def set_study_controller(self, controller: "StudyController") -> None:
@@ -37,50 +60,166 @@ class DeckDetailController:
         """Bind deck detail actions."""
         self.frame.set_add_card_command(self.add_card)
         self.frame.set_update_card_command(self.update_card)
-        self.frame.set_delete_card_command(self.delete_card)
+        self.frame.set_delete_card_command(self.delete_cards)
+        self.frame.set_reset_scores_command(self.reset_scores)
+        self.frame.set_move_command(self.move_cards)
+        self.frame.set_copy_command(self.copy_cards)
         self.frame.set_study_command(self.start_study)
+        self.frame.set_import_command(self.import_cards)
+        self.frame.set_export_command(self.export_deck)
         self.frame.set_back_command(self.back_to_decks)
+        self.frame.set_search_command(self.refresh_cards)
+        self.frame.set_scroll_end_command(self.load_more_cards)
 
     def load_deck(self, deck_id: int) -> None:
         """Load deck metadata and cards."""
         try:
             user = require_user(auth=self.main_model.users)
-            deck = self.main_model.decks.get_deck(user_id=user.id, deck_id=deck_id)
-            self.current_deck_id = deck.id
-            self.current_deck_name = deck.name
-            self.frame.set_title(name=deck.name)
-            self.refresh_cards()
-            self.frame.set_message(message="")
         except ValueError as exception:
-            # Typical issues: not signed in or deck not found for this user.
             self.frame.set_message(message=str(exception))
+            return
+        # Drop the previous deck's cards (and any of its pages still loading) right away.
+        self.current_deck_id = None
+        self._next_cursor = None
+        self.current_cards.clear()
+        self.frame.clear_cards()
+        self.executor.cancel(frame="deck_detail", key="cards")
+        self.executor.cancel(frame="deck_detail", key="page")
+        # Typical errors: not signed in or deck not found for this user; shown on the frame.
+        self.executor.submit(
+            frame="deck_detail",
+            key="deck",
+            fn=lambda: self.main_model.decks.get_deck(user_id=user.id, deck_id=deck_id),
+            on_done=self._show_deck,
+        )
+
+    def _show_deck(self, deck: DeckData) -> None:
+        self.current_deck_id = deck.id
+        self.current_deck_name = deck.name
+        self.frame.set_title(name=deck.name)
+        self.frame.clear_search()
+        self.frame.set_message(message="")
+        self.refresh_cards()
+        self._load_target_decks()
+
+    def _load_target_decks(self) -> None:
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError:
+            return
+        deck_id = self.current_deck_id
+        self.executor.submit(
+            frame="deck_detail",
+            key="targets",
+            fn=lambda: [deck for deck in self.main_model.decks.list_decks(user_id=user.id) if deck.id != deck_id],
+            on_done=self._show_target_decks,
+        )
+
+    def _show_target_decks(self, decks: List[DeckData]) -> None:
+        self._target_decks = decks
+        self.frame.set_target_decks(names=[deck.name for deck in decks])
 
     def refresh_cards(self) -> None:
-        """Reload cards into the list."""
+        """Reload cards into the list (only search hits while a search query is entered)."""
         if self.current_deck_id is None:
             return
         try:
             user = require_user(auth=self.main_model.users)
-            cards = self.main_model.decks.list_cards(user_id=user.id, deck_id=self.current_deck_id)
-            self.current_cards = cards
-            self.frame.clear_cards()
-            for card in cards:
-                question_preview = truncate_and_pad(text=card.question, width=30)
-                display = f"Q: {question_preview} | Score: {card.score}"
-                self.frame.insert_card(display)
-            self.frame.set_message(message="")
         except ValueError as exception:
-            # Likely missing auth or deck/cards no longer exist.
             self.frame.set_message(message=str(exception))
+            return
+        deck_id = self.current_deck_id
+        query = self.frame.get_search_query().strip()
+        self._next_cursor = None
+        self.executor.cancel(frame="deck_detail", key="page")
+        self.executor.submit(
+            frame="deck_detail",
+            key="cards",
+            fn=lambda: self._fetch_cards(user_id=user.id, deck_id=deck_id, query=query),
+            on_done=self._show_cards,
+        )
+
+    def _fetch_cards(self, user_id: int, deck_id: int, query: str) -> Tuple[List[CardData], Optional[int]]:
+        # Runs on the DB worker.
+        if query:
+            hits = self.main_model.decks.search_cards(user_id=user_id, query=query, deck_id=deck_id, limit=SEARCH_LIMIT)
+            return [hit.to_card() for hit in hits], None
+        # Only the first page is read up front; the rest follows as the list is scrolled.
+        page = self.main_model.decks.list_cards_page(user_id=user_id, deck_id=deck_id)
+        return page.items, page.next_cursor
+
+    def _show_cards(self, result: Tuple[List[CardData], Optional[int]]) -> None:
+        cards, self._next_cursor = result
+        self.current_cards.clear()
+        self.frame.clear_cards()
+        self._append_cards(cards=cards)
+        self.frame.set_message(message="")
+
+    def load_more_cards(self) -> None:
+        """Append the next page of cards once the list is scrolled to its end."""
+        if self._next_cursor is None or self.current_deck_id is None:
+            return
+        if self._page_request is not None and self._page_request.active:
+            return
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        deck_id, after_id = self.current_deck_id, self._next_cursor
+        self._page_request = self.executor.submit(
+            frame="deck_detail",
+            key="page",
+            fn=lambda: self.main_model.decks.list_cards_page(user_id=user.id, deck_id=deck_id, after_id=after_id),
+            on_done=self._show_next_page,
+            on_error=self._page_failed,
+        )
+
+    def _show_next_page(self, page: Page[CardData, int]) -> None:
+        self._next_cursor = page.next_cursor
+        self._append_cards(cards=page.items)
+
+    def _page_failed(self, exception: Exception) -> None:
+        self._next_cursor = None
+        self.frame.set_message(message=str(exception))
+
+    @staticmethod
+    def _display(card: CardData) -> str:
+        question_preview = truncate_and_pad(text=card.question, width=30)
+        return f"Q: {question_preview} | Score: {card.score}"
+
+    def _append_cards(self, cards: List[CardData]) -> None:
+        self.current_cards.extend(cards)
+        for card in cards:
+            self.frame.insert_card(self._display(card=card))
+
+    def _remove_cards(self, card_ids: List[int]) -> None:
+        # Patch the list instead of reloading it: only the rows of removed cards go away.
+        self.frame.remove_cards(indices=self.current_cards.remove_ids(card_ids=card_ids))
+
+    def _update_cards(self, cards: List[CardData]) -> None:
+        for card in cards:
+            try:
+                index = self.current_cards.position_of(card_id=card.id)
+            except ValueError:
+                continue  # on a page that is not loaded yet
+            self.current_cards.set_score(index=index, score=card.score)
+            self.frame.replace_card(index=index, display_text=self._display(card=card))
+
+    def _selected_cards(self) -> List[CardData]:
+        indices = self.frame.get_selected_indices()
+        return [self.current_cards[index] for index in indices if index < len(self.current_cards)]
 
     def _selected_card(self) -> Optional[CardData]:
-        """Return the selected card (or None)."""
-        index = self.frame.get_selected_index()
-        if index is None:
-            return None
-        if index >= len(self.current_cards):
+        """Return the selected card (or None unless exactly one is selected)."""
+        cards = self._selected_cards()
+        return cards[0] if len(cards) == 1 else None
+
+    def _target_deck(self) -> Optional[DeckData]:
+        index = self.frame.get_target_index()
+        if index is None or index >= len(self._target_decks):
             return None
-        return self.current_cards[index]
+        return self._target_decks[index]
 
     def add_card(self) -> None:
         if self.current_deck_id is None or not self.card_form_controller:
@@ -93,7 +232,7 @@ class DeckDetailController:
     def update_card(self) -> None:
         card = self._selected_card()
         if not card:
-            self.frame.set_message(message="Select a card to edit.")
+            self.frame.set_message(message="Select one card to edit.")
             return
         if self.current_deck_id is None or not self.card_form_controller:
             self.frame.set_message(message="Card form unavailable.")
@@ -102,19 +241,83 @@ class DeckDetailController:
             deck_id=self.current_deck_id, deck_name=self.current_deck_name, card=card
         )
 
-    def delete_card(self) -> None:
-        card = self._selected_card()
-        if not card:
-            self.frame.set_message(message="Select a card to delete.")
+    def delete_cards(self) -> None:
+        cards = self._selected_cards()
+        if not cards:
+            self.frame.set_message(message="Select cards to delete.")
             return
-        if messagebox.askyesno("Delete Card", "Delete this card?"):
-            try:
-                user = require_user(auth=self.main_model.users)
-                self.main_model.decks.delete_card(user_id=user.id, card_id=card.id)
-                self.refresh_cards()
-            except ValueError as exception:
-                # Missing auth or card already removed.
-                self.frame.set_message(message=str(exception))
+        prompt = "Delete this card?" if len(cards) == 1 else f"Delete these {len(cards)} cards?"
+        if not messagebox.askyesno("Delete Cards", prompt):
+            return
+        self._submit_bulk(
+            fn=lambda user_id, deck_id: self.main_model.decks.bulk_delete_cards(
+                user_id=user_id, deck_id=deck_id, card_ids=[card.id for card in cards]
+            ),
+            on_done=lambda deleted: self._bulk_done(message=f"Deleted {len(deleted)} cards.", removed=deleted),
+        )
+
+    def move_cards(self) -> None:
+        cards, target = self._selected_cards(), self._target_deck()
+        if not cards or target is None:
+            self.frame.set_message(message="Select cards and a target deck to move them to.")
+            return
+        self._submit_bulk(
+            fn=lambda user_id, deck_id: self.main_model.decks.move_cards(
+                user_id=user_id, deck_id=deck_id, card_ids=[card.id for card in cards], to_deck_id=target.id
+            ),
+            on_done=lambda moved: self._bulk_done(message=f"Moved {len(moved)} cards to {target.name}.", removed=moved),
+        )
+
+    def copy_cards(self) -> None:
+        cards, target = self._selected_cards(), self._target_deck()
+        if not cards or target is None:
+            self.frame.set_message(message="Select cards and a target deck to copy them to.")
+            return
+        self._submit_bulk(
+            fn=lambda user_id, deck_id: self.main_model.decks.copy_cards(
+                user_id=user_id, deck_id=deck_id, card_ids=[card.id for card in cards], to_deck_id=target.id
+            ),
+            on_done=lambda copies: self._bulk_done(message=f"Copied {len(copies)} cards to {target.name}."),
+        )
+
+    def reset_scores(self) -> None:
+        cards = self._selected_cards()
+        if not cards:
+            self.frame.set_message(message="Select cards to reset.")
+            return
+        if not messagebox.askyesno("Reset Scores", f"Reset the scores of {len(cards)} cards?"):
+            return
+        self._submit_bulk(
+            fn=lambda user_id, deck_id: self.main_model.decks.reset_scores(
+                user_id=user_id, deck_id=deck_id, card_ids=[card.id for card in cards]
+            ),
+            on_done=lambda reset: self._bulk_done(message=f"Reset {len(reset)} cards.", updated=reset),
+        )
+
+    def _submit_bulk(self, fn: Callable[..., Any], on_done: Callable[[Any], None]) -> None:
+        if self.current_deck_id is None:
+            self.frame.set_message(message="No deck selected.")
+            return
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        deck_id = self.current_deck_id
+        # Confirmed writes: no supersession key, and never cancelled by a later action or a frame switch.
+        # Errors (e.g. the target deck was deleted meanwhile) are shown on the frame.
+        self.executor.submit(
+            frame="deck_detail", fn=lambda: fn(user_id=user.id, deck_id=deck_id), on_done=on_done, cancellable=False
+        )
+
+    def _bulk_done(
+            self, message: str, removed: Optional[List[int]] = None, updated: Optional[List[CardData]] = None
+    ) -> None:
+        if removed:
+            self._remove_cards(card_ids=removed)
+        if updated:
+            self._update_cards(cards=updated)
+        self.frame.set_message(message=message)
 
     def start_study(self) -> None:
         if not self.study_controller or self.current_deck_id is None:
@@ -122,11 +325,132 @@ class DeckDetailController:
             return
         try:
             user = require_user(auth=self.main_model.users)
-            deck = self.main_model.decks.get_deck(user_id=user.id, deck_id=self.current_deck_id)
-            self.study_controller.start(deck_id=self.current_deck_id, deck_name=deck.name)
-            self.main_view.switch(name="study")
         except ValueError as exception:
             self.frame.set_message(message=str(exception))
+            return
+        deck_id = self.current_deck_id
+        # Re-check the deck still exists before starting the session.
+        self.executor.submit(
+            frame="deck_detail",
+            key="study",
+            fn=lambda: self.main_model.decks.get_deck(user_id=user.id, deck_id=deck_id),
+            on_done=self._start_study_session,
+        )
+
+    def _start_study_session(self, deck: DeckData) -> None:
+        if self.study_controller is None:
+            return
+        self.study_controller.start(deck_id=deck.id, deck_name=deck.name)
+        self.main_view.switch(name="study")
+
+    def import_cards(self) -> None:
+        """Pick a CSV/TSV/JSONL file and import it into the current deck in the background."""
+        if self.current_deck_id is None:
+            self.frame.set_message(message="No deck selected.")
+            return
+        if self._import_future is not None:
+            self.frame.set_message(message="An import is already running.")
+            return
+        path = filedialog.askopenfilename(
+            title="Import Cards",
+            filetypes=[("Card files", "*.csv *.tsv *.jsonl"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        deck_id = self.current_deck_id
+        self._import_cancel.clear()
+        self._import_deck_id = deck_id
+        self._import_progress = (0, 0.0)
+        self._import_future = self._import_worker.submit(
+            self.main_model.decks.import_cards,
+            user_id=user.id,
+            deck_id=deck_id,
+            path=path,
+            progress=self._record_import_progress,
+            cancel=self._import_cancel,
+        )
+        self.frame.set_transfer_enabled(enabled=False)
+        self.frame.set_message(message="Importing…")
+        self.frame.after(IMPORT_POLL_MS, self._poll_import)
+
+    def _record_import_progress(self, imported: int, fraction: float) -> None:
+        # Runs on the import worker: only store the numbers, the Tk thread renders them.
+        self._import_progress = (imported, fraction)
+
+    def _poll_import(self) -> None:
+        future = self._import_future
+        if future is None:
+            return
+        if not future.done():
+            imported, fraction = self._import_progress
+            if self.current_deck_id == self._import_deck_id:
+                self.frame.set_message(message=f"Importing… {imported} cards ({fraction:.0%})")
+            self.frame.after(IMPORT_POLL_MS, self._poll_import)
+            return
+        self._import_future = None
+        self.frame.set_transfer_enabled(enabled=True)
+        try:
+            result: ImportResult = future.result()
+        except (ValueError, OSError) as exception:
+            self.frame.set_message(message=f"Import failed: {exception}")
+            return
+        if self.current_deck_id == self._import_deck_id:
+            self.refresh_cards()
+        status = "Imported" if result.completed else "Import paused after"
+        summary = f"{status} {result.imported} cards"
+        if result.skipped:
+            summary += f", skipped {result.skipped} invalid rows"
+        self.frame.set_message(message=summary + ".")
+
+    def export_deck(self) -> None:
+        """Write the current deck to CSV/JSONL/SQL in the background."""
+        if self.current_deck_id is None:
+            self.frame.set_message(message="No deck selected.")
+            return
+        if self._import_future is not None:
+            self.frame.set_message(message="An import is already running.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Deck",
+            initialfile=f"{self.current_deck_name}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON lines", "*.jsonl"), ("SQLite dump", "*.sql")],
+        )
+        if not path:
+            return
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        future = self._import_worker.submit(
+            self.main_model.decks.export_deck, user_id=user.id, deck_id=self.current_deck_id, path=path
+        )
+        self.frame.set_transfer_enabled(enabled=False)
+        self.frame.set_message(message="Exporting…")
+        self.frame.after(IMPORT_POLL_MS, lambda: self._poll_export(future=future))
+
+    def _poll_export(self, future: Future) -> None:
+        if not future.done():
+            self.frame.after(IMPORT_POLL_MS, lambda: self._poll_export(future=future))
+            return
+        self.frame.set_transfer_enabled(enabled=True)
+        try:
+            count = future.result()
+        except (ValueError, OSError) as exception:
+            self.frame.set_message(message=f"Export failed: {exception}")
+            return
+        self.frame.set_message(message=f"Exported {count} cards.")
+
+    def close(self) -> None:
+        """Stop a running import at its next batch; rerunning it later resumes from the checkpoint."""
+        self._import_cancel.set()
+        self._import_worker.shutdown(wait=True)
 
     def back_to_decks(self) -> None:
         self.main_view.switch(name="deck_list")
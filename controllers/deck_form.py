@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+from typing import Optional
+
+from controllers.background import DBExecutor, Request
 from controllers.utils import require_user
 from models.deck import DeckData
 from models.main import MainModel
@@ -9,13 +12,15 @@ __author__ = 'fenzl'
 
 
 class DeckFormController:
-    def __init__(self, main_model: MainModel, main_view: MainView, deck_list_controller):
+    def __init__(self, main_model: MainModel, main_view: MainView, executor: DBExecutor, deck_list_controller):
         """Handle create/edit of decks via the deck form view."""
         self.main_model = main_model
         self.main_view = main_view
+        self.executor = executor
         self.deck_list_controller = deck_list_controller
         self.frame = self.main_view.frames["deck_form"]
         self.current_deck_id: int | None = None
+        self._save_request: Optional[Request] = None
         self._bind()
 
     def _bind(self) -> None:
@@ -42,21 +47,32 @@ class DeckFormController:
 
     def save(self) -> None:
         """Persist changes and return to the deck list."""
+        if self._save_request is not None and self._save_request.active:
+            return  # a second click while saving would write twice
         name = self.frame.get_name().strip()
         desc = self.frame.get_description().strip()
         try:
             user = require_user(auth=self.main_model.users)
-            if self.current_deck_id is None:
-                self.main_model.decks.create_deck(user_id=user.id, name=name, description=desc)
-            else:
-                self.main_model.decks.update_deck(
-                    user_id=user.id, deck_id=self.current_deck_id, name=name, description=desc
-                )
-            self.deck_list_controller.refresh()
-            self.main_view.switch(name="deck_list")
         except ValueError as exception:
-            # Validation or missing auth/user context; surface message on the form.
             self.frame.set_message(message=str(exception))
+            return
+        deck_id = self.current_deck_id
+        if deck_id is None:
+            write = lambda: self.main_model.decks.create_deck(  # noqa: E731
+                user_id=user.id, name=name, description=desc
+            )
+        else:
+            write = lambda: self.main_model.decks.update_deck(  # noqa: E731
+                user_id=user.id, deck_id=deck_id, name=name, description=desc
+            )
+        # Validation errors (blank name) or a missing deck are shown on the form.
+        self._save_request = self.executor.submit(
+            frame="deck_form", fn=write, on_done=lambda _deck: self._saved(), cancellable=False
+        )
+
+    def _saved(self) -> None:
+        self.deck_list_controller.refresh()
+        self.main_view.switch(name="deck_list")
 
     def cancel(self) -> None:
         self.main_view.switch(name="deck_list")
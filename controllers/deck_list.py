@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 from tkinter import messagebox
-from typing import List, Optional, TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
+from controllers.background import DBExecutor, Request
 from controllers.utils import require_user, truncate_and_pad
-from models.deck import DeckData
+from models.deck import CardSearchResult, DeckData, DeckSummary, Page
 from models.main import MainModel
 from views.main import MainView
 
@@ -13,16 +14,25 @@ if TYPE_CHECKING:
     from controllers.deck_detail import DeckDetailController
     from controllers.deck_form import DeckFormController
 
+# Most search hits shown in the deck list.
+SEARCH_LIMIT = 200
+
 
 class DeckListController:
-    def __init__(self, main_model: MainModel, main_view: MainView):
+    def __init__(self, main_model: MainModel, main_view: MainView, executor: DBExecutor):
         """List decks for the current user and hand off to detail/form controllers."""
         self.main_model = main_model
         self.main_view = main_view
+        self.executor = executor
         self.frame = self.main_view.frames["deck_list"]
         self.detail_controller: "DeckDetailController | None" = None
         self.form_controller: "DeckFormController | None" = None
-        self._decks: List[DeckData] = []
+        self._decks: List[DeckSummary] = []
+        # Keyset cursor (name, id) of the next page, None once every deck is listed.
+        self._next_cursor: Optional[Tuple[str, int]] = None
+        self._page_request: Optional[Request] = None
+        # Card hits while a search is active; the list then shows cards instead of decks.
+        self._search_results: Optional[List[CardSearchResult]] = None
         self._bind()
 
     def set_detail_controller(self, controller: "DeckDetailController") -> None:
@@ -38,32 +48,120 @@ class DeckListController:
         self.frame.set_open_command(self.open_deck)
         self.frame.set_delete_command(self.delete_deck)
         self.frame.set_back_command(lambda: self.main_view.switch(name="home"))
+        self.frame.set_search_command(self.search)
+        self.frame.set_scroll_end_command(self.load_more)
 
     def refresh(self) -> None:
-        """Reload decks for the current user."""
+        """Reload decks, with card counts and score stats, for the current user."""
+        self.frame.clear_search()
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            # Missing auth; surface message to the list view.
+            self.frame.set_message(message=str(exception))
+            return
+        # A page still loading for the old list must not be appended to the new one.
+        self._next_cursor = None
+        self.executor.cancel(frame="deck_list", key="page")
+        self.executor.submit(
+            frame="deck_list",
+            key="list",
+            fn=lambda: self.main_model.decks.list_deck_summaries_page(user_id=user.id),
+            on_done=self._show_first_page,
+        )
+
+    def _show_first_page(self, page: Page[DeckSummary, Tuple[str, int]]) -> None:
         self._decks = []
+        self._search_results = None
         self.frame.clear_decks()
+        self._next_cursor = page.next_cursor
+        self._append_decks(decks=page.items)
+        self.frame.set_message(message="")
+
+    def load_more(self) -> None:
+        """Append the next page of decks once the list is scrolled to its end."""
+        if self._next_cursor is None or self._search_results is not None:
+            return
+        if self._page_request is not None and self._page_request.active:
+            return
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        after = self._next_cursor
+        self._page_request = self.executor.submit(
+            frame="deck_list",
+            key="page",
+            fn=lambda: self.main_model.decks.list_deck_summaries_page(user_id=user.id, after=after),
+            on_done=self._show_next_page,
+            on_error=self._page_failed,
+        )
+
+    def _show_next_page(self, page: Page[DeckSummary, Tuple[str, int]]) -> None:
+        self._next_cursor = page.next_cursor
+        self._append_decks(decks=page.items)
+
+    def _page_failed(self, exception: Exception) -> None:
+        self._next_cursor = None
+        self.frame.set_message(message=str(exception))
+
+    def _append_decks(self, decks: List[DeckSummary]) -> None:
+        self._decks.extend(decks)
+        for deck in decks:
+            name = truncate_and_pad(text=deck.name, width=18)
+            desc = truncate_and_pad(text=deck.description, width=16)
+            average = "  -" if deck.average_score is None else f"{deck.average_score:3.1f}"
+            self.frame.insert_deck(
+                f"{name} | {desc} | {deck.card_count:>5} cards | avg {average} | {deck.weak_count:>4} weak"
+                f" | {deck.zero_count:>4} new"
+            )
+
+    def search(self) -> None:
+        """Search card text across all decks; an empty query goes back to the deck list."""
+        query = self.frame.get_search_query().strip()
+        if not query:
+            self.refresh()
+            return
         try:
             user = require_user(auth=self.main_model.users)
-            decks = self.main_model.decks.list_decks(user_id=user.id)
-            self._decks = decks
-            for deck in decks:
-                name = truncate_and_pad(text=deck.name, width=22)
-                desc = truncate_and_pad(text=deck.description, width=28)
-                self.frame.insert_deck(f"{name} | {desc}")
-            self.frame.set_message(message="")
         except ValueError as exception:
-            # Missing auth or fetch failure; surface message to the list view.
             self.frame.set_message(message=str(exception))
+            return
+        self._next_cursor = None
+        self.executor.cancel(frame="deck_list", key="page")
+        self.executor.submit(
+            frame="deck_list",
+            key="list",
+            fn=lambda: self.main_model.decks.search_cards(user_id=user.id, query=query, limit=SEARCH_LIMIT),
+            on_done=self._show_hits,
+        )
+
+    def _show_hits(self, hits: List[CardSearchResult]) -> None:
+        self._search_results = hits
+        self.frame.clear_decks()
+        for hit in hits:
+            deck = truncate_and_pad(text=hit.deck_name, width=16)
+            question = truncate_and_pad(text=hit.question, width=34)
+            self.frame.insert_deck(f"{deck} | {question}")
+        self.frame.set_message(message=f"{len(hits)} matching cards." if hits else "No matching cards.")
+
+    def _selected_hit(self) -> Optional[CardSearchResult]:
+        index = self.frame.get_selected_index()
+        if self._search_results is None or index is None or index >= len(self._search_results):
+            return None
+        return self._search_results[index]
 
     def _selected_deck(self) -> Optional[DeckData]:
         """Return the currently highlighted deck, or None."""
+        if self._search_results is not None:
+            return None
         index = self.frame.get_selected_index()
         if index is None:
             return None
         if index >= len(self._decks):
             return None
-        return self._decks[index]
+        return self._decks[index].to_deck()
 
     def new_deck(self) -> None:
         """Open deck form in create mode."""
@@ -76,7 +174,11 @@ class DeckListController:
         """Open deck form in edit mode for the selected deck."""
         deck = self._selected_deck()
         if not deck:
-            self.frame.set_message(message="Select a deck to edit.")
+            if self._search_results is not None:
+                message = "Clear the search to edit decks."
+            else:
+                message = "Select a deck to edit."
+            self.frame.set_message(message=message)
             return
         if not self.form_controller:
             self.frame.set_message(message="Deck form unavailable.")
@@ -84,28 +186,39 @@ class DeckListController:
         self.form_controller.start_edit(deck=deck)
 
     def open_deck(self) -> None:
-        """Load selected deck into detail view."""
+        """Load selected deck (or the deck of the selected search hit) into detail view."""
+        hit = self._selected_hit()
         deck = self._selected_deck()
-        if not deck:
+        deck_id = hit.deck_id if hit else deck.id if deck else None
+        if deck_id is None:
             self.frame.set_message(message="Select a deck to open.")
             return
         if not self.detail_controller:
             self.frame.set_message(message="Deck detail controller unavailable.")
             return
-        self.detail_controller.load_deck(deck_id=deck.id)
+        self.detail_controller.load_deck(deck_id=deck_id)
         self.main_view.switch(name="deck_detail")
 
     def delete_deck(self) -> None:
         """Remove the selected deck after confirmation."""
         deck = self._selected_deck()
         if not deck:
-            self.frame.set_message(message="Select a deck to delete.")
+            if self._search_results is not None:
+                message = "Clear the search to delete decks."
+            else:
+                message = "Select a deck to delete."
+            self.frame.set_message(message=message)
             return
         if messagebox.askyesno("Delete Deck", f"Delete '{deck.name}'?"):
             try:
                 user = require_user(auth=self.main_model.users)
-                self.main_model.decks.delete_deck(user_id=user.id, deck_id=deck.id)
-                self.refresh()
             except ValueError as exception:
-                # Deleting without auth or against a missing deck.
                 self.frame.set_message(message=str(exception))
+                return
+            # Errors (e.g. the deck is already gone) are shown on the list.
+            self.executor.submit(
+                frame="deck_list",
+                fn=lambda: self.main_model.decks.delete_deck(user_id=user.id, deck_id=deck.id),
+                on_done=lambda _result: self.refresh(),
+                cancellable=False,
+            )
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from controllers.background import DBExecutor
+from models.deck import DeckStats
 from models.main import MainModel
 from views.main import MainView
 
@@ -7,12 +9,15 @@ __author__ = 'fenzl, ahsan'
 
 
 class HomeController:
-    def __init__(self, main_model: MainModel, main_view: MainView, deck_list_controller) -> None:
+    def __init__(self, main_model: MainModel, main_view: MainView, executor: DBExecutor, deck_list_controller) -> None:
         self.main_model = main_model
         self.main_view = main_view
+        self.executor = executor
         self.deck_list_controller = deck_list_controller
         self.frame = self.main_view.frames["home"]
         self._bind()
+        # Counters may have changed anywhere else in the app, so reload them whenever home is shown.
+        self.main_view.add_switch_listener(self._on_switch)
 
     def _bind(self) -> None:
         """Binds controller functions with respective buttons in the view"""
@@ -33,3 +38,23 @@ class HomeController:
             self.frame.set_greeting(text=f"Welcome, {name}!")
         else:
             self.frame.set_greeting(text="")
+
+    def _on_switch(self, name: str) -> None:
+        current_user = self.main_model.users.current_user
+        if name != "home" or not current_user:
+            return
+        user_id = current_user.id
+        self.executor.submit(
+            frame="home",
+            fn=lambda: self.main_model.decks.get_deck_stats(user_id=user_id),
+            on_done=self._show_stats,
+            on_error=lambda exception: self.frame.set_stats(text=str(exception)),
+            key="stats",
+        )
+
+    def _show_stats(self, stats: DeckStats) -> None:
+        average = "-" if stats.average_score is None else f"{stats.average_score:.1f}"
+        self.frame.set_stats(
+            text=f"{stats.deck_count} decks · {stats.card_count} cards · {stats.zero_count} new · "
+                 f"{stats.weak_count} weak · average score {average}"
+        )
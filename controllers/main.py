@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from controllers.background import DBExecutor
 from controllers.card_form import CardFormController
 from controllers.deck_detail import DeckDetailController
 from controllers.deck_form import DeckFormController
@@ -20,19 +21,34 @@ class MainController:
         # Root wiring: build controllers, then cross-link dependencies (list/detail/forms/study).
         self.main_view = main_view
         self.main_model = main_model
+        # Model calls from deck/card screens run here, off the Tk thread.
+        self.executor = DBExecutor(main_view=main_view)
         self.signin_controller = SignInController(main_model=main_model, main_view=main_view)
         self.signup_controller = SignUpController(main_model=main_model, main_view=main_view)
-        self.deck_list_controller = DeckListController(main_model=main_model, main_view=main_view)
-        self.deck_detail_controller = DeckDetailController(main_model=main_model, main_view=main_view)
+        self.deck_list_controller = DeckListController(
+            main_model=main_model, main_view=main_view, executor=self.executor
+        )
+        self.deck_detail_controller = DeckDetailController(
+            main_model=main_model, main_view=main_view, executor=self.executor
+        )
         self.study_controller = StudyController(main_model=main_model, main_view=main_view)
         self.deck_form_controller = DeckFormController(
-            main_model=main_model, main_view=main_view, deck_list_controller=self.deck_list_controller
+            main_model=main_model,
+            main_view=main_view,
+            executor=self.executor,
+            deck_list_controller=self.deck_list_controller,
         )
         self.card_form_controller = CardFormController(
-            main_model=main_model, main_view=main_view, deck_detail_controller=self.deck_detail_controller
+            main_model=main_model,
+            main_view=main_view,
+            executor=self.executor,
+            deck_detail_controller=self.deck_detail_controller,
         )
         self.home_controller = HomeController(
-            main_model=main_model, main_view=main_view, deck_list_controller=self.deck_list_controller
+            main_model=main_model,
+            main_view=main_view,
+            executor=self.executor,
+            deck_list_controller=self.deck_list_controller,
         )
 
         # Cross-wire navigation and forms.
@@ -46,16 +62,26 @@ class MainController:
         self.main_model.users.add_event_listener(
             event="auth_changed", fn=self.auth_state_listener
         )
+        self.main_view.set_close_command(self.close)
 
     def auth_state_listener(self, data: UserService) -> None:
         if data.current_user:
             self.main_model.decks.seed_sample(user_id=data.current_user.id)
-            self.deck_list_controller.refresh()
+            # The deck list loads itself when it is opened from home.
             self.home_controller.refresh()
             self.main_view.switch(name="home")
         else:
             self.main_view.switch(name="signin")
 
+    def close(self) -> None:
+        # Write any buffered study ratings before the window goes away.
+        try:
+            self.study_controller.close()
+            self.deck_detail_controller.close()
+            self.executor.close()
+        finally:
+            self.main_view.close()
+
     def start(self) -> None:
         # Here, you can do operations required before launching the gui, for example,
         # self.model.auth.load_auth_state()
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
-from typing import Optional, TYPE_CHECKING
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TYPE_CHECKING
 
 from controllers.utils import require_user
 from models.deck import CardData
+from models.logs import get_logger
 from models.main import MainModel
 from views.main import MainView
 
@@ -11,6 +16,15 @@ __author__ = 'fenzl'
 if TYPE_CHECKING:
     from controllers.deck_detail import DeckDetailController
 
+# How many upcoming cards the study session keeps ready.
+PREFETCH_DEPTH = 3
+# Interval (ms) at which the Tk loop checks for finished background work.
+POLL_INTERVAL_MS = 15
+# Buffered ratings are written at least this often (ms) while studying.
+SCORE_FLUSH_INTERVAL_MS = 5000
+
+logger = get_logger("study")
+
 
 class StudyController:
     def __init__(self, main_model: MainModel, main_view: MainView):
@@ -21,6 +35,20 @@ class StudyController:
         self.current_deck_id: int | None = None
         self.current_deck_name: str = ""
         self.current_card: Optional[CardData] = None
+        # When the current question appeared (time.monotonic), for the review log's response time.
+        self._shown_at = 0.0
+        # Study session state: one worker serializes score writes and draws, so a draw queued after a
+        # rating always sees the new score. Results are picked up on the Tk thread via after().
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="study")
+        self._queue: Deque[CardData] = deque()
+        self._pending: List[Tuple[Future, Callable, int]] = []
+        self._inflight_draws = 0
+        self._flush_job: Optional[str] = None
+        # Sequence number of the latest rating per card, used to discard draws made before that rating.
+        self._rating_seq = 0
+        self._rated_at: Dict[int, int] = {}
+        self._session_id = 0
+        self._polling = False
         self._bind()
 
     def set_detail_controller(self, controller: "DeckDetailController") -> None:
@@ -35,34 +63,173 @@ class StudyController:
     def start(self, deck_id: int, deck_name: str) -> None:
         self.current_deck_id = deck_id
         self.current_deck_name = deck_name
+        self._reset_session()
         self.frame.set_deck_title(name=deck_name)
         self.frame.set_message(message="")
+        self._schedule_flush()
         self.load_next_card()
 
-    def load_next_card(self) -> None:
+    def _reset_session(self) -> None:
+        """Drop queued cards and ignore results still in flight from an earlier session."""
+        self._session_id += 1
+        self._queue.clear()
+        self._inflight_draws = 0
+        self._rated_at.clear()
+        self.current_card = None
+
+    def _schedule_flush(self) -> None:
+        if self._flush_job is None:
+            self._flush_job = self.frame.after(SCORE_FLUSH_INTERVAL_MS, self._flush_tick)
+
+    def _flush_tick(self) -> None:
+        """Timer flush of buffered ratings; runs on the worker behind any queued ratings."""
+        self._flush_job = None
+        if self.main_model.decks.pending_score_count or self.main_model.decks.pending_review_count:
+            self._submit(fn=self.main_model.decks.flush_scores, on_done=self._on_flushed)
+        self._schedule_flush()
+
+    def _on_flushed(self, future: Future) -> None:
+        try:
+            future.result()
+        except Exception as exception:  # noqa: BLE001 - surface DB errors instead of losing them silently
+            self.frame.set_message(message=f"Could not save scores: {exception}")
+
+    def flush_scores(self) -> None:
+        """Persist buffered ratings now, waiting for ratings still queued on the worker."""
+        if self._flush_job is not None:
+            self.frame.after_cancel(self._flush_job)
+            self._flush_job = None
+        self._worker.submit(self.main_model.decks.flush_scores).result()
+
+    def close(self) -> None:
+        """Flush and stop the worker; called when the window closes."""
+        self.flush_scores()
+        self._worker.shutdown(wait=True)
+
+    def _submit(self, fn: Callable, on_done: Callable[[Future], None]) -> Future:
+        future = self._worker.submit(fn)
+        self._pending.append((future, on_done, self._session_id))
+        if not self._polling:
+            self._polling = True
+            self.frame.after(POLL_INTERVAL_MS, self._poll)
+        return future
+
+    def _poll(self) -> None:
+        """Hand finished background results to their callbacks on the Tk thread."""
+        pending, self._pending = self._pending, []
+        still_pending = []
+        try:
+            for future, on_done, session_id in pending:
+                if not future.done():
+                    still_pending.append((future, on_done, session_id))
+                elif session_id == self._session_id:
+                    try:
+                        on_done(future)
+                    except Exception:  # noqa: BLE001 - one failing callback must not stop the others
+                        self.main_view.root.report_callback_exception(*sys.exc_info())
+        finally:
+            # Callbacks may have submitted more work while we iterated.
+            self._pending = still_pending + self._pending
+            if self._pending:
+                self.frame.after(POLL_INTERVAL_MS, self._poll)
+            else:
+                self._polling = False
+
+    def _fill_queue(self) -> None:
+        """Top the queue up to PREFETCH_DEPTH with draws made on the worker thread."""
         if self.current_deck_id is None:
-            self.frame.set_message(message="No deck selected.")
             return
         try:
             user = require_user(auth=self.main_model.users)
-            card = self.main_model.decks.next_card_for_study(
-                user_id=user.id, deck_id=self.current_deck_id
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        deck_id = self.current_deck_id
+        seq = self._rating_seq
+        # A due-date draw returns the same card until it is reviewed, so scheduled mode only fetches
+        # the card about to be shown.
+        wanted = PREFETCH_DEPTH if self.main_model.decks.study_mode == "weighted" else 0
+        if self.current_card is None:
+            wanted = max(wanted, 1)
+        while len(self._queue) + self._inflight_draws < wanted:
+            self._inflight_draws += 1
+            self._submit(
+                fn=lambda: self.main_model.decks.next_card_for_study(user_id=user.id, deck_id=deck_id),
+                on_done=lambda future: self._on_card_drawn(future=future, seq=seq),
             )
-            self.current_card = card
-            if not card:
-                self.frame.set_message(message="No cards to study in this deck.")
-                self.frame.clear_card()
-                return
-            self.frame.set_message(message="")
-            self.frame.set_question(f"Q: {card.question}")
-            self.frame.set_answer("")
+
+    def _on_card_drawn(self, future: Future, seq: int) -> None:
+        self._inflight_draws -= 1
+        try:
+            card = future.result()
         except ValueError as exception:
             self.frame.set_message(message=str(exception))
+            return
+        except Exception as exception:  # noqa: BLE001 - a DB error must not leave the screen blank
+            logger.error("Study draw failed", exc_info=exception)
+            self.frame.set_message(message=f"Could not load the next card: {exception}")
+            return
+        if card is not None and self._rated_at.get(card.id, -1) > seq:
+            # Drawn with the weight it had before a later rating; draw again.
+            self._fill_queue()
+            return
+        if card is None:
+            # Empty deck: only report it if nothing is on screen yet.
+            if self.current_card is None and not self._queue and not self._inflight_draws:
+                if self.main_model.decks.study_mode == "scheduled":
+                    self.frame.set_message(message="No cards due in this deck.")
+                else:
+                    self.frame.set_message(message="No cards to study in this deck.")
+                self.frame.clear_card()
+            return
+        self._queue.append(card)
+        if self.current_card is None:
+            self._show_next()
+
+    def _show_next(self) -> None:
+        card = self._queue.popleft()
+        self.current_card = card
+        self._shown_at = time.monotonic()
+        self.frame.set_question(f"Q: {card.question}")
+        self.frame.set_answer("")
+
+    def load_next_card(self) -> None:
+        if self.current_deck_id is None:
+            self.frame.set_message(message="No deck selected.")
+            return
+        self.current_card = None
+        if self._queue:
+            self._show_next()
+        else:
+            self.frame.clear_card()
+        self._fill_queue()
 
     def show_answer(self) -> None:
         if not self.current_card:
             return
-        self.frame.set_answer(f"A: {self.current_card.answer}")
+        if self.current_card.answer is not None:
+            self.frame.set_answer(f"A: {self.current_card.answer}")
+            return
+        # Draws carry only the question; fetch the answer text now that it is asked for.
+        try:
+            user = require_user(auth=self.main_model.users)
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        card = self.current_card
+        self._submit(
+            fn=lambda: self.main_model.decks.get_answer(user_id=user.id, card_id=card.id),
+            on_done=lambda future: self._on_answer_loaded(future=future, card=card),
+        )
+
+    def _on_answer_loaded(self, future: Future, card: CardData) -> None:
+        try:
+            card.answer = future.result()
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        if self.current_card is card:  # still on screen
+            self.frame.set_answer(f"A: {card.answer}")
 
     def rate_card(self, delta: int) -> None:
         if not self.current_card:
@@ -73,15 +240,43 @@ class StudyController:
             return
         try:
             user = require_user(auth=self.main_model.users)
-            updated = self.main_model.decks.update_score(
-                user_id=user.id, card_id=self.current_card.id, delta=delta
+        except ValueError as exception:
+            self.frame.set_message(message=str(exception))
+            return
+        card_id = self.current_card.id
+        response_ms = int((time.monotonic() - self._shown_at) * 1000)
+        self._rating_seq += 1
+        self._rated_at[card_id] = self._rating_seq
+        # Queued copies of the rated card carry its old score/weight; drop them before showing the next card.
+        self._queue = deque(card for card in self._queue if card.id != card_id)
+        if self.main_model.decks.study_mode == "scheduled":
+            # Record the review and reschedule the card (SM-2); the next due draw runs after it on the worker.
+            rate = lambda: self.main_model.decks.record_review(  # noqa: E731
+                user_id=user.id, card_id=card_id, remembered=delta > 0, response_ms=response_ms
+            )
+        else:
+            rate = lambda: self.main_model.decks.buffer_score(  # noqa: E731
+                user_id=user.id, card_id=card_id, delta=delta, response_ms=response_ms
             )
-            self.frame.set_message(message=f"Updated score: {updated.score}")
-            self.load_next_card()
+        self._submit(fn=rate, on_done=self._on_score_updated)
+        self.load_next_card()
+
+    def _on_score_updated(self, future: Future) -> None:
+        try:
+            updated = future.result()
         except ValueError as exception:
             self.frame.set_message(message=str(exception))
+            return
+        self.frame.set_message(message=f"Updated score: {updated.score}")
 
     def back_to_deck(self) -> None:
+        # Persist buffered ratings so the reloaded deck shows current scores.
+        try:
+            self.flush_scores()
+        except Exception as exception:  # noqa: BLE001 - keep the user on this screen if scores were not saved
+            self.frame.set_message(message=f"Could not save scores: {exception}")
+            return
+        self._reset_session()
         # load the current deck so scores are updated
         if self.deck_detail_controller and self.current_deck_id is not None:
             try:
@@ -1,18 +1,39 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-
-from controllers.main import MainController
-from models.main import MainModel
-from views.main import MainView
+import sys
 
 
 __author__ = 'fenzl, ahsan'
 
 
-def main():
-    main_model = MainModel()
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    profiler = None
+    if "--profile-startup" in argv:
+        from startup_profile import StartupProfiler
+        profiler = StartupProfiler().install()
+
+    # Only Tkinter is needed to put the window on screen; SQLAlchemy, bcrypt, models and controllers
+    # are imported after the first paint.
+    from views.main import MainView
+
     main_view = MainView()
+    main_view.switch(name="signin")
+    main_view.root.update()
+    if profiler:
+        profiler.mark(phase="first paint")
+
+    from controllers.main import MainController
+    from models.main import MainModel
+
+    main_model = MainModel()
+    if profiler:
+        profiler.mark(phase="models ready (DB initialized)")
     main_controller = MainController(main_model=main_model, main_view=main_view)
+    if profiler:
+        profiler.mark(phase="controllers ready")
+        profiler.uninstall()
+        profiler.report()
     main_controller.start()
 
 
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Read-through cache for DeckService query results, with tag-based invalidation and LRU eviction."""
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from threading import Lock
+from typing import Any, Dict, Hashable, Iterable, Set, Tuple
+
+
+__author__ = 'fenzl'
+
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+# Returned by DeckCache.get when the key is not cached (None is a valid cached value).
+MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    """Rough deep size in bytes of a cached value (lists of dataclasses holding str/int/float)."""
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if is_dataclass(value):
+        return sys.getsizeof(value) + sum(estimate_size(getattr(value, item.name)) for item in fields(value))
+    return sys.getsizeof(value)
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class DeckCache:
+    """LRU map from query keys to results, bounded by an estimated memory budget.
+
+    Every entry carries tags such as ``("cards", user_id, deck_id)``; ``invalidate`` drops all
+    entries with any of the given tags, so a write evicts exactly the results that read the rows it
+    changed. Safe to use from the study prefetch and import workers.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        if max_bytes < 1:
+            raise ValueError("Cache budget must be positive.")
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Tuple[Hashable, ...]]]" = OrderedDict()
+        self._keys_by_tag: Dict[Hashable, Set[Hashable]] = {}
+        self._size = 0
+        # Bumped by every invalidation; a result loaded before a concurrent write is not stored.
+        self._generation = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, tags: Iterable[Hashable], generation: int) -> None:
+        """Store ``value`` unless an invalidation happened since ``generation`` was read."""
+        size = estimate_size(value)
+        with self._lock:
+            if generation != self._generation or size > self.max_bytes:
+                return
+            self._remove(key=key)
+            tags = tuple(tags)
+            self._entries[key] = (value, size, tags)
+            self._size += size
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(key=oldest)
+                self.evictions += 1
+
+    def invalidate(self, *tags: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._keys_by_tag.pop(tag, set()):
+                    self._remove(key=key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self._size = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self.hits, misses=self.misses, evictions=self.evictions,
+                entries=len(self._entries), size_bytes=self._size,
+            )
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _value, size, tags = entry
+        self._size -= size
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
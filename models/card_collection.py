@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Columnar in-memory card list for large decks."""
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, overload
+
+from models.deck import CardData
+
+
+__author__ = 'fenzl'
+
+
+class CardCollection(Sequence[CardData]):
+    """A ``List[CardData]`` replacement that stores cards column by column.
+
+    Ids and scores live in typed arrays (8 and 4 bytes per card) and the texts in two plain lists,
+    so a card costs its two strings plus a few pointers instead of a full object. ``CardData`` is
+    only built on access, which makes items snapshots: change scores with ``set_score``.
+    """
+
+    def __init__(self, cards: Iterable[CardData] = ()):
+        self._ids = array("q")
+        self._scores = array("i")
+        self._questions: List[str] = []
+        self._answers: List[Optional[str]] = []
+        self.extend(cards)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @overload
+    def __getitem__(self, index: int) -> CardData: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[CardData]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        return CardData(
+            id=self._ids[index], question=self._questions[index], answer=self._answers[index],
+            score=self._scores[index],
+        )
+
+    def __iter__(self) -> Iterator[CardData]:
+        for card_id, question, answer, score in zip(self._ids, self._questions, self._answers, self._scores):
+            yield CardData(id=card_id, question=question, answer=answer, score=score)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CardCollection):
+            return (self._ids, self._scores, self._questions, self._answers) == (
+                other._ids, other._scores, other._questions, other._answers
+            )
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(mine == theirs for mine, theirs in zip(self, other))
+        return NotImplemented
+
+    def append(self, card: CardData) -> None:
+        self._ids.append(card.id)
+        self._scores.append(card.score)
+        self._questions.append(card.question)
+        self._answers.append(card.answer)
+
+    def extend(self, cards: Iterable[CardData]) -> None:
+        for card in cards:
+            self.append(card=card)
+
+    def clear(self) -> None:
+        self._ids = array("q")
+        self._scores = array("i")
+        self._questions = []
+        self._answers = []
+
+    def position_of(self, card_id: int) -> int:
+        """Listbox position of a card; raises ValueError if it is not in the collection."""
+        return self._ids.index(card_id)
+
+    def set_score(self, index: int, score: int) -> None:
+        self._scores[index] = score
+
+    def remove_ids(self, card_ids: Iterable[int]) -> List[int]:
+        """Drop the given cards; returns the positions they had, ascending (unknown ids are ignored)."""
+        gone = set(card_ids)
+        positions = [index for index, card_id in enumerate(self._ids) if card_id in gone]
+        if positions:
+            keep = [index for index, card_id in enumerate(self._ids) if card_id not in gone]
+            self._ids = array("q", (self._ids[index] for index in keep))
+            self._scores = array("i", (self._scores[index] for index in keep))
+            self._questions = [self._questions[index] for index in keep]
+            self._answers = [self._answers[index] for index in keep]
+        return positions
@@ -1,18 +1,38 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from random import Random
-from typing import List, Optional
+from threading import Event, RLock
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import Session, relationship
+from sqlalchemy import (
+    DDL, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, and_, bindparam, case, delete, event, func,
+    insert, literal, literal_column, select, text, tuple_, update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, deferred, relationship
+from sqlalchemy.sql import ColumnElement
 
+from models.cache import MISSING, DeckCache
+from models.exporter import detect_export_format, write_export
+from models.importer import CardRowReader, ImportResult, detect_format, fingerprint
+from models.sampler import WeightedSampler
+from models.search import CARD_SEARCH_DDL, to_match_query
+from models.stats import DECK_STATS_DDL, DECK_STATS_DRIFT, DECK_STATS_REPAIR
+from models.scheduler import (
+    DEFAULT_EASE, FORGOTTEN_QUALITY, REMEMBERED_QUALITY, schedule_review, utcnow
+)
+from models.logs import get_logger
 from models.storage import Base, SessionLocal
 
 
 __author__ = 'fenzl'
 
+logger = get_logger("deck")
+
 
 class DeckRecord(Base):
     """ORM table for decks (persisted in SQLite)."""
@@ -23,7 +43,13 @@ class DeckRecord(Base):
     description = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
-    cards = relationship("CardRecord", back_populates="deck", cascade="all, delete-orphan")
+    # The database deletes a deck's cards (ON DELETE CASCADE); the ORM never loads them for that.
+    cards = relationship("CardRecord", back_populates="deck", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # list_decks filters by owner and sorts by name.
+        Index("ix_decks_user_name", "user_id", "name"),
+    )
 
 
 class CardRecord(Base):
@@ -32,15 +58,90 @@ class CardRecord(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     question = Column(Text, nullable=False)
-    answer = Column(Text, nullable=False)
+    # Answers run to several KB and are only shown on demand (see DeckService.get_answer), so ORM
+    # loads leave them out; put any other large column in the same group.
+    answer = deferred(Column(Text, nullable=False), group="full_text")
     score = Column(Integer, nullable=False, default=0)
-    deck_id = Column(Integer, ForeignKey("decks.id"), nullable=False, index=True)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # SM-2 scheduling state for the "scheduled" study mode; new cards are due immediately (epoch).
+    due_at = Column(DateTime, nullable=False, server_default=text("'1970-01-01 00:00:00.000000'"))
+    interval = Column(Integer, nullable=False, server_default=text("0"))
+    ease = Column(Float, nullable=False, server_default=text(str(DEFAULT_EASE)))
 
     deck = relationship("DeckRecord", back_populates="cards")
 
+    __table_args__ = (
+        # list_cards: rows come out in id (rowid) order, so no sort step.
+        Index("ix_cards_user_deck", "user_id", "deck_id"),
+        # Covering index for the study sampler's (id, score) projection.
+        Index("ix_cards_user_deck_score", "user_id", "deck_id", "score"),
+        # "Next due card" is a single range scan on this index.
+        Index("ix_cards_user_deck_due", "user_id", "deck_id", "due_at"),
+    )
 
-@dataclass
+
+# create_all (fresh databases, tests) builds the FTS index right after the cards table.
+for _statement in CARD_SEARCH_DDL:
+    event.listen(CardRecord.__table__, "after_create", DDL(_statement))
+
+
+class DeckStatsRecord(Base):
+    """Per-deck counters maintained by the triggers in models/stats.py; never written by the ORM."""
+    __tablename__ = "deck_stats"
+
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    card_count = Column(Integer, nullable=False, server_default=text("0"))
+    score_total = Column(Integer, nullable=False, server_default=text("0"))
+    zero_count = Column(Integer, nullable=False, server_default=text("0"))
+    weak_count = Column(Integer, nullable=False, server_default=text("0"))
+
+
+# The triggers span decks, cards and deck_stats, so they are created once all tables exist.
+for _statement in DECK_STATS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_statement))
+
+
+class ImportCheckpointRecord(Base):
+    """Progress of a card import, committed with each batch so an interrupted import can resume."""
+    __tablename__ = "import_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), nullable=False)
+    source = Column(Text, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    rows_done = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_import_checkpoints_job", "user_id", "deck_id", "source", unique=True),
+    )
+
+
+class ReviewLogRecord(Base):
+    """Append-only history of study ratings, one row per rating; written in batches by flush_scores."""
+    __tablename__ = "review_log"
+
+    id = Column(Integer, primary_key=True)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), nullable=False)
+    deck_id = Column(Integer, ForeignKey("decks.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    reviewed_at = Column(DateTime, nullable=False)
+    delta = Column(Integer, nullable=False)
+    # Card score after the rating, and how long the user looked at the question (None if unknown).
+    score = Column(Integer, nullable=False)
+    response_ms = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        # reviews_per_day: one range scan per user and period, delta read from the index itself.
+        Index("ix_review_log_user_time", "user_id", "reviewed_at", "delta"),
+        # lapse_counts: partial index holding only lapses, already grouped by deck and card.
+        Index("ix_review_log_lapses", "user_id", "deck_id", "card_id", "delta", sqlite_where=text("delta < 0")),
+    )
+
+
+@dataclass(slots=True)
 class DeckData:
     id: int
     name: str
@@ -51,11 +152,43 @@ class DeckData:
         return f"DeckData(id={self.id}, name={self.name!r}, desc={desc!r})"
 
 
-@dataclass
+@dataclass(slots=True)
+class DeckSummary:
+    """A deck with aggregates over its cards (scores are None for an empty deck)."""
+    id: int
+    name: str
+    description: str
+    card_count: int
+    average_score: Optional[float]
+    min_score: Optional[int]
+    max_score: Optional[int]
+    weak_count: int
+    zero_count: int
+
+    def to_deck(self) -> DeckData:
+        return DeckData(id=self.id, name=self.name, description=self.description)
+
+
+@dataclass(slots=True)
+class DeckStats:
+    """Counters of one deck, or summed over all of a user's decks."""
+    deck_count: int
+    card_count: int
+    score_total: int
+    zero_count: int
+    weak_count: int
+
+    @property
+    def average_score(self) -> Optional[float]:
+        return self.score_total / self.card_count if self.card_count else None
+
+
+@dataclass(slots=True)
 class CardData:
+    """A card; ``answer`` is None when it was not loaded (list and study reads), see ``get_answer``."""
     id: int
     question: str
-    answer: str
+    answer: Optional[str]
     score: int
 
     def __repr__(self) -> str:
@@ -63,18 +196,156 @@ class CardData:
         return f"CardData(id={self.id}, q={question_preview!r}, score={self.score})"
 
 
+@dataclass(slots=True)
+class CardSearchResult:
+    id: int
+    deck_id: int
+    deck_name: str
+    question: str
+    answer: Optional[str]
+    score: int
+
+    def __repr__(self) -> str:
+        question_preview = (self.question[:20] + "...") if len(self.question) > 20 else self.question
+        return f"CardSearchResult(id={self.id}, deck={self.deck_name!r}, q={question_preview!r})"
+
+    def to_card(self) -> CardData:
+        return CardData(id=self.id, question=self.question, answer=self.answer, score=self.score)
+
+
+@dataclass(slots=True)
+class ReviewDay:
+    day: date
+    reviews: int
+    lapses: int
+
+
+@dataclass(slots=True)
+class CardLapses:
+    card_id: int
+    deck_id: int
+    question: str
+    lapses: int
+
+
+T = TypeVar("T")
+C = TypeVar("C")
+
+
+@dataclass
+class Page(Generic[T, C]):
+    """One keyset page; pass ``next_cursor`` back to get the following page (None on the last page)."""
+    items: List[T]
+    next_cursor: Optional[C]
+
+
+DEFAULT_PAGE_SIZE = 200
+STUDY_MODES = ("weighted", "scheduled")
+
+
 class DeckService:
-    def __init__(self, session_factory=SessionLocal):
-        """Service layer for deck/card CRUD and study selection."""
+    def __init__(
+            self,
+            session_factory=SessionLocal,
+            score_flush_threshold: int = 20,
+            study_mode: str = "weighted",
+            cache: Optional[DeckCache] = None,
+    ):
+        """Service layer for deck/card CRUD and study selection.
+
+        ``score_flush_threshold`` caps how many buffered ratings (see ``buffer_score``) are held
+        before they are written out automatically. ``study_mode`` picks how ``next_card_for_study``
+        chooses cards: "weighted" (score-weighted random draw) or "scheduled" (SM-2 due dates).
+        With a ``cache``, deck and card list reads are served from memory until a write through this
+        service invalidates them.
+        """
+        if study_mode not in STUDY_MODES:
+            raise ValueError(f"Unknown study mode '{study_mode}'.")
+        self.study_mode = study_mode
+        self.cache = cache
         self._session_factory = session_factory
+        self._score_flush_threshold = score_flush_threshold
         self._rng = Random()
+        # Per-(user, deck) study samplers over (id, score), built lazily on first draw, plus the text of
+        # cards already drawn or written in this process so repeat draws skip the point lookup.
+        self._samplers: Dict[Tuple[int, int], WeightedSampler] = {}
+        self._study_cards: Dict[Tuple[int, int], Dict[int, CardData]] = {}
+        # Write-behind ratings: card_id -> (user_id, deck_id, new score), persisted by flush_scores().
+        self._pending_scores: Dict[int, Tuple[int, int, int]] = {}
+        # review_log rows of those ratings, inserted by the same flush.
+        self._pending_reviews: List[Dict[str, object]] = []
+        # Scores a flush has taken out of the buffer but not committed yet; reads still apply them.
+        self._flushing_scores: List[Dict[int, Tuple[int, int, int]]] = []
+        # Study prefetch draws on a worker thread while the UI thread writes; samplers are not thread-safe.
+        self._lock = RLock()
+        # Samplers and cache entries were updated as each write "committed"; a rolled-back unit of
+        # work (see SessionManager.unit_of_work) leaves them ahead of the database.
+        if hasattr(session_factory, "add_rollback_listener"):
+            session_factory.add_rollback_listener(self._discard_memory_state)
 
     def _session(self) -> Session:
         # Small helper to open a new SQLAlchemy session.
         return self._session_factory()
 
-    def _log(self, message: str) -> None:
-        print(f"[DeckService] {message}")
+    def _cached(self, key: Tuple, tags: List[Tuple], load: Callable[[], T]) -> T:
+        # Read-through: tags name the rows a result depends on, see _invalidate.
+        if self.cache is None:
+            return load()
+        value = self.cache.get(key=key)
+        if value is MISSING:
+            generation = self.cache.generation
+            value = load()
+            self.cache.put(key=key, value=value, tags=tags, generation=generation)
+        # Callers get their own list so appending to it cannot change the cached copy.
+        if isinstance(value, Page):
+            return Page(items=list(value.items), next_cursor=value.next_cursor)  # type: ignore
+        if isinstance(value, list):
+            return list(value)  # type: ignore
+        return value
+
+    def _invalidate(self, *tags: Tuple) -> None:
+        # Tags: ("deck", user, deck) one deck's row, ("decks", user) the user's deck lists,
+        # ("cards", user, deck) one deck's card lists, ("stats", user) the per-deck aggregates,
+        # ("card", user, card) / ("answers", user) one card's / all of the user's answer texts.
+        if self.cache is not None:
+            self.cache.invalidate(*tags)
+
+    def _discard_memory_state(self) -> None:
+        with self._lock:
+            self._samplers.clear()
+            self._study_cards.clear()
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _sampler_put(self, user_id: int, deck_id: int, card: CardData) -> None:
+        # Keep an already-built sampler in step with a created/edited/rescored card.
+        key = (user_id, deck_id)
+        with self._lock:
+            sampler = self._samplers.get(key)
+            if sampler is None:
+                return
+            sampler.add(card_id=card.id, score=card.score)
+            self._study_cards[key][card.id] = card
+
+    def _sampler_discard(self, user_id: int, deck_id: int, card_id: int) -> None:
+        key = (user_id, deck_id)
+        with self._lock:
+            sampler = self._samplers.get(key)
+            if sampler is None:
+                return
+            sampler.remove(card_id=card_id)
+            self._study_cards[key].pop(card_id, None)
+
+    def _current_score(self, card_id: int, stored: int) -> int:
+        # Reads must see ratings that are buffered or still being flushed, newest first.
+        for scores in (self._pending_scores, *reversed(self._flushing_scores)):
+            if card_id in scores:
+                return scores[card_id][2]
+        return stored
+
+    def _with_pending_score(self, card: CardData) -> CardData:
+        card.score = self._current_score(card_id=card.id, stored=card.score)
+        return card
 
     def create_deck(self, user_id: int, name: str, description: str = "") -> DeckData:
         if not name:
@@ -85,7 +356,8 @@ class DeckService:
             session.commit()
             session.refresh(deck)
             data = DeckData(id=deck.id, name=deck.name, description=deck.description or "")
-            self._log(message=f"Created deck {data}")
+            self._invalidate(("decks", user_id))
+            logger.info("Created deck %s", data)
             return data
 
     def update_deck(self, user_id: int, deck_id: int, name: str, description: str = "") -> DeckData:
@@ -104,35 +376,258 @@ class DeckService:
             session.commit()
             session.refresh(deck)
             data = DeckData(id=deck.id, name=deck.name, description=deck.description or "")  # type: ignore
-            self._log(message=f"Updated deck {data}")
+            self._invalidate(("deck", user_id, deck_id), ("decks", user_id))
+            logger.info("Updated deck %s", data)
             return data
 
     def list_decks(self, user_id: int) -> List[DeckData]:
+        return self._cached(
+            key=("list_decks", user_id), tags=[("decks", user_id)], load=lambda: self._query_decks(user_id=user_id)
+        )
+
+    def _query_decks(self, user_id: int) -> List[DeckData]:
         with self._session() as session:
             decks = (
                 session.query(DeckRecord)
                 .filter(DeckRecord.user_id == user_id)
-                .order_by(DeckRecord.name.asc())
+                .order_by(DeckRecord.name.asc(), DeckRecord.id.asc())
                 .all()
             )
             result = [DeckData(id=d.id, name=d.name, description=d.description or "") for d in decks]  # type: ignore
-            self._log(message=f"Fetched {len(result)} decks for user {user_id}")
+            logger.debug("Fetched %s decks for user %s", len(result), user_id)
             return result
 
+    def list_decks_page(
+            self, user_id: int, after: Optional[Tuple[str, int]] = None, page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Page[DeckData, Tuple[str, int]]:
+        """Decks ordered by (name, id), starting after the ``(name, id)`` cursor of the previous page."""
+        return self._cached(
+            key=("list_decks_page", user_id, after, page_size),
+            tags=[("decks", user_id)],
+            load=lambda: self._query_decks_page(user_id=user_id, after=after, page_size=page_size),
+        )
+
+    def _query_decks_page(
+            self, user_id: int, after: Optional[Tuple[str, int]], page_size: int
+    ) -> Page[DeckData, Tuple[str, int]]:
+        statement = (
+            select(DeckRecord.id, DeckRecord.name, DeckRecord.description)
+            .where(DeckRecord.user_id == user_id)
+            .order_by(DeckRecord.name.asc(), DeckRecord.id.asc())
+            .limit(page_size + 1)
+        )
+        if after is not None:
+            # Row-value comparison seeks straight into ix_decks_user_name instead of skipping OFFSET rows.
+            statement = statement.where(tuple_(DeckRecord.name, DeckRecord.id) > tuple_(*after))
+        with self._session() as session:
+            rows = session.execute(statement).all()
+        items = [DeckData(id=row.id, name=row.name, description=row.description or "") for row in rows[:page_size]]
+        next_cursor = (items[-1].name, items[-1].id) if len(rows) > page_size else None
+        logger.debug("Fetched page of %s decks for user %s", len(items), user_id)
+        return Page(items=items, next_cursor=next_cursor)
+
+    def list_deck_summaries(self, user_id: int) -> List[DeckSummary]:
+        """Every deck of the user with card count and score aggregates, read from deck_stats in one query."""
+        # Buffered ratings are not in the table yet; write them so the aggregates include them.
+        self.flush_scores()
+        return self._cached(
+            key=("list_deck_summaries", user_id),
+            tags=[("decks", user_id), ("stats", user_id)],
+            load=lambda: self._query_deck_summaries(user_id=user_id),
+        )
+
+    def _query_deck_summaries(self, user_id: int) -> List[DeckSummary]:
+        with self._session() as session:
+            rows = session.execute(self._deck_summary_statement(user_id=user_id)).all()
+        result = [self._to_summary(row=row) for row in rows]
+        logger.debug("Fetched %s deck summaries for user %s", len(result), user_id)
+        return result
+
+    def list_deck_summaries_page(
+            self, user_id: int, after: Optional[Tuple[str, int]] = None, page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Page[DeckSummary, Tuple[str, int]]:
+        """Keyset-paged list_deck_summaries, with the same ``(name, id)`` cursor as list_decks_page."""
+        self.flush_scores()
+        return self._cached(
+            key=("list_deck_summaries_page", user_id, after, page_size),
+            tags=[("decks", user_id), ("stats", user_id)],
+            load=lambda: self._query_deck_summaries_page(user_id=user_id, after=after, page_size=page_size),
+        )
+
+    def _query_deck_summaries_page(
+            self, user_id: int, after: Optional[Tuple[str, int]], page_size: int
+    ) -> Page[DeckSummary, Tuple[str, int]]:
+        statement = self._deck_summary_statement(user_id=user_id).limit(page_size + 1)
+        if after is not None:
+            statement = statement.where(tuple_(DeckRecord.name, DeckRecord.id) > tuple_(*after))
+        with self._session() as session:
+            rows = session.execute(statement).all()
+        items = [self._to_summary(row=row) for row in rows[:page_size]]
+        next_cursor = (items[-1].name, items[-1].id) if len(rows) > page_size else None
+        logger.debug("Fetched page of %s deck summaries for user %s", len(items), user_id)
+        return Page(items=items, next_cursor=next_cursor)
+
+    @staticmethod
+    def _deck_summary_statement(user_id: int):
+        # Counts come from each deck's deck_stats row (a primary-key lookup); min/max are single seeks
+        # into ix_cards_user_deck_score. No card rows are aggregated, however large the decks.
+        stats = DeckStatsRecord.__table__
+        in_deck = and_(CardRecord.user_id == DeckRecord.user_id, CardRecord.deck_id == DeckRecord.id)
+        return (
+            select(
+                DeckRecord.id,
+                DeckRecord.name,
+                DeckRecord.description,
+                func.coalesce(stats.c.card_count, 0).label("card_count"),
+                (stats.c.score_total * 1.0 / func.nullif(stats.c.card_count, 0)).label("average_score"),
+                select(func.min(CardRecord.score)).where(in_deck).scalar_subquery().label("min_score"),
+                select(func.max(CardRecord.score)).where(in_deck).scalar_subquery().label("max_score"),
+                func.coalesce(stats.c.weak_count, 0).label("weak_count"),
+                func.coalesce(stats.c.zero_count, 0).label("zero_count"),
+            )
+            .outerjoin(stats, stats.c.deck_id == DeckRecord.id)
+            .where(DeckRecord.user_id == user_id)
+            .order_by(DeckRecord.name.asc(), DeckRecord.id.asc())
+        )
+
+    @staticmethod
+    def _to_summary(row) -> DeckSummary:
+        return DeckSummary(
+            id=row.id,
+            name=row.name,
+            description=row.description or "",
+            card_count=row.card_count,
+            average_score=row.average_score,
+            min_score=row.min_score,
+            max_score=row.max_score,
+            weak_count=row.weak_count,
+            zero_count=row.zero_count,
+        )
+
+    def get_deck_stats(self, user_id: int, deck_id: Optional[int] = None) -> DeckStats:
+        """Counters of one deck (a single row read) or, without ``deck_id``, summed over the user's decks."""
+        self.flush_scores()
+        stats = DeckStatsRecord.__table__
+        totals = [
+            func.coalesce(func.sum(column), 0)
+            for column in (stats.c.card_count, stats.c.score_total, stats.c.zero_count, stats.c.weak_count)
+        ]
+        statement = select(func.count(), *totals).where(stats.c.user_id == user_id)
+        if deck_id is not None:
+            statement = statement.where(stats.c.deck_id == deck_id)
+        with self._session() as session:
+            row = session.execute(statement).one()
+        if deck_id is not None and not row[0]:
+            raise ValueError("Deck not found.")
+        return DeckStats(deck_count=row[0], card_count=row[1], score_total=row[2], zero_count=row[3], weak_count=row[4])
+
+    def check_deck_stats(self, repair: bool = True) -> List[int]:
+        """Compare deck_stats with counters recomputed from cards; returns the ids of decks that drifted.
+
+        With ``repair`` those rows are rebuilt (and rows of deleted decks removed) in one transaction.
+        This reads every card's index entry, so run it as maintenance, not on a hot path.
+        """
+        self.flush_scores()
+        delete_orphans, rebuild = DECK_STATS_REPAIR
+        with self._session() as session:
+            # Raw SQL runs on the writer (see RoutingSession), so check and repair share one transaction.
+            deck_ids = sorted(session.execute(text(DECK_STATS_DRIFT)).scalars())
+            if repair and deck_ids:
+                session.execute(text(delete_orphans))
+                session.execute(
+                    text(rebuild).bindparams(bindparam("deck_ids", expanding=True)), {"deck_ids": deck_ids}
+                )
+                session.commit()
+        if repair and deck_ids and self.cache is not None:
+            self.cache.clear()
+        if deck_ids:
+            logger.warning("Deck stats drifted for decks %s (repaired=%s)", deck_ids, repair)
+        else:
+            logger.debug("Deck stats are consistent")
+        return deck_ids
+
     def delete_deck(self, user_id: int, deck_id: int) -> None:
+        # One statement: cards, review log rows, deck_stats and import checkpoints go with the deck
+        # through ON DELETE CASCADE (PRAGMA foreign_keys=ON, see storage.enable_foreign_keys).
+        decks = DeckRecord.__table__
         with self._session() as session:
-            deck = (
-                session.query(DeckRecord)
-                .filter(DeckRecord.id == deck_id, DeckRecord.user_id == user_id)
-                .first()
+            result = session.execute(delete(decks).where(decks.c.id == deck_id, decks.c.user_id == user_id))
+            if not result.rowcount:
+                raise ValueError("Deck not found.")  # No deck for this user.
+            session.commit()
+            with self._lock:
+                self._samplers.pop((user_id, deck_id), None)
+                self._study_cards.pop((user_id, deck_id), None)
+                self._pending_scores = {
+                    card_id: entry for card_id, entry in self._pending_scores.items() if entry[1] != deck_id
+                }
+                self._pending_reviews = [review for review in self._pending_reviews if review["deck_id"] != deck_id]
+            self._invalidate(
+                ("deck", user_id, deck_id), ("decks", user_id), ("cards", user_id, deck_id), ("answers", user_id)
             )
-            if not deck:
+            logger.info("Deleted deck id=%s for user %s", deck_id, user_id)
+
+    def clone_deck(
+            self, source_user_id: int, source_deck_id: int, target_user_id: int, reset_scores: bool = True
+    ) -> DeckData:
+        """Copy a deck and all of its cards to ``target_user_id`` (the same user duplicates it).
+
+        The copy is made inside SQLite: one INSERT ... SELECT for the deck and one for its cards, in one
+        transaction. With ``reset_scores`` the copies start as new cards; otherwise scores and SM-2 state
+        are copied too. Review history is never copied.
+        """
+        decks = DeckRecord.__table__
+        cards = CardRecord.__table__
+        deck_statement = (
+            insert(decks)
+            .from_select(
+                ["name", "description", "user_id"],
+                select(decks.c.name, decks.c.description, literal(target_user_id)).where(
+                    decks.c.id == source_deck_id, decks.c.user_id == source_user_id
+                ),
+            )
+            .returning(decks.c.id, decks.c.name, decks.c.description)
+        )
+        # Target column -> value selected from the source card; columns left out take their defaults.
+        values: Dict[str, ColumnElement] = {"question": cards.c.question, "answer": cards.c.answer}
+        if reset_scores:
+            values["score"] = literal(0)
+        else:
+            self.flush_scores()  # buffered ratings must be in the rows being copied
+            values.update((name, cards.c[name]) for name in ("score", "due_at", "interval", "ease"))
+        with self._session() as session:
+            try:
+                deck = session.execute(deck_statement).first()
+            except IntegrityError as exception:
+                session.rollback()
+                raise ValueError("User not found.") from exception
+            if deck is None:
                 raise ValueError("Deck not found.")  # No deck for this user.
-            session.delete(deck)
+            values.update(deck_id=literal(deck.id), user_id=literal(target_user_id))
+            card_statement = insert(cards).from_select(
+                list(values),
+                select(*values.values())
+                .where(cards.c.user_id == source_user_id, cards.c.deck_id == source_deck_id)
+                .order_by(cards.c.id),
+            )
+            count = session.execute(card_statement).rowcount
             session.commit()
-            self._log(message=f"Deleted deck id={deck_id} for user {user_id}")
+        data = DeckData(id=deck.id, name=deck.name, description=deck.description or "")
+        self._invalidate(("decks", target_user_id), ("stats", target_user_id))
+        logger.info(
+            "Cloned deck id=%s of user %s with %s cards to %s of user %s",
+            source_deck_id, source_user_id, count, data, target_user_id,
+        )
+        return data
 
     def get_deck(self, user_id: int, deck_id: int) -> DeckData:
+        return self._cached(
+            key=("get_deck", user_id, deck_id),
+            tags=[("deck", user_id, deck_id)],
+            load=lambda: self._query_deck(user_id=user_id, deck_id=deck_id),
+        )
+
+    def _query_deck(self, user_id: int, deck_id: int) -> DeckData:
         with self._session() as session:
             deck = (
                 session.query(DeckRecord)
@@ -142,50 +637,79 @@ class DeckService:
             if not deck:
                 raise ValueError("Deck not found.")
             data = DeckData(id=deck.id, name=deck.name, description=deck.description or "")  # type: ignore
-            self._log(message=f"Loaded deck {data}")
+            logger.debug("Loaded deck %s", data)
             return data
 
     def add_card(self, user_id: int, deck_id: int, question: str, answer: str) -> CardData:
         if not question or not answer:
             raise ValueError("Question and answer are required.")  # Validation guard.
-        with self._session() as session:
-            deck = (
-                session.query(DeckRecord)
-                .filter(DeckRecord.id == deck_id, DeckRecord.user_id == user_id)
-                .first()
+        cards = CardRecord.__table__
+        # INSERT ... SELECT FROM decks: the ownership check and the insert are one statement; no row
+        # is inserted (and none returned) unless the deck belongs to the user.
+        statement = (
+            insert(cards)
+            .from_select(
+                ["question", "answer", "score", "deck_id", "user_id"],
+                select(
+                    literal(question, type_=Text), literal(answer, type_=Text), literal(0), DeckRecord.id,
+                    DeckRecord.user_id,
+                ).where(DeckRecord.id == deck_id, DeckRecord.user_id == user_id),
             )
-            if not deck:
+            .returning(cards.c.id, cards.c.score)
+        )
+        with self._session() as session:
+            row = session.execute(statement).first()
+            if row is None:
                 raise ValueError("Deck not found.")  # No deck for this user.
-            card = CardRecord(
-                question=question, answer=answer, score=0, deck_id=deck_id, user_id=user_id
-            )
-            session.add(card)
             session.commit()
-            session.refresh(card)
-            data = CardData(id=card.id, question=card.question, answer=card.answer, score=card.score)
-            self._log(message=f"Added card {data} to deck {deck_id}")
-            return data
+        data = CardData(id=row.id, question=question, answer=answer, score=row.score)
+        self._sampler_put(user_id=user_id, deck_id=deck_id, card=data)
+        self._invalidate(("cards", user_id, deck_id), ("stats", user_id))
+        logger.info("Added card %s to deck %s", data, deck_id)
+        return data
 
     def update_card(
             self, user_id: int, card_id: int, question: Optional[str] = None, answer: Optional[str] = None
     ) -> CardData:
+        cards = CardRecord.__table__
+        values = {name: value for name, value in (("question", question), ("answer", answer)) if value}
+        owned = and_(cards.c.id == card_id, cards.c.user_id == user_id)
+        columns = (cards.c.id, cards.c.question, cards.c.answer, cards.c.score, cards.c.deck_id)
+        # One UPDATE ... RETURNING both checks ownership and hands back the edited row.
+        if values:
+            statement = update(cards).where(owned).values(**values).returning(*columns)
+        else:
+            statement = select(*columns).where(owned)  # nothing to change
         with self._session() as session:
-            card = (
-                session.query(CardRecord)
-                .filter(CardRecord.id == card_id, CardRecord.user_id == user_id)
-                .first()
-            )
-            if not card:
+            row = session.execute(statement).first()
+            if row is None:
                 raise ValueError("Card not found.")  # Missing or not owned by user.
-            if question:
-                card.question = question
-            if answer:
-                card.answer = answer
             session.commit()
-            session.refresh(card)
-            data = CardData(id=card.id, question=card.question, answer=card.answer, score=card.score)  # type: ignore
-            self._log(message=f"Updated card {data}")
-            return data
+        data = CardData(id=row.id, question=row.question, answer=row.answer, score=row.score)
+        with self._lock:
+            self._with_pending_score(card=data)
+            self._sampler_put(user_id=user_id, deck_id=row.deck_id, card=data)
+        self._invalidate(("cards", user_id, row.deck_id), ("card", user_id, card_id))
+        logger.info("Updated card %s", data)
+        return data
+
+    def get_answer(self, user_id: int, card_id: int) -> str:
+        """Full answer text of a card; list and study reads leave it out (``CardData.answer`` is None)."""
+        return self._cached(
+            key=("get_answer", user_id, card_id),
+            tags=[("card", user_id, card_id), ("answers", user_id)],
+            load=lambda: self._query_answer(user_id=user_id, card_id=card_id),
+        )
+
+    def _query_answer(self, user_id: int, card_id: int) -> str:
+        with self._session() as session:
+            answer = session.execute(
+                select(CardRecord.answer).where(CardRecord.id == card_id, CardRecord.user_id == user_id)
+            ).scalar_one_or_none()
+        if answer is None:
+            raise ValueError("Card not found.")
+        logger.debug("Loaded answer of card id=%s (%s chars)", card_id, len(answer))
+        return answer
 
     def delete_card(self, user_id: int, card_id: int) -> None:
         with self._session() as session:
@@ -196,25 +720,356 @@ class DeckService:
             )
             if not card:
                 raise ValueError("Card not found.")
+            deck_id = card.deck_id
             session.delete(card)
             session.commit()
-            self._log(message=f"Deleted card id={card_id} for user {user_id}")
+            with self._lock:
+                self._pending_scores.pop(card_id, None)
+                self._pending_reviews = [review for review in self._pending_reviews if review["card_id"] != card_id]
+                self._sampler_discard(user_id=user_id, deck_id=deck_id, card_id=card_id)  # type: ignore
+            self._invalidate(("cards", user_id, deck_id), ("stats", user_id), ("card", user_id, card_id))
+            logger.info("Deleted card id=%s for user %s", card_id, user_id)
+
+    # Bulk operations on cards selected in one deck. Each is a single set-based statement (plus, for
+    # moves, the matching review log update) in one transaction; ids that are not in the user's deck
+    # are skipped. They return what changed so the card list can be patched instead of reloaded.
+
+    def _owned_in_deck(self, user_id: int, deck_id: int, card_ids: List[int]) -> ColumnElement[bool]:
+        if not card_ids:
+            raise ValueError("No cards selected.")
+        cards = CardRecord.__table__
+        return and_(cards.c.user_id == user_id, cards.c.deck_id == deck_id, cards.c.id.in_(card_ids))
+
+    def _flush_pending_for(self, card_ids: List[int]) -> None:
+        # Persist buffered ratings and review rows of these cards first, so the set-based write applies on
+        # top of them (a queued review row still carries the card's old deck_id).
+        with self._lock:
+            selected = set(card_ids)
+            pending = not selected.isdisjoint(self._pending_scores) or any(
+                review["card_id"] in selected for review in self._pending_reviews
+            )
+        if pending:
+            self.flush_scores()
+
+    def _deck_exists(self, session: Session, user_id: int, deck_id: int) -> bool:
+        return session.execute(
+            select(DeckRecord.id).where(DeckRecord.id == deck_id, DeckRecord.user_id == user_id)
+        ).first() is not None
+
+    def bulk_delete_cards(self, user_id: int, deck_id: int, card_ids: List[int]) -> List[int]:
+        """Delete the given cards of a deck; returns the ids actually deleted."""
+        cards = CardRecord.__table__
+        statement = (
+            delete(cards).where(self._owned_in_deck(user_id=user_id, deck_id=deck_id, card_ids=card_ids))
+            .returning(cards.c.id)
+        )
+        with self._session() as session:
+            deleted = list(session.execute(statement).scalars())
+            session.commit()
+        gone = set(deleted)
+        with self._lock:
+            for card_id in deleted:
+                self._pending_scores.pop(card_id, None)
+                self._sampler_discard(user_id=user_id, deck_id=deck_id, card_id=card_id)
+            self._pending_reviews = [review for review in self._pending_reviews if review["card_id"] not in gone]
+        self._invalidate(
+            ("cards", user_id, deck_id), ("stats", user_id), *(("card", user_id, card_id) for card_id in deleted)
+        )
+        logger.info("Deleted %s cards from deck %s for user %s", len(deleted), deck_id, user_id)
+        return deleted
+
+    def move_cards(self, user_id: int, deck_id: int, card_ids: List[int], to_deck_id: int) -> List[int]:
+        """Move the given cards of a deck (with their review history) to another of the user's decks."""
+        if to_deck_id == deck_id:
+            raise ValueError("Choose a different deck.")
+        self._flush_pending_for(card_ids=card_ids)
+        cards = CardRecord.__table__
+        review_log = ReviewLogRecord.__table__
+        target = select(DeckRecord.id).where(DeckRecord.id == to_deck_id, DeckRecord.user_id == user_id).exists()
+        statement = (
+            update(cards)
+            .where(self._owned_in_deck(user_id=user_id, deck_id=deck_id, card_ids=card_ids), target)
+            .values(deck_id=to_deck_id)
+            .returning(cards.c.id, cards.c.question, cards.c.score)
+        )
+        with self._session() as session:
+            rows = session.execute(statement).all()
+            if not rows and not self._deck_exists(session=session, user_id=user_id, deck_id=to_deck_id):
+                raise ValueError("Deck not found.")
+            moved = [row.id for row in rows]
+            if moved:
+                # Reviews follow the card, so analytics and deleting the old deck leave them alone.
+                session.execute(update(review_log).where(review_log.c.card_id.in_(moved)).values(deck_id=to_deck_id))
+            session.commit()
+        with self._lock:
+            for row in rows:
+                self._sampler_discard(user_id=user_id, deck_id=deck_id, card_id=row.id)
+                self._sampler_put(
+                    user_id=user_id, deck_id=to_deck_id,
+                    card=CardData(id=row.id, question=row.question, answer=None, score=row.score),
+                )
+        self._invalidate(("cards", user_id, deck_id), ("cards", user_id, to_deck_id), ("stats", user_id))
+        logger.info("Moved %s cards from deck %s to deck %s for user %s", len(moved), deck_id, to_deck_id, user_id)
+        return moved
+
+    def reset_scores(self, user_id: int, deck_id: int, card_ids: List[int]) -> List[CardData]:
+        """Put the given cards back into the new-card state (score 0, due now, default SM-2 state).
+
+        Returns the reset cards (without answers). Their review history is kept.
+        """
+        self._flush_pending_for(card_ids=card_ids)
+        cards = CardRecord.__table__
+        statement = (
+            update(cards)
+            .where(self._owned_in_deck(user_id=user_id, deck_id=deck_id, card_ids=card_ids))
+            .values(
+                score=0, due_at=cards.c.due_at.server_default.arg, interval=cards.c.interval.server_default.arg,
+                ease=cards.c.ease.server_default.arg,
+            )
+            .returning(cards.c.id, cards.c.question, cards.c.score)
+        )
+        with self._session() as session:
+            reset = [
+                CardData(id=row.id, question=row.question, answer=None, score=row.score)
+                for row in session.execute(statement)
+            ]
+            session.commit()
+        with self._lock:
+            for card in reset:
+                self._sampler_put(user_id=user_id, deck_id=deck_id, card=card)
+        self._invalidate(("cards", user_id, deck_id), ("stats", user_id))
+        logger.info("Reset scores of %s cards in deck %s for user %s", len(reset), deck_id, user_id)
+        return reset
+
+    def copy_cards(self, user_id: int, deck_id: int, card_ids: List[int], to_deck_id: int) -> List[CardData]:
+        """Copy the given cards of a deck into one of the user's decks (the same one duplicates them).
+
+        Copies are new cards (score 0, no review history); returns them without answers.
+        """
+        if not card_ids:
+            raise ValueError("No cards selected.")
+        cards = CardRecord.__table__
+        source = cards.alias("source")
+        # INSERT ... SELECT: the text is copied inside SQLite, never loaded into Python.
+        statement = (
+            insert(cards)
+            .from_select(
+                ["question", "answer", "score", "deck_id", "user_id"],
+                select(source.c.question, source.c.answer, literal(0), DeckRecord.id, DeckRecord.user_id)
+                .join(DeckRecord, and_(DeckRecord.id == to_deck_id, DeckRecord.user_id == source.c.user_id))
+                .where(source.c.user_id == user_id, source.c.deck_id == deck_id, source.c.id.in_(card_ids))
+                .order_by(source.c.id),
+            )
+            .returning(cards.c.id, cards.c.question, cards.c.score)
+        )
+        with self._session() as session:
+            rows = session.execute(statement).all()
+            if not rows and not self._deck_exists(session=session, user_id=user_id, deck_id=to_deck_id):
+                raise ValueError("Deck not found.")
+            session.commit()
+        copies = [CardData(id=row.id, question=row.question, answer=None, score=row.score) for row in rows]
+        with self._lock:
+            for card in copies:
+                self._sampler_put(user_id=user_id, deck_id=to_deck_id, card=card)
+        self._invalidate(("cards", user_id, to_deck_id), ("stats", user_id))
+        logger.info("Copied %s cards from deck %s to deck %s for user %s", len(copies), deck_id, to_deck_id, user_id)
+        return copies
 
     def list_cards(self, user_id: int, deck_id: int) -> List[CardData]:
+        return self._cached(
+            key=("list_cards", user_id, deck_id),
+            tags=[("cards", user_id, deck_id)],
+            load=lambda: self._query_cards(user_id=user_id, deck_id=deck_id),
+        )
+
+    def _query_cards(self, user_id: int, deck_id: int) -> List[CardData]:
+        # Rows rather than CardRecord entities: no identity-map bookkeeping, and no answer text.
         with self._session() as session:
-            cards = (
-                session.query(CardRecord)
-                .filter(CardRecord.deck_id == deck_id, CardRecord.user_id == user_id)
+            rows = session.execute(
+                select(CardRecord.id, CardRecord.question, CardRecord.score)
+                .where(CardRecord.deck_id == deck_id, CardRecord.user_id == user_id)
                 .order_by(CardRecord.id.asc())
-                .all()
-            )
+            ).all()
+        with self._lock:
             result = [
-                CardData(id=c.id, question=c.question, answer=c.answer, score=c.score) for c in cards  # type: ignore
+                self._with_pending_score(card=CardData(id=row.id, question=row.question, answer=None, score=row.score))
+                for row in rows
             ]
-            self._log(message=f"Fetched {len(result)} cards for deck {deck_id} (user {user_id})")
-            return result
+        logger.debug("Fetched %s cards for deck %s (user %s)", len(result), deck_id, user_id)
+        return result
+
+    def list_cards_page(
+            self, user_id: int, deck_id: int, after_id: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Page[CardData, int]:
+        """Cards of a deck in id order, starting after card ``after_id`` (the previous page's cursor)."""
+        return self._cached(
+            key=("list_cards_page", user_id, deck_id, after_id, page_size),
+            tags=[("cards", user_id, deck_id)],
+            load=lambda: self._query_cards_page(
+                user_id=user_id, deck_id=deck_id, after_id=after_id, page_size=page_size
+            ),
+        )
+
+    def _query_cards_page(
+            self, user_id: int, deck_id: int, after_id: Optional[int], page_size: int
+    ) -> Page[CardData, int]:
+        statement = (
+            select(CardRecord.id, CardRecord.question, CardRecord.score)
+            .where(CardRecord.deck_id == deck_id, CardRecord.user_id == user_id)
+            .order_by(CardRecord.id.asc())
+            .limit(page_size + 1)
+        )
+        if after_id is not None:
+            statement = statement.where(CardRecord.id > after_id)
+        with self._session() as session:
+            rows = session.execute(statement).all()
+        with self._lock:
+            items = [
+                self._with_pending_score(
+                    card=CardData(id=row.id, question=row.question, answer=None, score=row.score)
+                )
+                for row in rows[:page_size]
+            ]
+        next_cursor = items[-1].id if len(rows) > page_size else None
+        logger.debug("Fetched page of %s cards for deck %s (user %s)", len(items), deck_id, user_id)
+        return Page(items=items, next_cursor=next_cursor)
+
+    def update_score(self, user_id: int, card_id: int, delta: int, response_ms: Optional[int] = None) -> CardData:
+        if card_id in self._pending_scores:
+            # Persist the buffered rating first so the delta applies on top of it.
+            self.flush_scores()
+        cards = CardRecord.__table__
+        # Ownership check, floored increment and read-back in one statement (SQLite's scalar max()).
+        statement = (
+            update(cards)
+            .where(cards.c.id == card_id, cards.c.user_id == user_id)
+            .values(score=func.max(0, cards.c.score + delta))
+            .returning(cards.c.id, cards.c.question, cards.c.score, cards.c.deck_id)
+        )
+        with self._session() as session:
+            row = session.execute(statement).first()
+            if row is None:
+                raise ValueError("Card not found.")
+            data = CardData(id=row.id, question=row.question, answer=None, score=row.score)
+            # The log row commits (or rolls back, inside a unit of work) together with the score.
+            session.execute(
+                insert(ReviewLogRecord.__table__),
+                self._review_row(user_id=user_id, deck_id=row.deck_id, card=data, delta=delta, response_ms=response_ms),
+            )
+            session.commit()
+        with self._lock:
+            self._sampler_put(user_id=user_id, deck_id=row.deck_id, card=data)
+        self._invalidate(("cards", user_id, row.deck_id), ("stats", user_id))
+        logger.debug("Updated score for card %s (delta=%s)", data, delta)
+        return data
+
+    def buffer_score(self, user_id: int, card_id: int, delta: int, response_ms: Optional[int] = None) -> CardData:
+        """Apply a rating in memory and defer the write (score and review log row) to ``flush_scores``.
+
+        The returned card, later study draws, and ``list_cards`` already see the new score. The
+        buffer flushes itself once ``score_flush_threshold`` cards are pending, so a crash loses at
+        most that many ratings (or whatever the caller's flush timer allows).
+        """
+        with self._lock:
+            current = self._find_study_card(user_id=user_id, card_id=card_id)
+            if current is None:
+                current = self._load_card(user_id=user_id, card_id=card_id)
+            card, deck_id = current
+            data = CardData(id=card.id, question=card.question, answer=card.answer, score=max(0, card.score + delta))
+            self._pending_scores[card_id] = (user_id, deck_id, data.score)
+            self._sampler_put(user_id=user_id, deck_id=deck_id, card=data)
+            should_flush = self._queue_review(
+                user_id=user_id, deck_id=deck_id, card=data, delta=delta, response_ms=response_ms
+            )
+        self._invalidate(("cards", user_id, deck_id), ("stats", user_id))
+        logger.debug("Buffered score for card %s (delta=%s)", data, delta)
+        if should_flush:
+            self.flush_scores()
+        return data
+
+    @staticmethod
+    def _review_row(
+            user_id: int, deck_id: int, card: CardData, delta: int, response_ms: Optional[int],
+            reviewed_at: Optional[datetime] = None,
+    ) -> Dict[str, object]:
+        return {
+            "card_id": card.id, "deck_id": deck_id, "user_id": user_id, "reviewed_at": reviewed_at or utcnow(),
+            "delta": delta, "score": card.score, "response_ms": response_ms,
+        }
+
+    def _queue_review(
+            self, user_id: int, deck_id: int, card: CardData, delta: int, response_ms: Optional[int],
+    ) -> bool:
+        # Caller holds the lock; returns whether the buffers are full enough to flush.
+        self._pending_reviews.append(
+            self._review_row(user_id=user_id, deck_id=deck_id, card=card, delta=delta, response_ms=response_ms)
+        )
+        return max(len(self._pending_scores), len(self._pending_reviews)) >= self._score_flush_threshold
 
-    def update_score(self, user_id: int, card_id: int, delta: int) -> CardData:
+    def flush_scores(self) -> int:
+        """Write all buffered ratings and review log rows in one transaction; returns the number of cards written."""
+        with self._lock:
+            if not self._pending_scores and not self._pending_reviews:
+                return 0
+        statement = (
+            update(CardRecord.__table__)
+            .where(
+                CardRecord.__table__.c.id == bindparam("card_id"),
+                CardRecord.__table__.c.user_id == bindparam("owner_id"),
+            )
+            .values(score=bindparam("new_score"))
+        )
+        with self._session() as session:
+            # Never wait for the (single) writer connection while holding the lock: a unit of work on
+            # another thread may hold the writer while it waits for the lock. Holding the writer first also
+            # orders this flush against deletes and moves of the same cards.
+            session.connection()
+            with self._lock:
+                scores, reviews = self._pending_scores, self._pending_reviews
+                if not scores and not reviews:
+                    return 0
+                self._pending_scores, self._pending_reviews = {}, []
+                self._flushing_scores.append(scores)
+            params = [
+                {"card_id": card_id, "owner_id": user_id, "new_score": score}
+                for card_id, (user_id, _deck_id, score) in scores.items()
+            ]
+            try:
+                if params:
+                    session.execute(statement, params)
+                if reviews:
+                    session.execute(insert(ReviewLogRecord.__table__), reviews)
+                session.commit()
+            except BaseException:
+                with self._lock:
+                    # Put the rows back; ratings buffered meanwhile are newer and win.
+                    self._pending_scores = {**scores, **self._pending_scores}
+                    self._pending_reviews = reviews + self._pending_reviews
+                raise
+            finally:
+                with self._lock:
+                    self._flushing_scores.remove(scores)
+        logger.debug("Flushed %s buffered scores and %s review log rows", len(params), len(reviews))
+        return len(params)
+
+    @property
+    def pending_score_count(self) -> int:
+        return len(self._pending_scores)
+
+    @property
+    def pending_review_count(self) -> int:
+        return len(self._pending_reviews)
+
+    def _find_study_card(self, user_id: int, card_id: int) -> Optional[Tuple[CardData, int]]:
+        # Ratings normally target a card that was just drawn, so its text is cached and no SELECT is needed.
+        for (owner_id, deck_id), cards in self._study_cards.items():
+            if owner_id == user_id and card_id in cards:
+                card = cards[card_id]
+                card.score = self._samplers[(owner_id, deck_id)].score(card_id=card_id)
+                return card, deck_id
+        return None
+
+    def _load_card(self, user_id: int, card_id: int) -> Tuple[CardData, int]:
         with self._session() as session:
             card = (
                 session.query(CardRecord)
@@ -223,39 +1078,344 @@ class DeckService:
             )
             if not card:
                 raise ValueError("Card not found.")
-            card.score = max(0, card.score + delta)
-            session.commit()
-            session.refresh(card)
-            data = CardData(id=card.id, question=card.question, answer=card.answer, score=card.score)  # type: ignore
-            self._log(message=f"Updated score for card {data} (delta={delta})")
-            return data
+            data = CardData(id=card.id, question=card.question, answer=None, score=card.score)  # type: ignore
+            return self._with_pending_score(card=data), card.deck_id  # type: ignore
 
-    def next_card_for_study(self, user_id: int, deck_id: int) -> Optional[CardData]:
+    def record_review(
+            self, user_id: int, card_id: int, remembered: bool, now: Optional[datetime] = None,
+            response_ms: Optional[int] = None,
+    ) -> CardData:
+        """Reschedule a card with SM-2 and nudge its score like a regular rating.
+
+        The review log row is written in the same transaction as the new schedule.
+        """
+        if card_id in self._pending_scores:
+            self.flush_scores()
+        now = now or utcnow()
         with self._session() as session:
-            cards: List[CardRecord] = (  # type: ignore
+            card = (
                 session.query(CardRecord)
-                .filter(CardRecord.deck_id == deck_id, CardRecord.user_id == user_id)
-                .all()
+                .filter(CardRecord.id == card_id, CardRecord.user_id == user_id)
+                .first()
             )
-            if not cards:
-                self._log(message=f"No cards available for study in deck {deck_id}")
+            if not card:
+                raise ValueError("Card not found.")
+            schedule = schedule_review(
+                interval=card.interval,  # type: ignore
+                ease=card.ease,  # type: ignore
+                quality=REMEMBERED_QUALITY if remembered else FORGOTTEN_QUALITY,
+                now=now,
+            )
+            card.interval = schedule.interval
+            card.ease = schedule.ease
+            card.due_at = schedule.due_at
+            card.score = max(0, card.score + (1 if remembered else -1))
+            data = CardData(id=card.id, question=card.question, answer=None, score=card.score)  # type: ignore
+            deck_id = card.deck_id
+            session.execute(
+                insert(ReviewLogRecord.__table__),
+                self._review_row(
+                    user_id=user_id, deck_id=deck_id, card=data, delta=1 if remembered else -1,  # type: ignore
+                    response_ms=response_ms, reviewed_at=now,
+                ),
+            )
+            session.commit()
+        with self._lock:
+            self._sampler_put(user_id=user_id, deck_id=deck_id, card=data)  # type: ignore
+        self._invalidate(("cards", user_id, deck_id), ("stats", user_id))
+        logger.debug("Reviewed card %s; next due %s", data, schedule.due_at)
+        return data
+
+    def reviews_per_day(self, user_id: int, days: int = 30, now: Optional[datetime] = None) -> List[ReviewDay]:
+        """Reviews and lapses per UTC day over the last ``days`` days, oldest first (days without reviews omitted)."""
+        if self._pending_reviews:
+            self.flush_scores()
+        now = now or utcnow()
+        since = datetime.combine(now.date() - timedelta(days=days - 1), datetime.min.time())
+        log = ReviewLogRecord.__table__
+        day = func.date(log.c.reviewed_at)
+        # Range scan on ix_review_log_user_time; delta comes from the index, so rows are never read.
+        statement = (
+            select(day, func.count(), func.sum(case((log.c.delta < 0, 1), else_=0)))
+            .where(log.c.user_id == user_id, log.c.reviewed_at >= since)
+            .group_by(day)
+            .order_by(day)
+        )
+        with self._session() as session:
+            rows = session.execute(statement).all()
+        result = [ReviewDay(day=date.fromisoformat(row[0]), reviews=row[1], lapses=row[2]) for row in rows]
+        logger.debug("Counted reviews on %s days for user %s", len(result), user_id)
+        return result
+
+    def lapse_counts(self, user_id: int, deck_id: Optional[int] = None, limit: int = 20) -> List[CardLapses]:
+        """Cards forgotten most often (ratings with a negative delta), most lapses first."""
+        if self._pending_reviews:
+            self.flush_scores()
+        log = ReviewLogRecord.__table__
+        lapses = func.count().label("lapses")
+        # Counted on the partial lapse index alone; cards is joined only for the top ``limit`` rows.
+        # A literal 0 (not a bound parameter) lets SQLite match the index's "delta < 0" condition.
+        counts = select(log.c.card_id, lapses).where(log.c.user_id == user_id, log.c.delta < literal_column("0"))
+        if deck_id is not None:
+            counts = counts.where(log.c.deck_id == deck_id)
+        counts = counts.group_by(log.c.card_id).order_by(lapses.desc(), log.c.card_id).limit(limit).subquery()
+        statement = (
+            select(CardRecord.id, CardRecord.deck_id, CardRecord.question, counts.c.lapses)
+            .join(counts, counts.c.card_id == CardRecord.id)
+            .order_by(counts.c.lapses.desc(), CardRecord.id)
+        )
+        with self._session() as session:
+            rows = session.execute(statement).all()
+        result = [
+            CardLapses(card_id=row.id, deck_id=row.deck_id, question=row.question, lapses=row.lapses) for row in rows
+        ]
+        logger.debug("Found %s cards with lapses for user %s", len(result), user_id)
+        return result
+
+    def next_card_for_study(self, user_id: int, deck_id: int) -> Optional[CardData]:
+        if self.study_mode == "scheduled":
+            return self._next_due_card(user_id=user_id, deck_id=deck_id, now=utcnow())
+        key = (user_id, deck_id)
+        with self._lock:
+            sampler = self._samplers.get(key)
+            if sampler is None:
+                sampler = self._load_sampler(user_id=user_id, deck_id=deck_id)
+
+            # Weighted draw: lower scores get higher weight (max_score - score + 1), so weak cards surface more often.
+            # The sampler keeps the weights in a Fenwick tree, so a draw is O(log n) without touching the DB.
+            card_id = sampler.sample(rng=self._rng)
+            if card_id is None:
+                logger.debug("No cards available for study in deck %s", deck_id)
                 return None
+            cached = self._study_cards[key].get(card_id)
+            if cached is None:
+                # Only the winner's question is loaded, by primary key; the answer waits for get_answer.
+                with self._session() as session:
+                    question = session.execute(
+                        select(CardRecord.question).where(CardRecord.id == card_id)
+                    ).scalar_one()
+                cached = CardData(id=card_id, question=question, answer=None, score=0)
+                self._study_cards[key][card_id] = cached
+            cached.score = sampler.score(card_id=card_id)
+            data = CardData(id=card_id, question=cached.question, answer=cached.answer, score=cached.score)
+        logger.debug("Selected next study card %s from deck %s", data, deck_id)
+        return data
 
-            # Invert the scores to create weights for semi-random selection, because high score means well memorized,
-            # so they should be less likely to be drawn.
-            max_score = max(card.score for card in cards)
-            # Weighted draw: lower scores get higher weight, so weak cards surface more often.
-            # Each weight is (max_score - current_score + 1) to avoid zeros and keep odds positive.
-            weights = [max_score - card.score + 1 for card in cards]
-
-            # choices returns a list of k picks (with replacement); k=1 here, so take the first pick.
-            # The chance of each pick is proportional to its weight.
-            choice = self._rng.choices(cards, weights=weights, k=1)[0]
-            data = CardData(
-                id=choice.id, question=choice.question, answer=choice.answer, score=choice.score
+    def _next_due_card(self, user_id: int, deck_id: int, now: datetime) -> Optional[CardData]:
+        # Most overdue card first; served by ix_cards_user_deck_due with LIMIT 1.
+        with self._session() as session:
+            row = session.execute(
+                select(CardRecord.id, CardRecord.question, CardRecord.score)
+                .where(CardRecord.user_id == user_id, CardRecord.deck_id == deck_id, CardRecord.due_at <= now)
+                .order_by(CardRecord.due_at.asc())
+                .limit(1)
+            ).first()
+        if row is None:
+            logger.debug("No cards due in deck %s", deck_id)
+            return None
+        with self._lock:
+            data = self._with_pending_score(
+                card=CardData(id=row.id, question=row.question, answer=None, score=row.score)
             )
-            self._log(message=f"Selected next study card {data} from deck {deck_id}")
-            return data
+        logger.debug("Selected due card %s from deck %s", data, deck_id)
+        return data
+
+    def _load_sampler(self, user_id: int, deck_id: int) -> WeightedSampler:
+        """Build the deck's study sampler from (id, score) rows only; later writes update it incrementally."""
+        with self._session() as session:
+            rows = session.execute(
+                select(CardRecord.id, CardRecord.score)
+                .where(CardRecord.deck_id == deck_id, CardRecord.user_id == user_id)
+            ).all()
+        sampler = WeightedSampler(
+            items=((card_id, self._current_score(card_id=card_id, stored=score)) for card_id, score in rows)
+        )
+        self._samplers[(user_id, deck_id)] = sampler
+        self._study_cards[(user_id, deck_id)] = {}
+        logger.debug("Built study sampler over %s cards for deck %s", len(sampler), deck_id)
+        return sampler
+
+    def import_cards(
+            self,
+            user_id: int,
+            deck_id: int,
+            path: str,
+            file_format: Optional[str] = None,
+            batch_size: int = 1000,
+            progress: Optional[Callable[[int, float], None]] = None,
+            cancel: Optional[Event] = None,
+    ) -> ImportResult:
+        """Stream cards from a CSV/TSV/JSONL file into a deck using batched executemany inserts.
+
+        Each batch is committed together with a checkpoint of the last row read, so re-running the
+        same import after an interruption (crash or ``cancel``) skips rows already stored. Invalid
+        rows are skipped and reported in the result. ``progress(imported, fraction)`` is called after
+        every batch, from the calling thread.
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive.")
+        file_format = file_format or detect_format(path=path)
+        source = os.path.abspath(path)
+        file_id = fingerprint(path=source)
+        total_chars = max(1, os.path.getsize(source))
+        result = ImportResult()
+        cards = CardRecord.__table__
+
+        with self._session() as session:
+            deck = session.get(DeckRecord, deck_id)
+            if not deck or deck.user_id != user_id:
+                raise ValueError("Deck not found.")
+            checkpoint = session.execute(
+                select(ImportCheckpointRecord).where(
+                    ImportCheckpointRecord.user_id == user_id,
+                    ImportCheckpointRecord.deck_id == deck_id,
+                    ImportCheckpointRecord.source == source,
+                )
+            ).scalar_one_or_none()
+            if checkpoint is None:
+                checkpoint = ImportCheckpointRecord(
+                    user_id=user_id, deck_id=deck_id, source=source, fingerprint=file_id, rows_done=0
+                )
+                session.add(checkpoint)
+            elif checkpoint.fingerprint != file_id:
+                # The file changed since the interrupted run; start over.
+                checkpoint.fingerprint = file_id
+                checkpoint.rows_done = 0
+            result.resumed_from = checkpoint.rows_done  # type: ignore
+
+            def write_batch(batch: List[dict], last_row: int) -> None:
+                if batch:
+                    session.execute(insert(cards), batch)
+                checkpoint.rows_done = last_row
+                session.commit()
+                if batch:
+                    self._invalidate(("cards", user_id, deck_id), ("stats", user_id))
+                result.imported += len(batch)
+                if progress:
+                    progress(result.imported, min(1.0, reader.chars_read / total_chars))
+
+            with open(source, newline="", encoding="utf-8-sig") as handle:
+                reader = CardRowReader(handle=handle, file_format=file_format)
+                batch: List[dict] = []
+                last_row = result.resumed_from
+                for row_number, question, answer, error in reader:
+                    if row_number <= result.resumed_from:
+                        continue
+                    last_row = row_number
+                    if error:
+                        result.add_error(message=error)
+                    else:
+                        batch.append(
+                            {"question": question, "answer": answer, "score": 0, "deck_id": deck_id, "user_id": user_id}
+                        )
+                    if len(batch) >= batch_size:
+                        write_batch(batch=batch, last_row=last_row)
+                        batch = []
+                        if cancel is not None and cancel.is_set():
+                            break
+                else:
+                    write_batch(batch=batch, last_row=last_row)
+                    session.delete(checkpoint)
+                    session.commit()
+                    result.completed = True
+
+        # Imported rows bypassed the incremental sampler updates; rebuild it on the next draw.
+        with self._lock:
+            self._samplers.pop((user_id, deck_id), None)
+            self._study_cards.pop((user_id, deck_id), None)
+        logger.info(
+            "Imported %s cards into deck %s (%s skipped, completed=%s)",
+            result.imported, deck_id, result.skipped, result.completed,
+        )
+        return result
+
+    def search_cards(
+            self, user_id: int, query: str, deck_id: Optional[int] = None, limit: int = 50, offset: int = 0
+    ) -> List[CardSearchResult]:
+        """Full-text search over the user's card questions/answers, best matches (bm25) first."""
+        match = to_match_query(query=query)
+        if not match:
+            return []
+        deck_filter = "AND c.deck_id = :deck_id" if deck_id is not None else ""
+        statement = text(
+            f"""
+            SELECT c.id, c.deck_id, d.name, c.question, c.score
+            FROM cards_fts
+            JOIN cards AS c ON c.id = cards_fts.rowid
+            JOIN decks AS d ON d.id = c.deck_id
+            WHERE cards_fts MATCH :match AND c.user_id = :user_id {deck_filter}
+            ORDER BY cards_fts.rank
+            LIMIT :limit OFFSET :offset
+            """
+        )
+        params = {"match": match, "user_id": user_id, "deck_id": deck_id, "limit": limit, "offset": offset}
+        with self._session() as session:
+            rows = session.execute(statement, params).all()
+        with self._lock:
+            results = [
+                CardSearchResult(
+                    id=row[0], deck_id=row[1], deck_name=row[2], question=row[3], answer=None,
+                    score=self._current_score(card_id=row[0], stored=row[4]),
+                )
+                for row in rows
+            ]
+        logger.debug("Search %r matched %s cards for user %s", query, len(results), user_id)
+        return results
+
+    def export_deck(self, user_id: int, deck_id: int, path: str, file_format: Optional[str] = None) -> int:
+        """Stream one deck's cards to CSV/JSONL/SQL; returns the number of cards written."""
+        return self._export(user_id=user_id, deck_id=deck_id, path=path, file_format=file_format)
+
+    def export_all(self, user_id: int, path: str, file_format: Optional[str] = None) -> int:
+        """Stream every deck of the user to CSV/JSONL/SQL; returns the number of cards written."""
+        return self._export(user_id=user_id, deck_id=None, path=path, file_format=file_format)
+
+    def _export(self, user_id: int, deck_id: Optional[int], path: str, file_format: Optional[str]) -> int:
+        file_format = file_format or detect_export_format(path=path)
+        # Buffered ratings belong in the export.
+        self.flush_scores()
+        # Write next to the target and swap in at the end, so a failed export never leaves a partial file.
+        partial_path = f"{path}.part"
+        with self._session() as session:
+            if deck_id is not None:
+                deck = session.get(DeckRecord, deck_id)
+                if not deck or deck.user_id != user_id:
+                    raise ValueError("Deck not found.")
+            try:
+                with open(partial_path, "w", encoding="utf-8", newline="") as handle:
+                    count = write_export(
+                        handle=handle, rows=self._export_rows(session=session, user_id=user_id, deck_id=deck_id),
+                        file_format=file_format,
+                    )
+            except BaseException:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                raise
+        os.replace(partial_path, path)
+        logger.info("Exported %s cards for user %s to %s", count, user_id, path)
+        return count
+
+    @staticmethod
+    def _export_rows(session: Session, user_id: int, deck_id: Optional[int]) -> Iterator[Tuple]:
+        """Decks LEFT JOIN cards as one streamed SELECT.
+
+        A single statement reads one consistent snapshot of the database, so ratings committed
+        while the export runs cannot produce torn output; yield_per keeps memory flat.
+        """
+        statement = (
+            select(
+                DeckRecord.id, DeckRecord.name, DeckRecord.description,
+                CardRecord.id, CardRecord.question, CardRecord.answer, CardRecord.score,
+            )
+            .outerjoin(CardRecord, CardRecord.deck_id == DeckRecord.id)
+            .where(DeckRecord.user_id == user_id)
+            .order_by(DeckRecord.name.asc(), DeckRecord.id.asc(), CardRecord.id.asc())
+            .execution_options(yield_per=500)
+        )
+        if deck_id is not None:
+            statement = statement.where(DeckRecord.id == deck_id)
+        for row in session.execute(statement):
+            yield tuple(row)
 
     def seed_sample(self, user_id: int) -> None:
         """Create a sample deck with cards for quick demos when user has no decks yet."""
@@ -264,7 +1424,7 @@ class DeckService:
                     session.query(DeckRecord.id).filter(DeckRecord.user_id == user_id).first() is not None
             )
             if has_decks:
-                self._log(message="User already has decks; skipping seed")
+                logger.debug("User already has decks; skipping seed")
                 return
 
             deck = DeckRecord(name="Sample Deck", description="Getting started", user_id=user_id)
@@ -290,4 +1450,5 @@ class DeckService:
             ]
             session.add_all(cards)
             session.commit()
-            self._log(message=f"Seeded sample deck with {len(cards)} cards for user {user_id}")
+            self._invalidate(("decks", user_id), ("stats", user_id))
+            logger.info("Seeded sample deck with %s cards for user %s", len(cards), user_id)
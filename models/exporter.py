@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Incremental writers for deck exports (CSV, JSON lines, SQLite SQL dump)."""
+import csv
+import json
+import os
+from typing import IO, Iterable, Optional, Sequence
+
+
+__author__ = 'fenzl'
+
+EXPORT_FORMATS = ("csv", "jsonl", "sql")
+# Columns of each exported row, in order (see DeckService._export_rows).
+EXPORT_COLUMNS = ("deck_id", "deck_name", "deck_description", "card_id", "question", "answer", "score")
+
+
+def detect_export_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("sql", "dump"):
+        return "sql"
+    if extension == "csv":
+        return "csv"
+    raise ValueError(f"Unsupported export file type '.{extension}'.")
+
+
+def sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def write_export(handle: IO[str], rows: Iterable[Sequence], file_format: str) -> int:
+    """Write rows as they arrive and return the number of cards written.
+
+    CSV output starts with ``question,answer`` so it can be imported again as-is. Rows of decks
+    without cards (card_id None) only contribute the deck itself to JSONL/SQL output.
+    """
+    if file_format == "csv":
+        return _write_csv(handle=handle, rows=rows)
+    if file_format == "jsonl":
+        return _write_jsonl(handle=handle, rows=rows)
+    if file_format == "sql":
+        return _write_sql(handle=handle, rows=rows)
+    raise ValueError(f"Unknown export format '{file_format}'.")
+
+
+def _write_csv(handle: IO[str], rows: Iterable[Sequence]) -> int:
+    writer = csv.writer(handle)
+    writer.writerow(["question", "answer", "score", "deck"])
+    count = 0
+    for _deck_id, deck_name, _description, card_id, question, answer, score in rows:
+        if card_id is None:
+            continue
+        writer.writerow([question, answer, score, deck_name])
+        count += 1
+    return count
+
+
+def _write_jsonl(handle: IO[str], rows: Iterable[Sequence]) -> int:
+    count = 0
+    current_deck: Optional[int] = None
+    for deck_id, deck_name, description, card_id, question, answer, score in rows:
+        if deck_id != current_deck:
+            current_deck = deck_id
+            handle.write(json.dumps({"type": "deck", "id": deck_id, "name": deck_name, "description": description}))
+            handle.write("\n")
+        if card_id is None:
+            continue
+        handle.write(json.dumps(
+            {"type": "card", "deck_id": deck_id, "question": question, "answer": answer, "score": score}
+        ))
+        handle.write("\n")
+        count += 1
+    return count
+
+
+def _write_sql(handle: IO[str], rows: Iterable[Sequence]) -> int:
+    # Self-contained script: loads into an empty SQLite database with `sqlite3 new.db < export.sql`.
+    handle.write("BEGIN TRANSACTION;\n")
+    handle.write("CREATE TABLE IF NOT EXISTS decks (id INTEGER PRIMARY KEY, name TEXT NOT NULL, description TEXT);\n")
+    handle.write(
+        "CREATE TABLE IF NOT EXISTS cards (id INTEGER PRIMARY KEY, deck_id INTEGER NOT NULL REFERENCES decks (id), "
+        "question TEXT NOT NULL, answer TEXT NOT NULL, score INTEGER NOT NULL DEFAULT 0);\n"
+    )
+    count = 0
+    current_deck: Optional[int] = None
+    for deck_id, deck_name, description, card_id, question, answer, score in rows:
+        if deck_id != current_deck:
+            current_deck = deck_id
+            values = ", ".join(sql_literal(value) for value in (deck_id, deck_name, description))
+            handle.write(f"INSERT INTO decks (id, name, description) VALUES ({values});\n")
+        if card_id is None:
+            continue
+        values = ", ".join(sql_literal(value) for value in (card_id, deck_id, question, answer, score))
+        handle.write(f"INSERT INTO cards (id, deck_id, question, answer, score) VALUES ({values});\n")
+        count += 1
+    handle.write("COMMIT;\n")
+    return count
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Streaming parsers for card import files (CSV, TSV, JSON lines)."""
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from typing import IO, Iterator, List, Optional, Tuple
+
+
+__author__ = 'fenzl'
+
+IMPORT_FORMATS = ("csv", "tsv", "jsonl")
+# Keep at most this many row errors in a result; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+    resumed_from: int = 0
+    completed: bool = False
+    errors: List[str] = field(default_factory=list)
+
+    def add_error(self, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("tsv", "tab"):
+        return "tsv"
+    if extension in ("csv", "txt"):
+        return "csv"
+    raise ValueError(f"Unsupported import file type '.{extension}'.")
+
+
+def fingerprint(path: str) -> str:
+    """Identify a file version so an interrupted import only resumes against the same content."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class CardRowReader:
+    """Yield ``(row_number, question, answer, error)`` tuples from an import file, one row at a time.
+
+    ``error`` is set (and question/answer empty) for rows that fail validation. ``chars_read`` tracks
+    how far into the file parsing has got, for progress reporting against the file size.
+    """
+
+    def __init__(self, handle: IO[str], file_format: str):
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"Unknown import format '{file_format}'.")
+        self._handle = handle
+        self._format = file_format
+        self.chars_read = 0
+
+    def _lines(self) -> Iterator[str]:
+        for line in self._handle:
+            self.chars_read += len(line)
+            yield line
+
+    def __iter__(self) -> Iterator[Tuple[int, str, str, Optional[str]]]:
+        if self._format == "jsonl":
+            yield from self._jsonl_rows()
+        else:
+            yield from self._delimited_rows(delimiter="\t" if self._format == "tsv" else ",")
+
+    def _delimited_rows(self, delimiter: str) -> Iterator[Tuple[int, str, str, Optional[str]]]:
+        reader = csv.reader(self._lines(), delimiter=delimiter)
+        row_number = 0
+        for row in reader:
+            row_number += 1
+            if row_number == 1 and [cell.strip().lower() for cell in row[:2]] == ["question", "answer"]:
+                continue  # header
+            if len(row) < 2:
+                yield row_number, "", "", f"Row {row_number}: expected question and answer columns."
+                continue
+            yield self._validated(row_number=row_number, question=row[0], answer=row[1])
+
+    def _jsonl_rows(self) -> Iterator[Tuple[int, str, str, Optional[str]]]:
+        row_number = 0
+        for line in self._lines():
+            row_number += 1
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as exception:
+                yield row_number, "", "", f"Row {row_number}: invalid JSON ({exception.msg})."
+                continue
+            if not isinstance(item, dict):
+                yield row_number, "", "", f"Row {row_number}: expected an object."
+                continue
+            yield self._validated(
+                row_number=row_number, question=str(item.get("question") or ""), answer=str(item.get("answer") or "")
+            )
+
+    @staticmethod
+    def _validated(row_number: int, question: str, answer: str) -> Tuple[int, str, str, Optional[str]]:
+        question = question.strip()
+        answer = answer.strip()
+        if not question or not answer:
+            return row_number, "", "", f"Row {row_number}: question and answer are required."
+        return row_number, question, answer, None
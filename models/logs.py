@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Logging for the model layer: one ``flashcards.<subsystem>`` logger per service.
+
+Call sites pass %-style arguments (``logger.debug("Fetched %d cards", count)``), so nothing is
+formatted and no ``__repr__`` runs unless the level is enabled. Reads and study draws log at DEBUG,
+writes at INFO; the default level is WARNING, which leaves the hot paths at one level check each.
+"""
+import json
+import logging
+import os
+from configparser import ConfigParser
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Mapping, Optional
+
+from models.storage import DEFAULT_CONFIG_PATH
+
+
+__author__ = 'fenzl'
+
+ROOT_LOGGER = "flashcards"
+DEFAULT_LEVEL = "WARNING"
+CONSOLE_FORMAT = "%(levelname)s [%(name)s] %(message)s"
+# Rotate the JSON-lines file at this size, keeping this many old files.
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """Logger of one subsystem ("deck", "user", ...), below the app's root logger."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+
+@dataclass(frozen=True)
+class LogSettings:
+    level: str = DEFAULT_LEVEL
+    # JSON-lines log file; None writes to the console only.
+    json_path: Optional[str] = None
+    max_bytes: int = DEFAULT_MAX_BYTES
+    backups: int = DEFAULT_BACKUPS
+
+
+def load_log_settings(environ: Mapping[str, str] = os.environ) -> LogSettings:
+    """Resolve log settings: env vars win over the config file, which wins over defaults.
+
+    Env vars: FLASHCARDS_LOG_LEVEL, FLASHCARDS_LOG_FILE. The config file's [logging] section accepts
+    ``level``, ``file``, ``max_bytes`` and ``backups``.
+    """
+    parser = ConfigParser()
+    parser.read(environ.get("FLASHCARDS_CONFIG", DEFAULT_CONFIG_PATH))
+    section = parser["logging"] if parser.has_section("logging") else {}
+
+    level = (environ.get("FLASHCARDS_LOG_LEVEL") or section.get("level", DEFAULT_LEVEL)).upper()
+    if not isinstance(logging.getLevelName(level), int):
+        raise ValueError(f"Unknown log level '{level}'.")
+    json_path = environ.get("FLASHCARDS_LOG_FILE") or section.get("file")
+    return LogSettings(
+        level=level,
+        json_path=os.path.expanduser(json_path) if json_path else None,
+        max_bytes=int(section.get("max_bytes", DEFAULT_MAX_BYTES)),
+        backups=int(section.get("backups", DEFAULT_BACKUPS)),
+    )
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time (UTC, ISO 8601), level, logger, thread, message[, exception]."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        # RotatingFileHandler formats each record twice (size check, then write); render it once.
+        line = getattr(record, "json_line", None)
+        if line is not None:
+            return line
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        record.json_line = line = json.dumps(entry, ensure_ascii=False, default=str)
+        return line
+
+
+def configure_logging(settings: LogSettings) -> logging.Logger:
+    """Set the level and handlers of the app's root logger; calling it again replaces them."""
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(settings.level)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+    logger.addHandler(console)
+    if settings.json_path:
+        # delay=True: the file is only created once something is actually logged.
+        json_file = RotatingFileHandler(
+            settings.json_path, maxBytes=settings.max_bytes, backupCount=settings.backups, encoding="utf-8",
+            delay=True,
+        )
+        json_file.setFormatter(JsonLinesFormatter())
+        logger.addHandler(json_file)
+    return logger
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
+import os
+
+from models.cache import DeckCache
 from models.deck import DeckService
+from models.logs import configure_logging, load_log_settings
 from models.storage import init_db
 from models.user import UserService
 
@@ -9,7 +13,15 @@ __author__ = 'fenzl, ahsan'
 
 class MainModel:
     def __init__(self):
+        # Level (FLASHCARDS_LOG_LEVEL, default WARNING) and optional JSON-lines file (FLASHCARDS_LOG_FILE).
+        configure_logging(settings=load_log_settings())
         # Ensure all mapped tables are created once at startup
         init_db()
         self.users = UserService()
-        self.decks = DeckService()
+        # Memory budget of the deck/card read cache in MB; 0 turns caching off.
+        cache_mb = float(os.environ.get("FLASHCARDS_CACHE_MB", "16"))
+        # "weighted" (default) or "scheduled" (SM-2 due dates) study selection.
+        self.decks = DeckService(
+            study_mode=os.environ.get("FLASHCARDS_STUDY_MODE", "weighted"),
+            cache=DeckCache(max_bytes=int(cache_mb * 1024 * 1024)) if cache_mb > 0 else None,
+        )
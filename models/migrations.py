@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""Versioned schema migrations for app.db.
+
+Version 0 is the original (pre-versioning) schema: users, decks, cards with single-column indexes.
+Each step runs in its own transaction, with foreign key enforcement off, and is recorded in
+``schema_version``. A brand-new database is created from the current models and stamped with the
+latest version directly.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, func, inspect, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from models.deck import CardRecord, DeckRecord, DeckStatsRecord, ImportCheckpointRecord, ReviewLogRecord
+from models.scheduler import utcnow
+from models.search import CARD_SEARCH_DDL, CARD_SEARCH_REBUILD
+from models.stats import DECK_STATS_DDL, DECK_STATS_REBUILD
+from models.storage import Base
+from models.user import UserRecord  # noqa: F401 - registers the users table on Base.metadata
+
+
+__author__ = 'fenzl'
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def add_column(connection: Connection, table: Table, column: Column) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    existing = {info["name"] for info in inspect(connection).get_columns(table.name)}
+    if column.name in existing:
+        return
+    # SQLite can only add NOT NULL columns that carry a constant default.
+    column_type = column.type.compile(dialect=connection.dialect)
+    default = f" DEFAULT {column.server_default.arg.text}" if column.server_default is not None else ""
+    not_null = " NOT NULL" if not column.nullable and default else ""
+    connection.exec_driver_sql(
+        f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}{not_null}{default}'
+    )
+
+
+def create_index(connection: Connection, table: Table, name: str) -> None:
+    index: Index = next(index for index in table.indexes if index.name == name)
+    index.create(bind=connection, checkfirst=True)
+
+
+def create_table(connection: Connection, table: Table) -> None:
+    table.create(bind=connection, checkfirst=True)
+
+
+def rebuild_table(
+        connection: Connection,
+        name: str,
+        create: str,
+        columns: Sequence[str],
+        parents: Sequence[Tuple[str, str]],
+        indexes: Sequence[str],
+) -> None:
+    """Recreate a table from literal DDL, keeping its rows.
+
+    SQLite cannot ALTER a foreign key, so constraint changes go through the documented rebuild: create
+    the new table, copy, drop the old one, rename. ``create`` is a CREATE TABLE statement with a
+    ``{table}`` placeholder for the name, ``columns`` the columns to copy and ``parents`` the
+    (column, referenced table) pairs of its foreign keys. Rows whose parents no longer exist are dropped,
+    since they would fail the new constraints. Indexes and triggers on the old table are dropped with it;
+    ``indexes`` are recreated here, callers recreate triggers.
+    """
+    new_name = f"{name}_new"
+    connection.exec_driver_sql(f'DROP TABLE IF EXISTS "{new_name}"')
+    connection.exec_driver_sql(create.format(table=f'"{new_name}"'))
+    copied = ", ".join(f'"{column}"' for column in columns)
+    exists = " AND ".join(
+        f'("{column}" IS NULL OR "{column}" IN (SELECT "id" FROM "{parent}"))' for column, parent in parents
+    )
+    connection.exec_driver_sql(
+        f'INSERT INTO "{new_name}" ({copied}) SELECT {copied} FROM "{name}" WHERE {exists or "1"}'
+    )
+    connection.exec_driver_sql(f'DROP TABLE "{name}"')
+    connection.exec_driver_sql(f'ALTER TABLE "{new_name}" RENAME TO "{name}"')
+    for statement in indexes:
+        connection.exec_driver_sql(statement)
+
+
+def _add_scheduling_columns(connection: Connection) -> None:
+    cards = CardRecord.__table__
+    for name in ("due_at", "interval", "ease"):
+        add_column(connection=connection, table=cards, column=cards.c[name])
+    create_index(connection=connection, table=cards, name="ix_cards_user_deck_due")
+
+
+def _add_composite_indexes(connection: Connection) -> None:
+    create_index(connection=connection, table=CardRecord.__table__, name="ix_cards_user_deck")
+    create_index(connection=connection, table=CardRecord.__table__, name="ix_cards_user_deck_score")
+    create_index(connection=connection, table=DeckRecord.__table__, name="ix_decks_user_name")
+
+
+def _add_import_checkpoints(connection: Connection) -> None:
+    create_table(connection=connection, table=ImportCheckpointRecord.__table__)
+
+
+def _add_card_search(connection: Connection) -> None:
+    for statement in CARD_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    # Backfill the index from existing cards.
+    connection.exec_driver_sql(CARD_SEARCH_REBUILD)
+
+
+def _add_review_log(connection: Connection) -> None:
+    create_table(connection=connection, table=ReviewLogRecord.__table__)
+
+
+def _add_deck_stats(connection: Connection) -> None:
+    create_table(connection=connection, table=DeckStatsRecord.__table__)
+    for statement in DECK_STATS_DDL:
+        connection.exec_driver_sql(statement)
+    # Backfill the counters from existing cards.
+    connection.exec_driver_sql(DECK_STATS_REBUILD)
+
+
+# Step 7's tables as of that migration, frozen here so later model changes cannot alter what it builds.
+# Each entry: (name, CREATE TABLE template, copied columns, foreign keys as (column, parent), indexes).
+# Parents come before children: review_log's rows are filtered against the rebuilt cards table.
+_CASCADE_TABLES: List[Tuple[str, str, Tuple[str, ...], Tuple[Tuple[str, str], ...], Tuple[str, ...]]] = [
+    (
+        "cards",
+        """CREATE TABLE {table} (
+            id INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            deck_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            due_at DATETIME DEFAULT '1970-01-01 00:00:00.000000' NOT NULL,
+            interval INTEGER DEFAULT 0 NOT NULL,
+            ease FLOAT DEFAULT (2.5) NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY(deck_id) REFERENCES decks (id) ON DELETE CASCADE,
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )""",
+        ("id", "question", "answer", "score", "deck_id", "user_id", "due_at", "interval", "ease"),
+        (("deck_id", "decks"), ("user_id", "users")),
+        (
+            "CREATE INDEX ix_cards_id ON cards (id)",
+            "CREATE INDEX ix_cards_deck_id ON cards (deck_id)",
+            "CREATE INDEX ix_cards_user_id ON cards (user_id)",
+            "CREATE INDEX ix_cards_user_deck ON cards (user_id, deck_id)",
+            "CREATE INDEX ix_cards_user_deck_score ON cards (user_id, deck_id, score)",
+            "CREATE INDEX ix_cards_user_deck_due ON cards (user_id, deck_id, due_at)",
+        ),
+    ),
+    (
+        "review_log",
+        """CREATE TABLE {table} (
+            id INTEGER NOT NULL,
+            card_id INTEGER NOT NULL,
+            deck_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            reviewed_at DATETIME NOT NULL,
+            delta INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            response_ms INTEGER,
+            PRIMARY KEY (id),
+            FOREIGN KEY(card_id) REFERENCES cards (id) ON DELETE CASCADE,
+            FOREIGN KEY(deck_id) REFERENCES decks (id) ON DELETE CASCADE,
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )""",
+        ("id", "card_id", "deck_id", "user_id", "reviewed_at", "delta", "score", "response_ms"),
+        (("card_id", "cards"), ("deck_id", "decks"), ("user_id", "users")),
+        (
+            "CREATE INDEX ix_review_log_user_time ON review_log (user_id, reviewed_at, delta)",
+            "CREATE INDEX ix_review_log_lapses ON review_log (user_id, deck_id, card_id, delta) WHERE delta < 0",
+        ),
+    ),
+    (
+        "import_checkpoints",
+        """CREATE TABLE {table} (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            deck_id INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            fingerprint VARCHAR NOT NULL,
+            rows_done INTEGER NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id),
+            FOREIGN KEY(deck_id) REFERENCES decks (id) ON DELETE CASCADE
+        )""",
+        ("id", "user_id", "deck_id", "source", "fingerprint", "rows_done"),
+        (("user_id", "users"), ("deck_id", "decks")),
+        ("CREATE UNIQUE INDEX ix_import_checkpoints_job ON import_checkpoints (user_id, deck_id, source)",),
+    ),
+]
+
+
+def _add_cascading_foreign_keys(connection: Connection) -> None:
+    for name, create, columns, parents, indexes in _CASCADE_TABLES:
+        rebuild_table(
+            connection=connection, name=name, create=create, columns=columns, parents=parents, indexes=indexes
+        )
+    # Dropping the old cards table took its search index and counter triggers with it.
+    for statement in CARD_SEARCH_DDL + DECK_STATS_DDL:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql(DECK_STATS_REBUILD)
+    violations = connection.exec_driver_sql("PRAGMA foreign_key_check").fetchall()
+    if violations:
+        raise RuntimeError(f"Foreign key violations after rebuild: {violations[:5]}")
+
+
+# Ordered (version, description, step). Append new steps; never edit or reorder applied ones.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "SM-2 scheduling columns on cards", _add_scheduling_columns),
+    (2, "composite indexes for owner-scoped card/deck queries", _add_composite_indexes),
+    (3, "import checkpoints table", _add_import_checkpoints),
+    (4, "FTS5 card search index with sync triggers", _add_card_search),
+    (5, "review log table with analytics indexes", _add_review_log),
+    (6, "trigger-maintained deck_stats counters", _add_deck_stats),
+    (7, "ON DELETE CASCADE foreign keys on cards, review_log and import_checkpoints", _add_cascading_foreign_keys),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection: Connection) -> int:
+    return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def _stamp(connection: Connection, version: int, description: str) -> None:
+    connection.execute(
+        insert(schema_version).values(version=version, description=description, applied_at=utcnow())
+    )
+
+
+@contextmanager
+def _foreign_keys_off(bind: Engine) -> Iterator[Connection]:
+    """Yield a connection with foreign key enforcement off, restoring the previous setting afterwards.
+
+    The pragma is a no-op inside a transaction, so it is switched between them.
+    """
+    with bind.connect() as connection:
+        enabled = connection.exec_driver_sql("PRAGMA foreign_keys").scalar()
+        connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        connection.commit()
+        try:
+            yield connection
+        finally:
+            connection.rollback()
+            connection.exec_driver_sql(f"PRAGMA foreign_keys={'ON' if enabled else 'OFF'}")
+            connection.commit()
+
+
+def migrate(bind: Engine) -> int:
+    """Bring the database up to LATEST_VERSION and return the resulting version."""
+    with bind.begin() as connection:
+        schema_version.create(bind=connection, checkfirst=True)
+        version = current_version(connection=connection)
+        if version == 0 and not inspect(connection).has_table(CardRecord.__tablename__):
+            # Fresh database: the models already describe the latest schema.
+            Base.metadata.create_all(bind=connection)
+            _stamp(connection=connection, version=LATEST_VERSION, description="initial schema")
+            return LATEST_VERSION
+
+    for step_version, description, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        with _foreign_keys_off(bind=bind) as connection, connection.begin():
+            step(connection)
+            _stamp(connection=connection, version=step_version, description=description)
+        version = step_version
+    return version
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+from collections import Counter
+from random import Random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+__author__ = 'fenzl'
+
+
+class WeightedSampler:
+    """In-memory weighted sampler over card scores backed by Fenwick trees.
+
+    Each card is weighted ``max_score - score + 1`` (low scores are drawn more often).
+    Instead of storing weights, two trees keep per-slot live counts and scores, so the
+    weight of any prefix is ``count * (max_score + 1) - score_sum``. A change of the
+    deck's max score therefore never forces weights to be rewritten, and draws,
+    inserts, updates, and removals all cost O(log n).
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, int]] = ()):
+        self._ids: List[Optional[int]] = []
+        self._scores: List[int] = []
+        self._slots: Dict[int, int] = {}
+        self._count_tree: List[int] = [0]
+        self._score_tree: List[int] = [0]
+        self._score_counts: Counter = Counter()
+        self._max_score = 0
+        self._score_sum = 0
+        self._rebuild(items=items)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, card_id: int) -> bool:
+        return card_id in self._slots
+
+    def score(self, card_id: int) -> int:
+        return self._scores[self._slots[card_id]]
+
+    def add(self, card_id: int, score: int) -> None:
+        """Append a card; existing ids are treated as a score update."""
+        if card_id in self._slots:
+            self.update(card_id=card_id, score=score)
+            return
+        self._ids.append(card_id)
+        self._scores.append(score)
+        self._slots[card_id] = len(self._ids) - 1
+        # A new Fenwick node i covers (i - lowbit(i), i]; everything but itself is already in the tree.
+        index = len(self._ids)
+        low = index - (index & -index)
+        self._count_tree.append(1 + self._prefix(self._count_tree, index - 1) - self._prefix(self._count_tree, low))
+        self._score_tree.append(
+            score + self._prefix(self._score_tree, index - 1) - self._prefix(self._score_tree, low)
+        )
+        self._score_sum += score
+        self._track_score(score=score)
+
+    def update(self, card_id: int, score: int) -> None:
+        slot = self._slots[card_id]
+        old = self._scores[slot]
+        if old == score:
+            return
+        self._scores[slot] = score
+        self._add(self._score_tree, slot + 1, score - old)
+        self._score_sum += score - old
+        self._untrack_score(score=old)
+        self._track_score(score=score)
+
+    def remove(self, card_id: int) -> None:
+        slot = self._slots.pop(card_id, None)
+        if slot is None:
+            return
+        old = self._scores[slot]
+        self._ids[slot] = None
+        self._scores[slot] = 0
+        self._add(self._count_tree, slot + 1, -1)
+        self._add(self._score_tree, slot + 1, -old)
+        self._score_sum -= old
+        self._untrack_score(score=old)
+        # Compact once tombstones dominate so the tree does not grow without bound.
+        if len(self._ids) > 64 and len(self._slots) < len(self._ids) // 2:
+            self._rebuild(items=[(i, self._scores[s]) for i, s in self._slots.items()])
+
+    def sample(self, rng: Random) -> Optional[int]:
+        """Draw one card id with probability proportional to its weight, or None when empty."""
+        if not self._slots:
+            return None
+        base = self._max_score + 1
+        remaining = rng.randrange(len(self._slots) * base - self._score_sum)
+        # Fenwick descent: find the first slot whose prefix weight exceeds the drawn value.
+        size = len(self._ids)
+        position = 0
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            candidate = position + step
+            if candidate <= size:
+                weight = self._count_tree[candidate] * base - self._score_tree[candidate]
+                if weight <= remaining:
+                    position = candidate
+                    remaining -= weight
+            step >>= 1
+        return self._ids[position]
+
+    def _rebuild(self, items: Iterable[Tuple[int, int]]) -> None:
+        self._ids = []
+        self._scores = []
+        self._slots = {}
+        for card_id, score in items:
+            self._slots[card_id] = len(self._ids)
+            self._ids.append(card_id)
+            self._scores.append(score)
+        size = len(self._ids)
+        self._count_tree = [0] + [1] * size
+        self._score_tree = [0] + list(self._scores)
+        # Linear-time Fenwick construction: push each node into its parent once.
+        for index in range(1, size + 1):
+            parent = index + (index & -index)
+            if parent <= size:
+                self._count_tree[parent] += self._count_tree[index]
+                self._score_tree[parent] += self._score_tree[index]
+        self._score_counts = Counter(self._scores)
+        self._max_score = max(self._score_counts) if self._score_counts else 0
+        self._score_sum = sum(self._scores)
+
+    def _track_score(self, score: int) -> None:
+        self._score_counts[score] += 1
+        if score > self._max_score:
+            self._max_score = score
+
+    def _untrack_score(self, score: int) -> None:
+        self._score_counts[score] -= 1
+        if self._score_counts[score] <= 0:
+            del self._score_counts[score]
+            if score == self._max_score:
+                self._max_score = max(self._score_counts) if self._score_counts else 0
+
+    @staticmethod
+    def _add(tree: List[int], index: int, delta: int) -> None:
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    @staticmethod
+    def _prefix(tree: List[int], index: int) -> int:
+        total = 0
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+
+__author__ = 'fenzl'
+
+# SM-2 answer quality (0-5) for the two study buttons.
+REMEMBERED_QUALITY = 4
+FORGOTTEN_QUALITY = 1
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# Forgotten cards come back within the same session instead of the next day.
+RELEARN_DELAY = timedelta(minutes=1)
+
+
+@dataclass
+class Schedule:
+    interval: int  # days until the next review; 0 means (re)learning
+    ease: float
+    due_at: datetime
+
+
+def utcnow() -> datetime:
+    """Naive UTC timestamp, matching how SQLite DateTime columns are stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def schedule_review(interval: int, ease: float, quality: int, now: datetime) -> Schedule:
+    """Apply one SM-2 review to a card's (interval, ease) and return its next schedule."""
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return Schedule(interval=0, ease=ease, due_at=now + RELEARN_DELAY)
+    if interval <= 0:
+        interval = 1
+    elif interval == 1:
+        interval = 6
+    else:
+        interval = round(interval * ease)
+    return Schedule(interval=interval, ease=ease, due_at=now + timedelta(days=interval))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""FTS5 full-text index over card questions/answers."""
+from typing import List
+
+
+__author__ = 'fenzl'
+
+# External-content FTS5 table: the text lives only in ``cards``; the index stores tokens keyed by card id.
+# Triggers keep it in step with inserts, deletes and question/answer edits (score updates never touch it).
+CARD_SEARCH_DDL: List[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+        question, answer, content='cards', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_fts_ai AFTER INSERT ON cards BEGIN
+        INSERT INTO cards_fts (rowid, question, answer) VALUES (new.id, new.question, new.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_fts_ad AFTER DELETE ON cards BEGIN
+        INSERT INTO cards_fts (cards_fts, rowid, question, answer) VALUES ('delete', old.id, old.question, old.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_fts_au AFTER UPDATE OF question, answer ON cards BEGIN
+        INSERT INTO cards_fts (cards_fts, rowid, question, answer) VALUES ('delete', old.id, old.question, old.answer);
+        INSERT INTO cards_fts (rowid, question, answer) VALUES (new.id, new.question, new.answer);
+    END
+    """,
+]
+
+# Re-index every existing card (used when the index is added to an existing database).
+CARD_SEARCH_REBUILD = "INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')"
+
+
+def to_match_query(query: str) -> str:
+    """Turn free text into a safe FTS5 MATCH expression: every word must match.
+
+    Only the last word matches as a prefix (search-as-you-type); prefix-matching every short word
+    would expand into a large OR over the vocabulary. Quoting each word keeps FTS5 operators and
+    punctuation typed by the user from raising syntax errors.
+    """
+    terms = ['"' + word.replace('"', '""') + '"' for word in query.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
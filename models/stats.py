@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Per-deck counters in ``deck_stats``, kept current by triggers on ``decks`` and ``cards``."""
+from typing import List
+
+
+__author__ = 'fenzl'
+
+# Cards at or below this score count as "weak". It is baked into the triggers below, so changing it
+# needs a migration that recreates them and runs DECK_STATS_REBUILD.
+WEAK_SCORE = 1
+
+_COLUMNS = "(deck_id, user_id, card_count, score_total, zero_count, weak_count)"
+
+# Every deck gets a row when it is created; card inserts, deletes and score/deck changes adjust it in
+# the same statement, so the counters commit or roll back together with the cards.
+DECK_STATS_DDL: List[str] = [
+    """
+    CREATE TRIGGER IF NOT EXISTS deck_stats_deck_ai AFTER INSERT ON decks BEGIN
+        INSERT OR IGNORE INTO deck_stats (deck_id, user_id) VALUES (new.id, new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS deck_stats_deck_ad AFTER DELETE ON decks BEGIN
+        DELETE FROM deck_stats WHERE deck_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS deck_stats_card_ai AFTER INSERT ON cards BEGIN
+        INSERT INTO deck_stats {_COLUMNS}
+        VALUES (new.deck_id, new.user_id, 1, new.score, new.score = 0, new.score <= {WEAK_SCORE})
+        ON CONFLICT (deck_id) DO UPDATE SET
+            card_count = card_count + 1,
+            score_total = score_total + new.score,
+            zero_count = zero_count + (new.score = 0),
+            weak_count = weak_count + (new.score <= {WEAK_SCORE});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS deck_stats_card_ad AFTER DELETE ON cards BEGIN
+        UPDATE deck_stats SET
+            card_count = card_count - 1,
+            score_total = score_total - old.score,
+            zero_count = zero_count - (old.score = 0),
+            weak_count = weak_count - (old.score <= {WEAK_SCORE})
+        WHERE deck_id = old.deck_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS deck_stats_card_au AFTER UPDATE OF score, deck_id ON cards
+    WHEN old.score IS NOT new.score OR old.deck_id IS NOT new.deck_id BEGIN
+        UPDATE deck_stats SET
+            card_count = card_count - 1,
+            score_total = score_total - old.score,
+            zero_count = zero_count - (old.score = 0),
+            weak_count = weak_count - (old.score <= {WEAK_SCORE})
+        WHERE deck_id = old.deck_id;
+        UPDATE deck_stats SET
+            card_count = card_count + 1,
+            score_total = score_total + new.score,
+            zero_count = zero_count + (new.score = 0),
+            weak_count = weak_count + (new.score <= {WEAK_SCORE})
+        WHERE deck_id = new.deck_id;
+    END
+    """,
+]
+
+# The counters recomputed from ``cards`` (one row per deck, empty decks included).
+_ACTUAL = f"""
+    SELECT d.id AS deck_id, d.user_id AS user_id, count(c.id) AS card_count,
+           coalesce(sum(c.score), 0) AS score_total,
+           count(CASE WHEN c.score = 0 THEN 1 END) AS zero_count,
+           count(CASE WHEN c.score <= {WEAK_SCORE} THEN 1 END) AS weak_count
+    FROM decks AS d LEFT JOIN cards AS c ON c.user_id = d.user_id AND c.deck_id = d.id
+"""
+
+# Recompute every deck's row (used when the table is added to an existing database).
+DECK_STATS_REBUILD = f"INSERT OR REPLACE INTO deck_stats {_COLUMNS} {_ACTUAL} GROUP BY d.id"
+
+# Decks whose stored counters differ from the recomputed ones (or have no row), plus rows left
+# behind by deleted decks.
+DECK_STATS_DRIFT = f"""
+    WITH actual AS ({_ACTUAL} GROUP BY d.id)
+    SELECT actual.deck_id FROM actual LEFT JOIN deck_stats AS s ON s.deck_id = actual.deck_id
+    WHERE s.deck_id IS NULL OR s.user_id != actual.user_id OR s.card_count != actual.card_count
+        OR s.score_total != actual.score_total OR s.zero_count != actual.zero_count
+        OR s.weak_count != actual.weak_count
+    UNION ALL
+    SELECT deck_id FROM deck_stats WHERE deck_id NOT IN (SELECT id FROM decks)
+"""
+
+# Repair the decks reported by DECK_STATS_DRIFT (bind ``deck_ids`` as an expanding parameter).
+DECK_STATS_REPAIR: List[str] = [
+    "DELETE FROM deck_stats WHERE deck_id NOT IN (SELECT id FROM decks)",
+    f"INSERT OR REPLACE INTO deck_stats {_COLUMNS} {_ACTUAL} WHERE d.id IN :deck_ids GROUP BY d.id",
+]
@@ -1,23 +1,362 @@
 # -*- coding: utf-8 -*-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import os
+import threading
+import time
+from configparser import ConfigParser
+from contextlib import contextmanager
+from dataclasses import dataclass, fields, replace
+from typing import Callable, Dict, Iterator, List, Mapping, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.selectable import CompoundSelect, Select
 
 __author__ = 'fenzl'
 
-DATABASE_URL = "sqlite:///app.db"
+DEFAULT_DB_PATH = "app.db"
+DEFAULT_PROFILE = "durable"
+DEFAULT_CONFIG_PATH = "flashcards.ini"
+# Read connections next to the single write connection.
+DEFAULT_READERS = 4
+# Seconds to wait for a free pooled connection before giving up.
+DEFAULT_POOL_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """SQLite PRAGMAs applied to every new connection."""
+    journal_mode: str
+    synchronous: str
+    mmap_size: int = 0
+    cache_size: int = -2000  # negative = KiB, SQLite's default is ~2 MB
+    temp_store: str = "DEFAULT"
+    busy_timeout: int = 5000  # ms
+
+    def pragmas(self) -> Dict[str, object]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+PROFILES: Dict[str, StorageProfile] = {
+    # Rollback journal with a full fsync per commit: the original behavior, and safe on network filesystems.
+    "durable": StorageProfile(journal_mode="DELETE", synchronous="FULL"),
+    # WAL + NORMAL fsyncs only at checkpoints; a power cut may drop the last commits but never corrupts.
+    # WAL needs shared memory, so keep the database on a local disk with this profile.
+    "fast": StorageProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        mmap_size=256 * 1024 * 1024,
+        cache_size=-64000,
+        temp_store="MEMORY",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class StorageSettings:
+    path: str
+    profile_name: str
+    profile: StorageProfile
+    readers: int = DEFAULT_READERS
+    pool_timeout: float = DEFAULT_POOL_TIMEOUT
+
+    @property
+    def url(self) -> str:
+        return f"sqlite:///{self.path}"
+
+    @property
+    def in_memory(self) -> bool:
+        # Every connection to ":memory:" is its own database, so readers cannot be split off.
+        return self.path == ":memory:"
+
+
+def load_settings(environ: Mapping[str, str] = os.environ) -> StorageSettings:
+    """Resolve DB path and profile: env vars win over the config file, which wins over defaults.
+
+    Env vars: FLASHCARDS_DB_PATH, FLASHCARDS_DB_PROFILE, FLASHCARDS_DB_READERS, FLASHCARDS_CONFIG
+    (defaults to flashcards.ini). The config file's [storage] section accepts ``path``, ``profile``,
+    ``readers``, ``pool_timeout``, and any StorageProfile field as a per-PRAGMA override.
+    """
+    parser = ConfigParser()
+    parser.read(environ.get("FLASHCARDS_CONFIG", DEFAULT_CONFIG_PATH))
+    section = parser["storage"] if parser.has_section("storage") else {}
+
+    profile_name = environ.get("FLASHCARDS_DB_PROFILE") or section.get("profile", DEFAULT_PROFILE)
+    if profile_name not in PROFILES:
+        raise ValueError(f"Unknown storage profile '{profile_name}'.")
+    profile = PROFILES[profile_name]
+    overrides = {}
+    for field in fields(StorageProfile):
+        if field.name in section:
+            value = section[field.name]
+            overrides[field.name] = int(value) if field.type in (int, "int") else value
+    if overrides:
+        profile = replace(profile, **overrides)
+
+    path = environ.get("FLASHCARDS_DB_PATH") or section.get("path", DEFAULT_DB_PATH)
+    readers = int(environ.get("FLASHCARDS_DB_READERS") or section.get("readers", DEFAULT_READERS))
+    if readers < 1:
+        raise ValueError("At least one reader connection is required.")
+    pool_timeout = float(section.get("pool_timeout", DEFAULT_POOL_TIMEOUT))
+    return StorageSettings(
+        path=os.path.expanduser(path), profile_name=profile_name, profile=profile, readers=readers,
+        pool_timeout=pool_timeout,
+    )
+
+
+def apply_profile(bind: Engine, profile: StorageProfile, query_only: bool = False) -> None:
+    """Register a connect hook that sets the profile's PRAGMAs on each new SQLite connection."""
+
+    @event.listens_for(bind, "connect")
+    def _set_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in profile.pragmas().items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if query_only:
+                # Reader connections refuse writes, so a mis-routed write fails loudly instead of
+                # competing with the writer for the database lock.
+                cursor.execute("PRAGMA query_only=1")
+        finally:
+            cursor.close()
+
+
+def enable_foreign_keys(bind: Engine) -> None:
+    """Register a connect hook that turns on foreign key enforcement (off by default in SQLite).
+
+    The schema relies on it: deleting a deck removes its cards, review log and checkpoints through
+    ON DELETE CASCADE instead of one DELETE per row from the ORM.
+    """
+
+    @event.listens_for(bind, "connect")
+    def _enable(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA foreign_keys=ON")
+        finally:
+            cursor.close()
+
+
+class PoolMetrics:
+    """Checkout counters and wait times of one connection pool (updated from any thread)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_checkout(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "in_use": self.checkouts - self.checkins,
+                "timeouts": self.timeouts,
+                "total_wait_s": self.total_wait,
+                "max_wait_s": self.max_wait,
+                "mean_wait_s": self.total_wait / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that times every checkout (waiting for a free connection, or opening a new one)."""
 
-# SQLite needs check_same_thread disabled because Tkinter callbacks run on the main thread,
-# but sessions may be created in different controller contexts.
-# Using check_same_thread allows multiple threads to use this connection.
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}, future=True, echo=False
-)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(waited=time.perf_counter() - started)
+        return record
+
+    def _do_return_conn(self, record) -> None:
+        self.metrics.record_checkin()
+        super()._do_return_conn(record)
+
+
+def build_engine(settings: Optional[StorageSettings] = None, reader: bool = False) -> Engine:
+    """Writer engine (one pooled connection) or, with ``reader``, the read-only pool of ``settings.readers``.
+
+    SQLite allows a single writer at a time; funnelling writes through one connection makes threads
+    queue in the pool (measured) instead of spinning on SQLITE_BUSY, while reads run in parallel.
+    """
+    settings = settings or load_settings()
+    # SQLite needs check_same_thread disabled because Tkinter callbacks run on the main thread,
+    # but sessions are also opened on the DB, study and import worker threads. The pool hands each
+    # connection to one thread at a time.
+    bind = create_engine(
+        settings.url,
+        connect_args={"check_same_thread": False},
+        poolclass=MeteredQueuePool,
+        pool_size=settings.readers if reader else 1,
+        max_overflow=0,
+        pool_timeout=settings.pool_timeout,
+        future=True,
+        echo=False,
+    )
+    apply_profile(bind=bind, profile=settings.profile, query_only=reader)
+    enable_foreign_keys(bind=bind)
+    return bind
+
+
+_engine: Optional[Engine] = None
+_reader_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Build the app (writer) engine on first use so importing this module stays cheap and does not touch disk."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = build_engine()
+    return _engine
+
+
+def get_reader_engine() -> Engine:
+    """Build the read-only pool on first use; an in-memory database reads through the writer instead."""
+    global _reader_engine
+    if _reader_engine is None:
+        # Cached either way: every session asks for it, and load_settings() parses the config file.
+        settings = load_settings()
+        # Resolved before taking the lock, which get_engine() takes too.
+        shared = get_engine() if settings.in_memory else None
+        with _engine_lock:
+            if _reader_engine is None:
+                _reader_engine = shared or build_engine(settings=settings, reader=True)
+    return _reader_engine
+
+
+def __getattr__(name: str):
+    # Keep ``from models.storage import engine`` working while the engine itself is lazy.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class RoutingSession(Session):
+    """Session that reads through the reader pool and writes through the writer.
+
+    Only ORM/Core SELECTs go to the (read-only) reader pool; anything else, including flushes and
+    raw ``text()`` statements, runs on the writer. Once a session has used the writer it stays there,
+    so later reads in the same transaction see its own changes.
+    """
+
+    def __init__(self, writer: Engine, reader: Engine, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.reader = reader
+        self._on_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._on_writer or self._flushing or not isinstance(clause, (Select, CompoundSelect)):
+            self._on_writer = True
+            return self.writer
+        return self.reader
+
+
+class SessionManager:
+    """Session factory with a thread-scoped unit of work.
+
+    Called like a sessionmaker, it returns a fresh RoutingSession per call. Inside
+    ``with manager.unit_of_work():`` every session requested on that thread is the same session on
+    one writer connection and transaction: the services' own ``commit()`` calls only flush, and the
+    whole block commits at the end or rolls back on an exception.
+    """
+
+    def __init__(self, writer: Optional[Engine] = None, reader: Optional[Engine] = None):
+        # None: resolve the app engines lazily on first use.
+        self._writer = writer
+        self._reader = reader
+        self._local = threading.local()
+        self._rollback_listeners: List[Callable[[], None]] = []
+
+    @property
+    def writer(self) -> Engine:
+        return self._writer or get_engine()
+
+    @property
+    def reader(self) -> Engine:
+        if self._reader is not None:
+            return self._reader
+        return get_reader_engine() if self._writer is None else self._writer
+
+    def __call__(self) -> Session:
+        session = getattr(self._local, "session", None)
+        if session is not None:
+            return session
+        return RoutingSession(writer=self.writer, reader=self.reader, autoflush=False, future=True)
+
+    def add_rollback_listener(self, listener: Callable[[], None]) -> None:
+        """Call ``listener`` after a unit of work rolls back (e.g. to drop in-memory state it updated)."""
+        self._rollback_listeners.append(listener)
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator[Session]:
+        """Run several service calls in one transaction on this thread; nested blocks join the outer one."""
+        outer = getattr(self._local, "session", None)
+        if outer is not None:
+            yield outer
+            return
+        with self.writer.connect() as connection:
+            transaction = connection.begin()
+            # rollback_only: the services' commit()/close() leave this transaction alone.
+            session = Session(bind=connection, join_transaction_mode="rollback_only", autoflush=False, future=True)
+            self._local.session = session
+            try:
+                yield session
+                session.flush()
+                transaction.commit()
+            except BaseException:
+                transaction.rollback()
+                for listener in self._rollback_listeners:
+                    listener()
+                raise
+            finally:
+                self._local.session = None
+                session.close()
+
+    def pool_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Checkout counts and wait times per pool ("writer", and "reader" when it is separate)."""
+        pools = {"writer": self.writer.pool}
+        if self.reader is not self.writer:
+            pools["reader"] = self.reader.pool
+        return {role: pool.metrics.snapshot() for role, pool in pools.items() if isinstance(pool, MeteredQueuePool)}
+
+
+SessionLocal = SessionManager()
 # Create a base class for all mapped classes to inherit from
 # Enables declarative table definitions using class attributes
 Base = declarative_base()
 
 
 def init_db() -> None:
-    # Base.metadata (from declarative_base) collects all mapped tables above; create_all builds them in SQLite if missing.
-    Base.metadata.create_all(bind=engine)
+    """Create or upgrade the app database; the schema is versioned in models/migrations.py."""
+    # Imported here because migrations reference the mapped tables, which import this module.
+    from models.migrations import migrate
+
+    migrate(bind=get_engine())
@@ -2,11 +2,11 @@
 from dataclasses import dataclass
 from typing import Optional
 
-from bcrypt import hashpw, gensalt, checkpw
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from models.logs import get_logger
 from models.observable import ObservableModel
 from models.storage import Base
 from models.storage import SessionLocal
@@ -14,6 +14,8 @@ from models.storage import SessionLocal
 
 __author__ = 'fenzl'
 
+logger = get_logger("user")
+
 
 class UserRecord(Base):
     """ORM table for users (persisted in SQLite)."""
@@ -40,16 +42,18 @@ class UserService(ObservableModel):
         super().__init__()
         self.current_user: UserData | None = None
 
-    def _log(self, message: str) -> None:
-        print(f"[UserService] {message}")
-
     def _hash_password(self, password: str) -> str:
         """Hash with bcrypt; salt is embedded in the returned hash."""
+        # Imported here: bcrypt is only needed at sign-up/sign-in, not to open the window.
+        from bcrypt import gensalt, hashpw
+
         hashed = hashpw(password.encode("utf-8"), gensalt())
         return hashed.decode("utf-8")
 
     def _verify_password(self, password: str, hashed: str) -> bool:
         """Check plaintext against stored bcrypt hash."""
+        from bcrypt import checkpw
+
         return checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
 
     def _get_session(self) -> Session:
@@ -75,7 +79,7 @@ class UserService(ObservableModel):
             session.refresh(user)
 
         user_data = UserData(id=user.id, username=user.username, full_name=user.full_name)
-        self._log(message=f"Registered user {user_data}")
+        logger.info("Registered user %s", user_data)
         self.login(user=user_data)
         return user_data
 
@@ -101,9 +105,9 @@ class UserService(ObservableModel):
     def login(self, user: UserData) -> None:
         self.current_user = user
         self.trigger_event(event="auth_changed")
-        self._log(message=f"Logged in user {user}")
+        logger.info("Logged in user %s", user)
 
     def logout(self) -> None:
         self.current_user = None
         self.trigger_event(event="auth_changed")
-        self._log(message="Logged out")
+        logger.info("Logged out")
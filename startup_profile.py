@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Startup timing for ``python main.py --profile-startup``: per-module import cost and app phases."""
+import sys
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Tuple
+
+
+__author__ = 'fenzl'
+
+
+class _TimedLoader:
+    """Wraps a module loader to record how long executing the module takes."""
+
+    def __init__(self, loader, profiler: "StartupProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        self._profiler._enter()
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._leave(name=module.__name__, elapsed=time.perf_counter() - started)
+
+
+class StartupProfiler(MetaPathFinder):
+    """Meta-path hook recording inclusive/self import time per module, plus named phase marks."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._imports: Dict[str, Tuple[float, float]] = {}
+        # Time spent in nested imports, per level of the current import stack.
+        self._child_time: List[float] = []
+        self._phases: List[Tuple[str, float]] = []
+        self._finding = False
+
+    def install(self) -> "StartupProfiler":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+        # Ask the remaining finders, then time the real loader.
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(loader=spec.loader, profiler=self)
+                    return spec
+            return None
+        finally:
+            self._finding = False
+
+    def _enter(self) -> None:
+        self._child_time.append(0.0)
+
+    def _leave(self, name: str, elapsed: float) -> None:
+        children = self._child_time.pop()
+        if self._child_time:
+            self._child_time[-1] += elapsed
+        self._imports[name] = (elapsed, elapsed - children)
+
+    def mark(self, phase: str) -> None:
+        self._phases.append((phase, time.perf_counter() - self._started))
+
+    def report(self, top: int = 20, stream=sys.stderr) -> None:
+        print("Startup phases (ms since launch):", file=stream)
+        for phase, at in self._phases:
+            print(f"  {at * 1000:8.1f}  {phase}", file=stream)
+        print(f"Slowest imports by self time (top {top}):", file=stream)
+        print(f"  {'self ms':>8}  {'total ms':>8}  module", file=stream)
+        ranked = sorted(self._imports.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (total, own) in ranked[:top]:
+            print(f"  {own * 1000:8.1f}  {total * 1000:8.1f}  {name}", file=stream)
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 import unittest
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
-from models.storage import Base
+from models.storage import Base, enable_foreign_keys
 from models.user import UserRecord, UserData
 
 
@@ -20,6 +22,7 @@ class DBTestCase(unittest.TestCase):
 
     def setUp(self) -> None:
         self.engine = create_engine("sqlite:///:memory:", future=True)
+        enable_foreign_keys(bind=self.engine)
         self.session_factory = sessionmaker(
             bind=self.engine, autoflush=False, autocommit=False, future=True
         )
@@ -28,6 +31,33 @@ class DBTestCase(unittest.TestCase):
     def tearDown(self) -> None:
         self.engine.dispose()
 
+    def _listen_for_statements(self, statements: list, with_parameters: bool) -> Callable[..., None]:
+        def record(_conn, _cursor, statement, parameters, _context, _executemany) -> None:
+            statements.append((statement, parameters) if with_parameters else statement)
+
+        event.listen(self.engine, "before_cursor_execute", record)
+        return record
+
+    @contextmanager
+    def capture_statements(self, with_parameters: bool = False) -> Iterator[list]:
+        """Collect the SQL statements sent to the database inside the block (one entry per round trip).
+
+        With ``with_parameters`` each entry is a (statement, parameters) pair.
+        """
+        statements: list = []
+        record = self._listen_for_statements(statements=statements, with_parameters=with_parameters)
+        try:
+            yield statements
+        finally:
+            event.remove(self.engine, "before_cursor_execute", record)
+
+    def record_statements(self) -> List[str]:
+        """Like ``capture_statements``, but from now until the end of the test."""
+        statements: List[str] = []
+        record = self._listen_for_statements(statements=statements, with_parameters=False)
+        self.addCleanup(event.remove, self.engine, "before_cursor_execute", record)
+        return statements
+
     def create_user(
             self, username: str = "test", full_name: str = "Test User", password_hash: str = "hash"
     ) -> UserData:
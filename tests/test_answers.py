@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from models.cache import DeckCache
+from models.deck import CardRecord, DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class DeferredAnswerTests(DBTestCase):
+    """Card reads leave the answer column out; get_answer loads (and caches) it on demand."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory, cache=DeckCache())
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Deferred")
+        self.card = self.service.add_card(
+            user_id=self.user.id, deck_id=self.deck.id, question="Q", answer="A" * 4096
+        )
+        self.statements = self.record_statements()
+
+    def answer_reads(self) -> int:
+        return sum(1 for statement in self.statements if "cards.answer" in statement)
+
+    def test_list_and_study_reads_skip_answer(self) -> None:
+        (listed,) = self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+        (paged,) = self.service.list_cards_page(user_id=self.user.id, deck_id=self.deck.id).items
+        drawn = self.service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id)
+        self.service.buffer_score(user_id=self.user.id, card_id=self.card.id, delta=1)
+        self.service.update_score(user_id=self.user.id, card_id=self.card.id, delta=1)
+        self.assertEqual((listed.answer, paged.answer, drawn.answer), (None, None, None))
+        self.assertEqual(self.answer_reads(), 0)
+
+    def test_orm_loads_defer_answer(self) -> None:
+        with self.session_factory() as session:
+            session.get(CardRecord, self.card.id)
+            self.assertEqual(self.answer_reads(), 0)
+
+    def test_get_answer_is_cached_until_the_card_changes(self) -> None:
+        for _ in range(3):
+            self.assertEqual(self.service.get_answer(user_id=self.user.id, card_id=self.card.id), "A" * 4096)
+        self.assertEqual(self.answer_reads(), 1)
+
+        self.service.update_card(user_id=self.user.id, card_id=self.card.id, answer="Short")
+        self.assertEqual(self.service.get_answer(user_id=self.user.id, card_id=self.card.id), "Short")
+
+        self.service.delete_card(user_id=self.user.id, card_id=self.card.id)
+        with self.assertRaises(ValueError):
+            self.service.get_answer(user_id=self.user.id, card_id=self.card.id)
+
+    def test_get_answer_checks_owner(self) -> None:
+        other = self.create_user(username="other")
+        with self.assertRaises(ValueError):
+            self.service.get_answer(user_id=other.id, card_id=self.card.id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+from threading import Event
+from typing import Callable, Dict, List, Tuple
+
+from controllers.background import DBExecutor
+
+
+__author__ = 'fenzl'
+
+
+class FakeFrame:
+    def __init__(self):
+        self.messages: List[str] = []
+
+    def set_message(self, message: str) -> None:
+        self.messages.append(message)
+
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled: List[Callable[[], None]] = []
+
+        self.reported: List[BaseException] = []
+
+    def after(self, _delay_ms: int, callback: Callable[[], None]) -> None:
+        self.scheduled.append(callback)
+
+    def report_callback_exception(self, _exc_type, exc_value, _traceback) -> None:
+        self.reported.append(exc_value)
+
+
+class FakeMainView:
+    """Just enough of MainView for the executor: after(), frames, switch listeners and busy flags."""
+
+    def __init__(self):
+        self.root = FakeRoot()
+        self.frames: Dict[str, FakeFrame] = {"deck_list": FakeFrame(), "deck_detail": FakeFrame()}
+        self.busy_changes: List[Tuple[str, bool]] = []
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_switch_listener(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+    def switch(self, name: str) -> None:
+        for listener in self._listeners:
+            listener(name)
+
+    def set_busy(self, name: str, busy: bool) -> None:
+        self.busy_changes.append((name, busy))
+
+
+class DBExecutorTests(unittest.TestCase):
+    """Results come back through root.after on the calling thread; stale requests are dropped."""
+
+    def setUp(self) -> None:
+        self.view = FakeMainView()
+        self.executor = DBExecutor(main_view=self.view)  # type: ignore[arg-type]
+
+    def tearDown(self) -> None:
+        self.executor.close()
+
+    def pump(self, timeout: float = 5.0) -> None:
+        """Run the Tk-side polling until the executor has nothing left in flight."""
+        deadline = time.monotonic() + timeout
+        while self.view.root.scheduled:
+            if time.monotonic() > deadline:
+                self.fail("executor did not finish")
+            callbacks, self.view.root.scheduled = self.view.root.scheduled, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.001)
+
+    def test_result_and_error_delivery(self) -> None:
+        results = []
+        self.executor.submit(frame="deck_list", fn=lambda: 41 + 1, on_done=results.append)
+
+        def fail():
+            raise ValueError("Deck not found.")
+
+        self.executor.submit(frame="deck_list", fn=fail, on_done=results.append)
+        self.pump()
+        self.assertEqual(results, [42])
+        self.assertEqual(self.view.frames["deck_list"].messages, ["Deck not found."])
+        self.assertEqual(self.view.busy_changes, [("deck_list", True), ("deck_list", False)])
+
+    def test_raising_callback_does_not_block_later_results(self) -> None:
+        results = []
+
+        def broken(_value):
+            raise RuntimeError("widget gone")
+
+        self.executor.submit(frame="deck_list", fn=lambda: 1, on_done=broken)
+        self.executor.submit(frame="deck_list", fn=lambda: 2, on_done=results.append)
+        self.pump()
+        self.executor.submit(frame="deck_list", fn=lambda: 3, on_done=results.append)
+        self.pump()
+        self.assertEqual(results, [2, 3])
+        self.assertEqual([str(error) for error in self.view.root.reported], ["widget gone"])
+        self.assertEqual(self.view.busy_changes[-1], ("deck_list", False))
+
+    def test_newer_request_with_same_key_wins(self) -> None:
+        release = Event()
+        results = []
+        self.executor.submit(frame="deck_list", fn=release.wait, on_done=lambda _: results.append("blocker"))
+        self.executor.submit(frame="deck_list", key="list", fn=lambda: "old", on_done=results.append)
+        self.executor.submit(frame="deck_list", key="list", fn=lambda: "new", on_done=results.append)
+        release.set()
+        self.pump()
+        self.assertEqual(results, ["blocker", "new"])
+
+    def test_switching_frames_cancels_requests_of_other_frames(self) -> None:
+        release = Event()
+        ran = []
+        results = []
+        running = self.executor.submit(frame="deck_list", fn=release.wait, on_done=results.append)
+        queued = self.executor.submit(frame="deck_list", fn=lambda: ran.append(True), on_done=results.append)
+        kept = self.executor.submit(frame="deck_detail", fn=lambda: "detail", on_done=results.append)
+
+        self.view.switch(name="deck_detail")
+        self.assertFalse(running.active)
+        self.assertTrue(kept.active)
+        release.set()
+        self.pump()
+        self.assertEqual(results, ["detail"])
+        self.assertEqual(ran, [])
+        self.assertTrue(queued.future.cancelled())
+        self.assertFalse(kept.active)
+
+    def test_write_queued_behind_a_read_survives_a_frame_switch(self) -> None:
+        release = Event()
+        written = []
+        results = []
+        read = self.executor.submit(frame="deck_list", key="page", fn=release.wait, on_done=results.append)
+        write = self.executor.submit(
+            frame="deck_form", fn=lambda: written.append("saved"), on_done=results.append, cancellable=False
+        )
+        self.executor.cancel(frame="deck_form")
+        self.view.switch(name="deck_list")
+        self.assertTrue(read.active)
+        self.assertFalse(write.active)  # its callback belongs to the frame that was left
+        release.set()
+        self.pump()
+        self.assertEqual(written, ["saved"])
+        self.assertEqual(results, [True])
+        self.assertEqual(self.view.busy_changes[-1], ("deck_list", False))
+
+    def test_callbacks_can_submit_follow_up_requests(self) -> None:
+        results = []
+        self.executor.submit(
+            frame="deck_list",
+            fn=lambda: 1,
+            on_done=lambda value: self.executor.submit(
+                frame="deck_list", fn=lambda: value + 1, on_done=results.append
+            ),
+        )
+        self.pump()
+        self.assertEqual(results, [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from sqlalchemy import text
+
+from models.cache import DeckCache
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class BulkCardTests(DBTestCase):
+    """Multi-card delete/move/reset/copy: one set-based write each, scoped to the user's deck."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory, cache=DeckCache())
+        self.user = self.create_user()
+        self.other = self.create_user(username="other")
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Source")
+        self.target = self.service.create_deck(user_id=self.user.id, name="Target")
+        self.foreign = self.service.create_deck(user_id=self.other.id, name="Foreign")
+        self.cards = [
+            self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question=f"Q{index}", answer=f"A{index}")
+            for index in range(4)
+        ]
+        self.ids = [card.id for card in self.cards]
+
+    def card_ids(self, deck_id: int):
+        return [card.id for card in self.service.list_cards(user_id=self.user.id, deck_id=deck_id)]
+
+    def writes(self, statements):
+        return [statement for statement in statements if not statement.lstrip().upper().startswith("SELECT")]
+
+    def test_bulk_delete(self) -> None:
+        self.service.buffer_score(user_id=self.user.id, card_id=self.ids[0], delta=1)
+        with self.capture_statements() as statements:
+            deleted = self.service.bulk_delete_cards(
+                user_id=self.user.id, deck_id=self.deck.id, card_ids=self.ids[:2] + [999]
+            )
+        self.assertEqual(sorted(deleted), self.ids[:2])
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(self.card_ids(deck_id=self.deck.id), self.ids[2:])
+        self.assertEqual(self.service.pending_score_count, 0)
+        self.assertEqual(self.service.get_deck_stats(user_id=self.user.id, deck_id=self.deck.id).card_count, 2)
+
+    def test_move_takes_review_history_along(self) -> None:
+        self.service.update_score(user_id=self.user.id, card_id=self.ids[0], delta=-1)  # a lapse
+        self.service.flush_scores()
+        with self.capture_statements() as statements:
+            moved = self.service.move_cards(
+                user_id=self.user.id, deck_id=self.deck.id, card_ids=self.ids[:2], to_deck_id=self.target.id
+            )
+        self.assertEqual(sorted(moved), self.ids[:2])
+        self.assertEqual(len(self.writes(statements=statements)), 2)  # cards, then their review_log rows
+        self.assertEqual(self.card_ids(deck_id=self.target.id), self.ids[:2])
+        self.assertEqual(self.card_ids(deck_id=self.deck.id), self.ids[2:])
+        lapses = self.service.lapse_counts(user_id=self.user.id, deck_id=self.target.id)
+        self.assertEqual([(row.card_id, row.lapses) for row in lapses], [(self.ids[0], 1)])
+        # Deleting the old deck no longer cascades into the moved card's history.
+        self.service.delete_deck(user_id=self.user.id, deck_id=self.deck.id)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT count(*) FROM review_log")).scalar(), 1)
+        self.assertEqual(self.service.check_deck_stats(repair=False), [])
+
+    def test_move_flushes_queued_review_rows_first(self) -> None:
+        # A buffered rating queues its review log row, which still carries the old deck_id.
+        self.service.buffer_score(user_id=self.user.id, card_id=self.ids[0], delta=-1)
+        self.assertEqual(self.service.pending_review_count, 1)
+        self.service.move_cards(
+            user_id=self.user.id, deck_id=self.deck.id, card_ids=self.ids[:1], to_deck_id=self.target.id
+        )
+        self.assertEqual(self.service.pending_review_count, 0)
+        lapses = self.service.lapse_counts(user_id=self.user.id, deck_id=self.target.id)
+        self.assertEqual([(row.card_id, row.lapses) for row in lapses], [(self.ids[0], 1)])
+
+    def test_reset_scores(self) -> None:
+        self.service.update_score(user_id=self.user.id, card_id=self.ids[0], delta=3)
+        self.service.buffer_score(user_id=self.user.id, card_id=self.ids[1], delta=2)
+        reset = self.service.reset_scores(user_id=self.user.id, deck_id=self.deck.id, card_ids=self.ids[:2])
+        self.assertEqual([(card.id, card.score) for card in reset], [(self.ids[0], 0), (self.ids[1], 0)])
+        self.assertEqual(
+            [card.score for card in self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)], [0] * 4
+        )
+        self.assertEqual(self.service.pending_score_count, 0)
+
+    def test_copy_creates_new_cards(self) -> None:
+        self.service.update_score(user_id=self.user.id, card_id=self.ids[0], delta=3)
+        with self.capture_statements() as statements:
+            copies = self.service.copy_cards(
+                user_id=self.user.id, deck_id=self.deck.id, card_ids=self.ids[:2], to_deck_id=self.target.id
+            )
+        self.assertEqual(len(statements), 1)
+        self.assertEqual([(card.question, card.score) for card in copies], [("Q0", 0), ("Q1", 0)])
+        self.assertEqual(self.card_ids(deck_id=self.target.id), [card.id for card in copies])
+        self.assertEqual(self.service.get_answer(user_id=self.user.id, card_id=copies[1].id), "A1")
+        self.assertEqual(len(self.card_ids(deck_id=self.deck.id)), 4)
+
+    def test_foreign_decks_and_cards_are_untouched(self) -> None:
+        for method in (self.service.move_cards, self.service.copy_cards):
+            with self.assertRaises(ValueError):
+                method(user_id=self.user.id, deck_id=self.deck.id, card_ids=self.ids, to_deck_id=self.foreign.id)
+        with self.assertRaises(ValueError):
+            self.service.bulk_delete_cards(user_id=self.user.id, deck_id=self.deck.id, card_ids=[])
+        with self.assertRaises(ValueError):
+            self.service.move_cards(
+                user_id=self.user.id, deck_id=self.deck.id, card_ids=self.ids, to_deck_id=self.deck.id
+            )
+        self.assertEqual(
+            self.service.bulk_delete_cards(user_id=self.other.id, deck_id=self.deck.id, card_ids=self.ids), []
+        )
+        self.assertEqual(
+            self.service.reset_scores(user_id=self.user.id, deck_id=self.target.id, card_ids=self.ids), []
+        )
+        self.assertEqual(self.card_ids(deck_id=self.deck.id), self.ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
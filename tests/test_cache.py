@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from models.cache import MISSING, DeckCache, estimate_size
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class DeckCacheTests(unittest.TestCase):
+    """LRU bookkeeping, tag invalidation and counters of the cache itself."""
+
+    def test_hits_misses_and_tag_invalidation(self) -> None:
+        cache = DeckCache()
+        self.assertIs(cache.get(key="a"), MISSING)
+        cache.put(key="a", value=[1, 2], tags=[("cards", 1, 1)], generation=cache.generation)
+        cache.put(key="b", value=[3], tags=[("cards", 1, 2)], generation=cache.generation)
+        self.assertEqual(cache.get(key="a"), [1, 2])
+
+        cache.invalidate(("cards", 1, 1))
+        self.assertIs(cache.get(key="a"), MISSING)
+        self.assertEqual(cache.get(key="b"), [3])
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_evicts_least_recently_used_within_budget(self) -> None:
+        value = ["x" * 100]
+        cache = DeckCache(max_bytes=estimate_size(value) * 2)
+        cache.put(key="a", value=value, tags=[], generation=cache.generation)
+        cache.put(key="b", value=value, tags=[], generation=cache.generation)
+        cache.get(key="a")
+        cache.put(key="c", value=value, tags=[], generation=cache.generation)
+
+        self.assertIs(cache.get(key="b"), MISSING)
+        self.assertIsNot(cache.get(key="a"), MISSING)
+        stats = cache.stats()
+        self.assertEqual((stats.entries, stats.evictions), (2, 1))
+        self.assertLessEqual(stats.size_bytes, cache.max_bytes)
+
+    def test_result_loaded_before_a_write_is_not_stored(self) -> None:
+        cache = DeckCache()
+        generation = cache.generation
+        cache.invalidate(("cards", 1, 1))  # a write lands while the value is being loaded
+        cache.put(key="a", value=[1], tags=[("cards", 1, 1)], generation=generation)
+        self.assertEqual(len(cache), 0)
+
+
+class CachedDeckServiceTests(DBTestCase):
+    """Reads through DeckService(cache=...) skip the DB until a write invalidates them."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory, cache=DeckCache())
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Cached")
+        self.card = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q", answer="A")
+        self.statements = self.record_statements()
+
+    @property
+    def selects(self) -> int:
+        return sum(1 for statement in self.statements if statement.lstrip().upper().startswith("SELECT"))
+
+    def test_repeated_reads_are_served_from_memory(self) -> None:
+        for _ in range(3):
+            self.service.get_deck(user_id=self.user.id, deck_id=self.deck.id)
+            self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+            self.service.list_cards_page(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertEqual(self.selects, 3)
+        self.assertEqual(self.service.cache.stats().hits, 6)
+
+    def test_card_writes_invalidate_only_that_deck(self) -> None:
+        other = self.service.create_deck(user_id=self.user.id, name="Other")
+        self.service.list_cards(user_id=self.user.id, deck_id=other.id)
+        self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+        self.service.get_deck(user_id=self.user.id, deck_id=self.deck.id)
+
+        self.service.update_card(user_id=self.user.id, card_id=self.card.id, question="Edited")
+        self.statements.clear()
+        cards = self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+        self.service.list_cards(user_id=self.user.id, deck_id=other.id)
+        self.service.get_deck(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertEqual([card.question for card in cards], ["Edited"])
+        self.assertEqual(self.selects, 1)
+
+    def test_buffered_score_refreshes_cards_and_summaries(self) -> None:
+        self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+        self.service.list_deck_summaries(user_id=self.user.id)
+
+        self.service.buffer_score(user_id=self.user.id, card_id=self.card.id, delta=2)
+        (card,) = self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+        (summary,) = self.service.list_deck_summaries(user_id=self.user.id)
+        self.assertEqual(card.score, 2)
+        self.assertEqual(summary.max_score, 2)
+
+    def test_deck_writes_invalidate_deck_lists(self) -> None:
+        self.service.list_decks(user_id=self.user.id)
+        self.service.update_deck(user_id=self.user.id, deck_id=self.deck.id, name="Renamed")
+        self.assertEqual([deck.name for deck in self.service.list_decks(user_id=self.user.id)], ["Renamed"])
+        self.assertEqual(self.service.get_deck(user_id=self.user.id, deck_id=self.deck.id).name, "Renamed")
+
+        self.service.delete_deck(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertEqual(self.service.list_decks(user_id=self.user.id), [])
+        with self.assertRaises(ValueError):
+            self.service.get_deck(user_id=self.user.id, deck_id=self.deck.id)
+
+    def test_callers_cannot_mutate_cached_lists(self) -> None:
+        cards = self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+        cards.clear()
+        self.assertEqual(len(self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
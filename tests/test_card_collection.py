@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from models.card_collection import CardCollection
+from models.deck import CardData
+
+
+__author__ = 'fenzl'
+
+
+class CardCollectionTests(unittest.TestCase):
+    """The columnar collection behaves like the List[CardData] it replaces."""
+
+    def setUp(self) -> None:
+        self.cards = [
+            CardData(id=10 + index, question=f"Q{index}", answer=f"A{index}", score=index) for index in range(5)
+        ]
+        self.collection = CardCollection(cards=self.cards)
+
+    def test_list_like_access(self) -> None:
+        self.assertEqual(len(self.collection), 5)
+        self.assertEqual(self.collection[2], self.cards[2])
+        self.assertEqual(self.collection[-1], self.cards[-1])
+        self.assertEqual(self.collection[1:3], self.cards[1:3])
+        self.assertEqual(list(self.collection), self.cards)
+        self.assertEqual(self.collection, self.cards)
+        with self.assertRaises(IndexError):
+            _ = self.collection[5]
+
+    def test_score_update_in_place(self) -> None:
+        position = self.collection.position_of(card_id=13)
+        self.collection.set_score(index=position, score=42)
+        self.assertEqual(self.collection[position].score, 42)
+        # Items are snapshots; mutating one does not write back.
+        self.collection[0].score = 99
+        self.assertEqual(self.collection[0].score, 0)
+        with self.assertRaises(ValueError):
+            self.collection.position_of(card_id=999)
+
+    def test_extend_and_clear(self) -> None:
+        self.collection.extend([CardData(id=1, question="Q", answer="A", score=0)])
+        self.assertEqual(self.collection[5].id, 1)
+        self.collection.clear()
+        self.assertEqual(len(self.collection), 0)
+        self.assertEqual(list(self.collection), [])
+
+    def test_remove_ids_reports_positions(self) -> None:
+        self.assertEqual(self.collection.remove_ids(card_ids=[13, 10, 999]), [0, 3])
+        self.assertEqual(self.collection, [self.cards[1], self.cards[2], self.cards[4]])
+        self.assertEqual(self.collection.position_of(card_id=14), 2)
+        self.assertEqual(self.collection.remove_ids(card_ids=[]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
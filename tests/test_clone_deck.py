@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from sqlalchemy import text
+
+from models.cache import DeckCache
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class CloneDeckTests(DBTestCase):
+    """clone_deck copies a deck and its cards inside SQLite: two INSERT ... SELECT statements."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory, cache=DeckCache())
+        self.author = self.create_user(username="author")
+        self.student = self.create_user(username="student")
+        self.template = self.service.create_deck(user_id=self.author.id, name="Template", description="Shared")
+        self.cards = [
+            self.service.add_card(user_id=self.author.id, deck_id=self.template.id, question=f"Q{i}", answer=f"A{i}")
+            for i in range(3)
+        ]
+        self.service.update_score(user_id=self.author.id, card_id=self.cards[0].id, delta=4)
+
+    def test_clone_to_another_user(self) -> None:
+        self.service.list_decks(user_id=self.student.id)  # cached empty list must be evicted
+        with self.capture_statements() as statements:
+            clone = self.service.clone_deck(
+                source_user_id=self.author.id, source_deck_id=self.template.id, target_user_id=self.student.id
+            )
+        self.assertEqual([statement.split()[0].upper() for statement in statements], ["INSERT", "INSERT"])
+        self.assertEqual((clone.name, clone.description), ("Template", "Shared"))
+        self.assertEqual(self.service.list_decks(user_id=self.student.id), [clone])
+        copies = self.service.list_cards(user_id=self.student.id, deck_id=clone.id)
+        self.assertEqual([(card.question, card.score) for card in copies], [("Q0", 0), ("Q1", 0), ("Q2", 0)])
+        self.assertEqual(self.service.get_answer(user_id=self.student.id, card_id=copies[2].id), "A2")
+        self.assertEqual(self.service.get_deck_stats(user_id=self.student.id).card_count, 3)
+        hits = self.service.search_cards(user_id=self.student.id, query="Q1")
+        self.assertEqual([hit.deck_id for hit in hits], [clone.id])
+        with self.engine.connect() as connection:
+            # Review history stays with the source deck.
+            self.assertEqual(
+                connection.execute(text("SELECT count(*) FROM review_log WHERE deck_id = :deck"),
+                                   {"deck": clone.id}).scalar(),
+                0,
+            )
+
+    def test_clone_keeping_scores(self) -> None:
+        self.service.buffer_score(user_id=self.author.id, card_id=self.cards[1].id, delta=2)
+        clone = self.service.clone_deck(
+            source_user_id=self.author.id, source_deck_id=self.template.id, target_user_id=self.author.id,
+            reset_scores=False,
+        )
+        copies = self.service.list_cards(user_id=self.author.id, deck_id=clone.id)
+        self.assertEqual([card.score for card in copies], [4, 2, 0])
+        self.assertEqual(self.service.check_deck_stats(repair=False), [])
+
+    def test_clone_checks_source_owner_and_target_user(self) -> None:
+        with self.assertRaises(ValueError):
+            self.service.clone_deck(
+                source_user_id=self.student.id, source_deck_id=self.template.id, target_user_id=self.student.id
+            )
+        with self.assertRaises(ValueError):
+            self.service.clone_deck(
+                source_user_id=self.author.id, source_deck_id=self.template.id, target_user_id=999
+            )
+        self.assertEqual(len(self.service.list_decks(user_id=self.author.id)), 1)
+        self.assertEqual(self.service.list_decks(user_id=self.student.id), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
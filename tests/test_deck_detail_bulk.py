@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+from threading import Event
+from typing import Callable, List
+
+from controllers.background import DBExecutor
+from controllers.deck_detail import DeckDetailController
+from models.deck import CardData, DeckData
+from models.user import UserData
+from tests.test_background import FakeFrame, FakeMainView
+
+
+__author__ = 'fenzl'
+
+
+class FakeDeckDetailFrame(FakeFrame):
+    """Two cards selected and the first target deck picked; every other widget call is a no-op."""
+
+    def get_selected_indices(self) -> List[int]:
+        return [0, 1]
+
+    def get_target_index(self) -> int:
+        return 0
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        return lambda *args, **kwargs: None
+
+
+class FakeUsers:
+    current_user = UserData(id=1, username="owner", full_name="Owner")
+
+
+class FakeDecks:
+    def __init__(self):
+        self.writes: List[str] = []
+
+    def move_cards(self, user_id: int, deck_id: int, card_ids: List[int], to_deck_id: int) -> List[int]:
+        self.writes.append("move")
+        return card_ids
+
+    def copy_cards(self, user_id: int, deck_id: int, card_ids: List[int], to_deck_id: int) -> List[CardData]:
+        self.writes.append("copy")
+        return []
+
+
+class FakeModel:
+    def __init__(self):
+        self.users = FakeUsers()
+        self.decks = FakeDecks()
+
+
+class BulkActionTests(unittest.TestCase):
+    """Confirmed bulk writes are queued in order; a later action never cancels an earlier one."""
+
+    def setUp(self) -> None:
+        self.view = FakeMainView()
+        self.view.frames["deck_detail"] = FakeDeckDetailFrame()
+        self.executor = DBExecutor(main_view=self.view)  # type: ignore[arg-type]
+        self.model = FakeModel()
+        self.controller = DeckDetailController(
+            main_model=self.model, main_view=self.view, executor=self.executor  # type: ignore[arg-type]
+        )
+        self.controller.current_deck_id = 1
+        self.controller._append_cards(cards=[
+            CardData(id=card_id, question=f"Q{card_id}", answer=None, score=0) for card_id in (1, 2)
+        ])
+        self.controller._target_decks = [DeckData(id=2, name="Target", description="")]
+
+    def tearDown(self) -> None:
+        self.executor.close()
+        self.controller.close()
+
+    def pump(self, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while self.view.root.scheduled:
+            if time.monotonic() > deadline:
+                self.fail("executor did not finish")
+            callbacks, self.view.root.scheduled = self.view.root.scheduled, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.001)
+
+    def test_back_to_back_bulk_actions_both_run(self) -> None:
+        release = Event()
+        self.executor.submit(frame="deck_detail", key="page", fn=release.wait, on_done=lambda _: None)
+        self.controller.move_cards()
+        self.controller.copy_cards()
+        self.view.switch(name="deck_list")
+        release.set()
+        self.pump()
+        self.assertEqual(self.model.decks.writes, ["move", "copy"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -56,6 +56,63 @@ class DeckServiceTests(DBTestCase):
         self.assertGreater(counts[low.id], counts[mid.id])
         self.assertGreater(counts[mid.id], counts[high.id])
 
+    def test_buffered_scores_visible_before_flush(self) -> None:
+        deck = self.service.create_deck(user_id=self.user.id, name="Buffered")
+        card = self.service.add_card(
+            user_id=self.user.id, deck_id=deck.id, question="Q", answer="A"
+        )
+
+        self.service.buffer_score(user_id=self.user.id, card_id=card.id, delta=-1)
+        buffered = self.service.buffer_score(user_id=self.user.id, card_id=card.id, delta=2)
+        # Floors at zero per rating, like update_score.
+        self.assertEqual(buffered.score, 2)
+        self.assertEqual(self.service.pending_score_count, 1)
+        self.assertEqual(self.service.list_cards(user_id=self.user.id, deck_id=deck.id)[0].score, 2)
+
+        # A fresh service reads straight from the DB, which is untouched until the flush.
+        other = DeckService(session_factory=self.session_factory)
+        self.assertEqual(other.list_cards(user_id=self.user.id, deck_id=deck.id)[0].score, 0)
+        self.assertEqual(self.service.flush_scores(), 1)
+        self.assertEqual(other.list_cards(user_id=self.user.id, deck_id=deck.id)[0].score, 2)
+
+    def test_buffer_flushes_at_threshold(self) -> None:
+        service = DeckService(session_factory=self.session_factory, score_flush_threshold=2)
+        deck = service.create_deck(user_id=self.user.id, name="Threshold")
+        first = service.add_card(user_id=self.user.id, deck_id=deck.id, question="Q1", answer="A1")
+        second = service.add_card(user_id=self.user.id, deck_id=deck.id, question="Q2", answer="A2")
+
+        service.buffer_score(user_id=self.user.id, card_id=first.id, delta=1)
+        self.assertEqual(service.pending_score_count, 1)
+        service.buffer_score(user_id=self.user.id, card_id=second.id, delta=1)
+        self.assertEqual(service.pending_score_count, 0)
+
+    def test_deck_summaries_aggregate_cards(self) -> None:
+        full = self.service.create_deck(user_id=self.user.id, name="Full")
+        self.service.create_deck(user_id=self.user.id, name="Empty")
+        for index in range(4):
+            card = self.service.add_card(user_id=self.user.id, deck_id=full.id, question=f"Q{index}", answer="A")
+            if index:
+                self.service.update_score(user_id=self.user.id, card_id=card.id, delta=index + 1)
+        other_user = self.create_user(username="other", full_name="Other")
+        self.service.create_deck(user_id=other_user.id, name="Hidden")
+
+        empty, summary = self.service.list_deck_summaries(user_id=self.user.id)
+        self.assertEqual((empty.name, empty.card_count, empty.average_score, empty.weak_count), ("Empty", 0, None, 0))
+        self.assertEqual(summary.name, "Full")
+        self.assertEqual(summary.card_count, 4)
+        self.assertEqual((summary.min_score, summary.max_score), (0, 4))
+        self.assertAlmostEqual(summary.average_score, 2.25)
+        self.assertEqual(summary.weak_count, 1)
+
+    def test_deck_summaries_include_buffered_scores(self) -> None:
+        deck = self.service.create_deck(user_id=self.user.id, name="Buffered")
+        card = self.service.add_card(user_id=self.user.id, deck_id=deck.id, question="Q", answer="A")
+        self.service.buffer_score(user_id=self.user.id, card_id=card.id, delta=3)
+
+        (summary,) = self.service.list_deck_summaries(user_id=self.user.id)
+        self.assertEqual(summary.max_score, 3)
+        self.assertEqual(summary.weak_count, 0)
+
     def test_next_card_none_when_empty(self) -> None:
         deck = self.service.create_deck(user_id=self.user.id, name="Empty")
         self.assertIsNone(
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from sqlalchemy import text
+
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class DeckStatsTests(DBTestCase):
+    """deck_stats counters follow card writes through triggers; the checker repairs drift."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Stats")
+        self.cards = [
+            self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question=f"Q{index}", answer="A")
+            for index in range(3)
+        ]
+
+    def counters(self, deck_id=None) -> tuple:
+        stats = self.service.get_deck_stats(user_id=self.user.id, deck_id=deck_id)
+        return stats.deck_count, stats.card_count, stats.score_total, stats.zero_count, stats.weak_count
+
+    def test_new_deck_starts_at_zero(self) -> None:
+        empty = self.service.create_deck(user_id=self.user.id, name="Empty")
+        self.assertEqual(self.counters(deck_id=empty.id), (1, 0, 0, 0, 0))
+        self.assertIsNone(self.service.get_deck_stats(user_id=self.user.id, deck_id=empty.id).average_score)
+
+    def test_counters_follow_inserts_scores_and_deletes(self) -> None:
+        self.assertEqual(self.counters(deck_id=self.deck.id), (1, 3, 0, 3, 3))
+        self.service.update_score(user_id=self.user.id, card_id=self.cards[0].id, delta=3)
+        self.service.buffer_score(user_id=self.user.id, card_id=self.cards[1].id, delta=1)  # flushed by the read
+        self.assertEqual(self.counters(deck_id=self.deck.id), (1, 3, 4, 1, 2))
+        self.service.delete_card(user_id=self.user.id, card_id=self.cards[0].id)
+        self.assertEqual(self.counters(deck_id=self.deck.id), (1, 2, 1, 1, 2))
+        stats = self.service.get_deck_stats(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertAlmostEqual(stats.average_score, 0.5)
+
+    def test_totals_over_decks_and_deck_deletion(self) -> None:
+        other = self.service.create_deck(user_id=self.user.id, name="Other")
+        self.service.add_card(user_id=self.user.id, deck_id=other.id, question="Q", answer="A")
+        self.assertEqual(self.counters(), (2, 4, 0, 4, 4))
+        self.service.delete_deck(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertEqual(self.counters(), (1, 1, 0, 1, 1))
+        with self.assertRaises(ValueError):
+            self.service.get_deck_stats(user_id=self.user.id, deck_id=self.deck.id)
+
+    def test_checker_repairs_drift(self) -> None:
+        self.assertEqual(self.service.check_deck_stats(), [])
+        with self.engine.connect() as connection:
+            # An orphan row can only come from a write made with foreign keys off.
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+            connection.execute(text("UPDATE deck_stats SET card_count = 99"))
+            connection.execute(text("INSERT INTO deck_stats (deck_id, user_id) VALUES (42, :user)"), {"user": 1})
+            connection.commit()
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+            connection.commit()
+        self.assertEqual(self.service.check_deck_stats(repair=False), [self.deck.id, 42])
+        self.assertEqual(self.service.check_deck_stats(), [self.deck.id, 42])
+        self.assertEqual(self.service.check_deck_stats(), [])
+        self.assertEqual(self.counters(), (1, 3, 0, 3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class ExportTests(DBTestCase):
+    """Streaming CSV/JSONL/SQL exports."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Alpha", description="first")
+        self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q1", answer="A, 'quoted'")
+        self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q2", answer="A2")
+        self.empty = self.service.create_deck(user_id=self.user.id, name="Beta")
+        other = self.create_user(username="other")
+        other_deck = self.service.create_deck(user_id=other.id, name="Private")
+        self.service.add_card(user_id=other.id, deck_id=other_deck.id, question="Secret", answer="S")
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        super().tearDown()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_csv_export_round_trips_through_import(self) -> None:
+        path = self.path("alpha.csv")
+        self.assertEqual(self.service.export_deck(user_id=self.user.id, deck_id=self.deck.id, path=path), 2)
+        with open(path, newline="", encoding="utf-8") as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(rows[0], ["question", "answer", "score", "deck"])
+        self.assertEqual(rows[1][:2], ["Q1", "A, 'quoted'"])
+
+        self.service.import_cards(user_id=self.user.id, deck_id=self.empty.id, path=path)
+        self.assertEqual(len(self.service.list_cards(user_id=self.user.id, deck_id=self.empty.id)), 2)
+
+    def test_export_all_jsonl_only_includes_own_decks(self) -> None:
+        path = self.path("all.jsonl")
+        self.assertEqual(self.service.export_all(user_id=self.user.id, path=path), 2)
+        with open(path, encoding="utf-8") as handle:
+            items = [json.loads(line) for line in handle]
+        self.assertEqual([item["name"] for item in items if item["type"] == "deck"], ["Alpha", "Beta"])
+        self.assertNotIn("Secret", [item.get("question") for item in items])
+
+    def test_sql_dump_loads_into_sqlite(self) -> None:
+        path = self.path("all.sql")
+        self.service.export_all(user_id=self.user.id, path=path)
+        connection = sqlite3.connect(":memory:")
+        with open(path, encoding="utf-8") as handle:
+            connection.executescript(handle.read())
+        self.assertEqual(connection.execute("SELECT count(*) FROM decks").fetchone()[0], 2)
+        self.assertEqual(
+            connection.execute("SELECT answer FROM cards WHERE question = 'Q1'").fetchone()[0], "A, 'quoted'"
+        )
+        connection.close()
+
+    def test_export_of_foreign_deck_rejected(self) -> None:
+        other = self.create_user(username="intruder")
+        with self.assertRaises(ValueError):
+            self.service.export_deck(user_id=other.id, deck_id=self.deck.id, path=self.path("x.csv"))
+        self.assertFalse(os.path.exists(self.path("x.csv")))
+
+
+if __name__ == "__main__":
+    unittest.main()
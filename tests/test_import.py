@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+from threading import Event
+
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class ImportCardsTests(DBTestCase):
+    """Streaming CSV/TSV/JSONL import with batching and resume."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Import")
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        super().tearDown()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            handle.write(content)
+        return path
+
+    def questions(self) -> list:
+        return [card.question for card in self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)]
+
+    def test_csv_with_header_and_invalid_rows(self) -> None:
+        path = self.write("cards.csv", 'question,answer\nQ1,A1\n"Q, two","A\nmultiline"\n,missing\nonly-one\n')
+        result = self.service.import_cards(user_id=self.user.id, deck_id=self.deck.id, path=path)
+        self.assertTrue(result.completed)
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(self.questions(), ["Q1", "Q, two"])
+
+    def test_tsv_and_jsonl(self) -> None:
+        tsv = self.write("cards.tsv", "Q1\tA1\nQ2\tA2\n")
+        jsonl = self.write("cards.jsonl", json.dumps({"question": "Q3", "answer": "A3"}) + "\nnot json\n")
+        self.service.import_cards(user_id=self.user.id, deck_id=self.deck.id, path=tsv)
+        result = self.service.import_cards(user_id=self.user.id, deck_id=self.deck.id, path=jsonl)
+        self.assertEqual(result.skipped, 1)
+        self.assertEqual(self.questions(), ["Q1", "Q2", "Q3"])
+
+    def test_interrupted_import_resumes(self) -> None:
+        path = self.write("big.csv", "".join(f"Q{i},A{i}\n" for i in range(1, 11)))
+        cancel = Event()
+        cancel.set()  # stop after the first committed batch
+        first = self.service.import_cards(
+            user_id=self.user.id, deck_id=self.deck.id, path=path, batch_size=4, cancel=cancel
+        )
+        self.assertFalse(first.completed)
+        self.assertEqual(first.imported, 4)
+
+        progress = []
+        second = self.service.import_cards(
+            user_id=self.user.id, deck_id=self.deck.id, path=path, batch_size=4,
+            progress=lambda imported, fraction: progress.append((imported, fraction)),
+        )
+        self.assertTrue(second.completed)
+        self.assertEqual(second.resumed_from, 4)
+        self.assertEqual(second.imported, 6)
+        self.assertEqual(progress[-1], (6, 1.0))
+        self.assertEqual(self.questions(), [f"Q{i}" for i in range(1, 11)])
+
+    def test_import_into_foreign_deck_rejected(self) -> None:
+        other = self.create_user(username="other")
+        path = self.write("cards.csv", "Q,A\n")
+        with self.assertRaises(ValueError):
+            self.service.import_cards(user_id=other.id, deck_id=self.deck.id, path=path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from models.deck import DeckService
+from models.logs import ROOT_LOGGER, LogSettings, configure_logging, get_logger, load_log_settings
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class CountingRepr:
+    """Counts how often it is formatted, to prove that disabled log calls format nothing."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __repr__(self) -> str:
+        self.calls += 1
+        return "CountingRepr()"
+
+
+class LogSettingsTests(unittest.TestCase):
+    """Level/file resolution from env vars and the [logging] config section."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.directory.name, "flashcards.ini")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_defaults(self) -> None:
+        settings = load_log_settings(environ={"FLASHCARDS_CONFIG": self.config_path})
+        self.assertEqual(settings, LogSettings())
+
+    def test_config_file_with_env_override(self) -> None:
+        with open(self.config_path, "w", encoding="utf-8") as handle:
+            handle.write("[logging]\nlevel = debug\nfile = from_file.jsonl\nbackups = 7\n")
+        environ = {"FLASHCARDS_CONFIG": self.config_path, "FLASHCARDS_LOG_LEVEL": "info"}
+        settings = load_log_settings(environ=environ)
+        self.assertEqual((settings.level, settings.json_path, settings.backups), ("INFO", "from_file.jsonl", 7))
+
+    def test_unknown_level_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            load_log_settings(environ={"FLASHCARDS_CONFIG": self.config_path, "FLASHCARDS_LOG_LEVEL": "loud"})
+
+
+class LoggingTests(DBTestCase):
+    """Service log calls are lazy, and the JSON-lines handler writes one object per record and rotates."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "app.jsonl")
+
+    def tearDown(self) -> None:
+        configure_logging(settings=LogSettings())
+        self.directory.cleanup()
+        super().tearDown()
+
+    def configure(self, level: str, max_bytes: int = 1024 * 1024) -> None:
+        configure_logging(settings=LogSettings(level=level, json_path=self.path, max_bytes=max_bytes))
+        # Keep the console handler out of the test output.
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.removeHandler(logger.handlers[0])
+
+    def records(self):
+        for handler in logging.getLogger(ROOT_LOGGER).handlers:
+            handler.flush()
+        with open(self.path, encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_disabled_levels_format_nothing(self) -> None:
+        self.configure(level="INFO")
+        argument = CountingRepr()
+        get_logger("deck").debug("Selected %r", argument)
+        get_logger("deck").info("Created %r", argument)
+        self.assertEqual(argument.calls, 1)
+        self.assertFalse(get_logger("deck").isEnabledFor(logging.DEBUG))
+
+    def test_service_writes_json_lines(self) -> None:
+        self.configure(level="INFO")
+        service = DeckService(session_factory=self.session_factory)
+        user = self.create_user()
+        deck = service.create_deck(user_id=user.id, name="Logged")
+        service.list_cards(user_id=user.id, deck_id=deck.id)  # DEBUG: filtered out
+        (record,) = self.records()
+        self.assertEqual((record["level"], record["logger"]), ("INFO", "flashcards.deck"))
+        self.assertEqual(record["message"], f"Created deck {deck!r}")
+        self.assertTrue(record["time"].endswith("+00:00"))
+
+    def test_file_rotates(self) -> None:
+        self.configure(level="DEBUG", max_bytes=2048)
+        for index in range(100):
+            get_logger("user").debug("Message number %d", index)
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertLessEqual(os.path.getsize(self.path), 2048)
+
+
+if __name__ == "__main__":
+    unittest.main()
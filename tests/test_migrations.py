@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from models.deck import DeckService
+from models.migrations import LATEST_VERSION, current_version, migrate
+from models.storage import enable_foreign_keys
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+# The original, unversioned schema as older app.db files have it.
+LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL UNIQUE, full_name VARCHAR NOT NULL,
+                    password_hash VARCHAR NOT NULL);
+CREATE TABLE decks (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, description TEXT,
+                    user_id INTEGER NOT NULL REFERENCES users (id));
+CREATE TABLE cards (id INTEGER PRIMARY KEY, question TEXT NOT NULL, answer TEXT NOT NULL, score INTEGER NOT NULL,
+                    deck_id INTEGER NOT NULL REFERENCES decks (id), user_id INTEGER NOT NULL REFERENCES users (id));
+CREATE INDEX ix_cards_deck_id ON cards (deck_id);
+CREATE INDEX ix_cards_user_id ON cards (user_id);
+CREATE INDEX ix_decks_user_id ON decks (user_id);
+INSERT INTO users VALUES (1, 'old', 'Old User', 'hash');
+INSERT INTO decks VALUES (1, 'Legacy', '', 1);
+INSERT INTO cards VALUES (1, 'Q', 'A', 3, 1, 1);
+"""
+
+
+class MigrationRunnerTests(unittest.TestCase):
+    """Schema versioning on fresh and legacy databases."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.directory.name, 'app.db')}", future=True)
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_fresh_database_is_stamped_latest(self) -> None:
+        self.assertEqual(migrate(bind=self.engine), LATEST_VERSION)
+        self.assertTrue(inspect(self.engine).has_table("cards"))
+        with self.engine.connect() as connection:
+            self.assertEqual(current_version(connection=connection), LATEST_VERSION)
+
+    def test_legacy_database_is_upgraded_in_place(self) -> None:
+        with self.engine.begin() as connection:
+            for statement in LEGACY_SCHEMA.split(";"):
+                if statement.strip():
+                    connection.exec_driver_sql(statement)
+
+        self.assertEqual(migrate(bind=self.engine), LATEST_VERSION)
+        # Running again is a no-op.
+        self.assertEqual(migrate(bind=self.engine), LATEST_VERSION)
+
+        columns = {column["name"] for column in inspect(self.engine).get_columns("cards")}
+        self.assertTrue({"due_at", "interval", "ease"} <= columns)
+        indexes = {index["name"] for index in inspect(self.engine).get_indexes("cards")}
+        self.assertTrue({"ix_cards_user_deck", "ix_cards_user_deck_score", "ix_cards_user_deck_due"} <= indexes)
+
+        service = DeckService(session_factory=sessionmaker(bind=self.engine, future=True))
+        cards = service.list_cards(user_id=1, deck_id=1)
+        self.assertEqual([(card.question, card.score) for card in cards], [("Q", 3)])
+        # The search index was backfilled from the existing cards.
+        self.assertEqual([hit.id for hit in service.search_cards(user_id=1, query="Q")], [1])
+        # deck_stats was backfilled, and its triggers follow later writes.
+        self.assertEqual(service.get_deck_stats(user_id=1, deck_id=1).card_count, 1)
+        service.add_card(user_id=1, deck_id=1, question="Q2", answer="A2")
+        self.assertEqual(service.get_deck_stats(user_id=1, deck_id=1).card_count, 2)
+        self.assertEqual(service.check_deck_stats(), [])
+
+    def test_legacy_foreign_keys_are_rebuilt_to_cascade(self) -> None:
+        with self.engine.begin() as connection:
+            for statement in LEGACY_SCHEMA.split(";"):
+                if statement.strip():
+                    connection.exec_driver_sql(statement)
+            # Left behind by a deck deleted before foreign keys were enforced.
+            connection.exec_driver_sql("INSERT INTO cards VALUES (2, 'Orphan', 'A', 0, 99, 1)")
+        migrate(bind=self.engine)
+
+        inspector = inspect(self.engine)
+        for table, column in (("cards", "deck_id"), ("review_log", "card_id"), ("import_checkpoints", "deck_id")):
+            (key,) = [key for key in inspector.get_foreign_keys(table) if key["constrained_columns"] == [column]]
+            self.assertEqual(key["options"].get("ondelete"), "CASCADE", table)
+        self.assertEqual(
+            {index["name"] for index in inspector.get_indexes("review_log")},
+            {"ix_review_log_user_time", "ix_review_log_lapses"},
+        )
+
+        enable_foreign_keys(bind=self.engine)
+        self.engine.dispose()  # pooled connections predate the hook
+        service = DeckService(session_factory=sessionmaker(bind=self.engine, future=True))
+        self.assertEqual([hit.id for hit in service.search_cards(user_id=1, query="Q")], [1])
+        service.update_score(user_id=1, card_id=1, delta=1)
+        service.flush_scores()
+        service.delete_deck(user_id=1, deck_id=1)
+        with self.engine.connect() as connection:
+            for table in ("cards", "review_log", "deck_stats"):
+                self.assertEqual(connection.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar(), 0, table)
+            self.assertEqual(connection.exec_driver_sql("PRAGMA foreign_keys").scalar(), 1)
+
+
+class QueryPlanTests(DBTestCase):
+    """EXPLAIN QUERY PLAN for the statements DeckService actually sends on its hot paths."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.user = self.create_user()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Plans")
+        self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q", answer="A")
+
+    def plan_for(self, call) -> str:
+        with self.capture_statements(with_parameters=True) as statements:
+            call()
+        plans = []
+        with self.engine.connect() as connection:
+            for statement, parameters in statements:
+                if not statement.lstrip().upper().startswith("SELECT"):
+                    continue
+                rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                plans.append(" / ".join(row[-1] for row in rows))
+        return "\n".join(plans)
+
+    def test_list_cards_uses_owner_deck_index(self) -> None:
+        plan = self.plan_for(lambda: self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id))
+        self.assertIn("USING INDEX ix_cards_user_deck ", plan + " ")
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_sampler_projection_is_covered(self) -> None:
+        plan = self.plan_for(lambda: self.service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id))
+        self.assertIn("USING COVERING INDEX ix_cards_user_deck_score", plan)
+
+    def test_list_decks_uses_owner_name_index(self) -> None:
+        plan = self.plan_for(lambda: self.service.list_decks(user_id=self.user.id))
+        self.assertIn("ix_decks_user_name", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_deck_summaries_read_counters_and_seek_min_max(self) -> None:
+        plan = self.plan_for(lambda: self.service.list_deck_summaries(user_id=self.user.id))
+        self.assertIn("SEARCH decks USING INDEX ix_decks_user_name", plan)
+        self.assertIn("SEARCH deck_stats USING INTEGER PRIMARY KEY", plan)
+        self.assertIn("USING COVERING INDEX ix_cards_user_deck_score", plan)
+        self.assertNotIn("SCAN", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_review_analytics_are_covered_by_log_indexes(self) -> None:
+        self.service.buffer_score(user_id=self.user.id, card_id=1, delta=-1)
+        self.service.flush_scores()
+        plan = self.plan_for(lambda: self.service.reviews_per_day(user_id=self.user.id))
+        self.assertIn("USING COVERING INDEX ix_review_log_user_time", plan)
+        plan = self.plan_for(lambda: self.service.lapse_counts(user_id=self.user.id, deck_id=self.deck.id))
+        self.assertIn("USING COVERING INDEX ix_review_log_lapses", plan)
+        self.assertNotIn("SCAN review_log", plan)
+
+    def test_deck_stats_read_is_a_primary_key_lookup(self) -> None:
+        plan = self.plan_for(lambda: self.service.get_deck_stats(user_id=self.user.id, deck_id=self.deck.id))
+        self.assertIn("SEARCH deck_stats USING INTEGER PRIMARY KEY", plan)
+
+    def test_next_due_uses_due_index(self) -> None:
+        service = DeckService(session_factory=self.session_factory, study_mode="scheduled")
+        plan = self.plan_for(lambda: service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id))
+        self.assertIn("ix_cards_user_deck_due", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
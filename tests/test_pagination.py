@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class KeysetPaginationTests(DBTestCase):
+    """Paged list_cards/list_decks must walk the same rows as the unpaged calls."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+
+    def test_card_pages_cover_deck_in_order(self) -> None:
+        deck = self.service.create_deck(user_id=self.user.id, name="Paged")
+        for index in range(7):
+            self.service.add_card(user_id=self.user.id, deck_id=deck.id, question=f"Q{index}", answer="A")
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = self.service.list_cards_page(user_id=self.user.id, deck_id=deck.id, after_id=cursor, page_size=3)
+            seen.extend(page.items)
+            pages += 1
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, self.service.list_cards(user_id=self.user.id, deck_id=deck.id))
+
+    def test_exact_multiple_has_no_empty_trailing_page(self) -> None:
+        deck = self.service.create_deck(user_id=self.user.id, name="Even")
+        for index in range(4):
+            self.service.add_card(user_id=self.user.id, deck_id=deck.id, question=f"Q{index}", answer="A")
+        first = self.service.list_cards_page(user_id=self.user.id, deck_id=deck.id, page_size=2)
+        second = self.service.list_cards_page(
+            user_id=self.user.id, deck_id=deck.id, after_id=first.next_cursor, page_size=2
+        )
+        self.assertIsNotNone(first.next_cursor)
+        self.assertEqual(len(second.items), 2)
+        self.assertIsNone(second.next_cursor)
+
+    def test_deck_pages_handle_duplicate_names(self) -> None:
+        for name in ("b", "a", "b", "c", "b"):
+            self.service.create_deck(user_id=self.user.id, name=name)
+        seen, cursor = [], None
+        while True:
+            page = self.service.list_decks_page(user_id=self.user.id, after=cursor, page_size=2)
+            seen.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.service.list_decks(user_id=self.user.id))
+        self.assertEqual([deck.name for deck in seen], ["a", "b", "b", "b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import unittest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.exc import DatabaseError
+
+from models.deck import DeckService, ReviewLogRecord
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class ReviewLogTests(DBTestCase):
+    """Ratings append review_log rows in the score flush; analytics read them back."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Reviews")
+        self.first = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q1", answer="A1")
+        self.second = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q2", answer="A2")
+
+    def log_rows(self) -> list:
+        with self.session_factory() as session:
+            return session.execute(select(ReviewLogRecord).order_by(ReviewLogRecord.id)).scalars().all()
+
+    def test_buffered_ratings_are_logged_by_the_flush(self) -> None:
+        self.service.buffer_score(user_id=self.user.id, card_id=self.first.id, delta=1, response_ms=1200)
+        self.service.buffer_score(user_id=self.user.id, card_id=self.first.id, delta=-1)
+        self.service.buffer_score(user_id=self.user.id, card_id=self.second.id, delta=1)
+        self.assertEqual(self.log_rows(), [])
+
+        with self.capture_statements() as statements:
+            self.assertEqual(self.service.flush_scores(), 2)
+        # One executemany UPDATE for the scores, one executemany INSERT for the log, one commit.
+        self.assertEqual(len(statements), 2)
+        rows = self.log_rows()
+        self.assertEqual(
+            [(row.card_id, row.deck_id, row.delta, row.score, row.response_ms) for row in rows],
+            [
+                (self.first.id, self.deck.id, 1, 1, 1200),
+                (self.first.id, self.deck.id, -1, 0, None),
+                (self.second.id, self.deck.id, 1, 1, None),
+            ],
+        )
+        self.assertEqual(self.service.pending_review_count, 0)
+
+    def test_failed_flush_keeps_the_buffer(self) -> None:
+        self.service.buffer_score(user_id=self.user.id, card_id=self.first.id, delta=1)
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TRIGGER review_log_full BEFORE INSERT ON review_log BEGIN SELECT RAISE(ABORT, 'full'); END"
+            )
+        with self.assertRaises(DatabaseError):
+            self.service.flush_scores()
+        self.assertEqual((self.service.pending_score_count, self.service.pending_review_count), (1, 1))
+        (card,) = self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)[:1]
+        self.assertEqual(card.score, 1)
+
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql("DROP TRIGGER review_log_full")
+        self.assertEqual(self.service.flush_scores(), 1)
+        self.assertEqual([row.score for row in self.log_rows()], [1])
+
+    def test_threshold_counts_log_rows(self) -> None:
+        service = DeckService(session_factory=self.session_factory, score_flush_threshold=3)
+        for _ in range(3):
+            service.buffer_score(user_id=self.user.id, card_id=self.first.id, delta=1)
+        self.assertEqual(len(self.log_rows()), 3)
+
+    def test_scheduled_reviews_are_logged(self) -> None:
+        service = DeckService(session_factory=self.session_factory, study_mode="scheduled")
+        now = datetime(2026, 3, 1, 12, 0)
+        service.record_review(user_id=self.user.id, card_id=self.first.id, remembered=False, now=now, response_ms=900)
+        service.flush_scores()
+        (row,) = self.log_rows()
+        self.assertEqual((row.reviewed_at, row.delta, row.score, row.response_ms), (now, -1, 0, 900))
+
+    def test_deleted_cards_drop_pending_rows(self) -> None:
+        self.service.buffer_score(user_id=self.user.id, card_id=self.first.id, delta=1)
+        self.service.buffer_score(user_id=self.user.id, card_id=self.second.id, delta=1)
+        self.service.delete_card(user_id=self.user.id, card_id=self.first.id)
+        self.service.flush_scores()
+        self.assertEqual([row.card_id for row in self.log_rows()], [self.second.id])
+
+    def test_reviews_per_day(self) -> None:
+        now = datetime(2026, 3, 10, 18, 0)
+        service = DeckService(session_factory=self.session_factory, study_mode="scheduled")
+        for days_ago, remembered in ((0, True), (0, False), (2, True), (40, False)):
+            service.record_review(
+                user_id=self.user.id, card_id=self.first.id, remembered=remembered, now=now - timedelta(days=days_ago)
+            )
+        days = service.reviews_per_day(user_id=self.user.id, days=30, now=now)
+        self.assertEqual(
+            [(day.day, day.reviews, day.lapses) for day in days],
+            [(date(2026, 3, 8), 1, 0), (date(2026, 3, 10), 2, 1)],
+        )
+
+    def test_lapse_counts(self) -> None:
+        other = self.service.create_deck(user_id=self.user.id, name="Other")
+        third = self.service.add_card(user_id=self.user.id, deck_id=other.id, question="Q3", answer="A3")
+        for card, lapses in ((self.first, 1), (self.second, 3), (third, 2)):
+            for _ in range(lapses):
+                self.service.buffer_score(user_id=self.user.id, card_id=card.id, delta=-1)
+            self.service.buffer_score(user_id=self.user.id, card_id=card.id, delta=1)
+
+        everywhere = self.service.lapse_counts(user_id=self.user.id)
+        self.assertEqual([(c.question, c.lapses) for c in everywhere], [("Q2", 3), ("Q3", 2), ("Q1", 1)])
+        in_deck = self.service.lapse_counts(user_id=self.user.id, deck_id=self.deck.id, limit=1)
+        self.assertEqual([(c.card_id, c.lapses) for c in in_deck], [(self.second.id, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
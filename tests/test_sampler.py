@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import unittest
+from collections import Counter
+from dataclasses import replace
+from random import Random
+
+from models.deck import DeckService
+from models.sampler import WeightedSampler
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class WeightedSamplerTests(unittest.TestCase):
+    """Check the Fenwick sampler matches the inverted-score weighting."""
+
+    def draw(self, sampler: WeightedSampler, times: int = 6000) -> Counter:
+        rng = Random(1234)
+        return Counter(sampler.sample(rng=rng) for _ in range(times))
+
+    def test_distribution_follows_inverted_scores(self) -> None:
+        # max_score = 4, so weights are 5, 3, 1.
+        sampler = WeightedSampler(items=[(1, 0), (2, 2), (3, 4)])
+        counts = self.draw(sampler=sampler, times=9000)
+        self.assertAlmostEqual(counts[1] / 9000, 5 / 9, delta=0.03)
+        self.assertAlmostEqual(counts[2] / 9000, 3 / 9, delta=0.03)
+        self.assertAlmostEqual(counts[3] / 9000, 1 / 9, delta=0.03)
+
+    def test_updates_shift_weights_and_max_score(self) -> None:
+        sampler = WeightedSampler(items=[(1, 0), (2, 0)])
+        sampler.update(card_id=1, score=9)
+        counts = self.draw(sampler=sampler)
+        self.assertGreater(counts[2], counts[1] * 5)
+
+        # Lowering the max again restores equal odds.
+        sampler.update(card_id=1, score=0)
+        counts = self.draw(sampler=sampler)
+        self.assertAlmostEqual(counts[1] / 6000, 0.5, delta=0.03)
+
+    def test_add_and_remove(self) -> None:
+        sampler = WeightedSampler()
+        self.assertIsNone(sampler.sample(rng=Random(0)))
+        for card_id in range(1, 101):
+            sampler.add(card_id=card_id, score=card_id % 3)
+        for card_id in range(1, 91):
+            sampler.remove(card_id=card_id)
+        self.assertEqual(len(sampler), 10)
+        counts = self.draw(sampler=sampler, times=500)
+        self.assertTrue(set(counts) <= set(range(91, 101)))
+
+
+class DeckSamplerIntegrationTests(DBTestCase):
+    """Service writes must keep an already-built sampler in step with the DB."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Sampler")
+
+    def test_writes_after_first_draw_are_reflected(self) -> None:
+        first = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q1", answer="A1")
+        # Draws leave the answer out.
+        self.assertEqual(
+            self.service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id), replace(first, answer=None)
+        )
+
+        second = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q2", answer="A2")
+        self.service.delete_card(user_id=self.user.id, card_id=first.id)
+        self.service.update_card(user_id=self.user.id, card_id=second.id, question="Edited")
+
+        drawn = self.service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertIsNotNone(drawn)
+        self.assertEqual(drawn.id, second.id)
+        self.assertEqual(drawn.question, "Edited")
+
+
+if __name__ == "__main__":
+    unittest.main()
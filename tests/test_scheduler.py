@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import unittest
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from models.deck import DeckService
+from models.scheduler import DEFAULT_EASE, MIN_EASE, RELEARN_DELAY, schedule_review, utcnow
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class ScheduleReviewTests(unittest.TestCase):
+    """SM-2 interval and ease progression."""
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+
+    def test_successful_reviews_grow_interval(self) -> None:
+        first = schedule_review(interval=0, ease=DEFAULT_EASE, quality=4, now=self.now)
+        self.assertEqual(first.interval, 1)
+        second = schedule_review(interval=first.interval, ease=first.ease, quality=4, now=self.now)
+        self.assertEqual(second.interval, 6)
+        third = schedule_review(interval=second.interval, ease=second.ease, quality=4, now=self.now)
+        self.assertEqual(third.interval, 15)
+        self.assertEqual(third.due_at, self.now + timedelta(days=15))
+
+    def test_lapse_resets_interval_and_lowers_ease(self) -> None:
+        lapsed = schedule_review(interval=15, ease=DEFAULT_EASE, quality=1, now=self.now)
+        self.assertEqual(lapsed.interval, 0)
+        self.assertLess(lapsed.ease, DEFAULT_EASE)
+        self.assertEqual(lapsed.due_at, self.now + RELEARN_DELAY)
+
+    def test_ease_is_floored(self) -> None:
+        schedule = schedule_review(interval=0, ease=MIN_EASE, quality=0, now=self.now)
+        self.assertEqual(schedule.ease, MIN_EASE)
+
+
+class ScheduledStudyTests(DBTestCase):
+    """Due-date study mode on top of DeckService."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory, study_mode="scheduled")
+        self.user = self.create_user()
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Scheduled")
+
+    def test_reviewed_cards_leave_the_due_queue(self) -> None:
+        card = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q", answer="A")
+        self.assertEqual(
+            self.service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id), replace(card, answer=None)
+        )
+
+        reviewed = self.service.record_review(user_id=self.user.id, card_id=card.id, remembered=True)
+        self.assertEqual(reviewed.score, 1)
+        self.assertIsNone(self.service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id))
+
+    def test_most_overdue_card_comes_first(self) -> None:
+        first = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q1", answer="A1")
+        second = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q2", answer="A2")
+        earlier = utcnow() - timedelta(days=2)
+        self.service.record_review(user_id=self.user.id, card_id=first.id, remembered=False, now=earlier)
+        self.service.record_review(
+            user_id=self.user.id, card_id=second.id, remembered=False, now=earlier - timedelta(days=1)
+        )
+        self.assertEqual(self.service.next_card_for_study(user_id=self.user.id, deck_id=self.deck.id).id, second.id)
+
+    def test_unknown_mode_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            DeckService(session_factory=self.session_factory, study_mode="random")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class SearchCardsTests(DBTestCase):
+    """FTS5-backed card search kept in sync by triggers."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+        self.python = self.service.create_deck(user_id=self.user.id, name="Python")
+        self.history = self.service.create_deck(user_id=self.user.id, name="History")
+        self.generators = self.service.add_card(
+            user_id=self.user.id, deck_id=self.python.id, question="What does yield do?",
+            answer="It turns a function into a generator.",
+        )
+        self.decorators = self.service.add_card(
+            user_id=self.user.id, deck_id=self.python.id, question="What is a decorator?",
+            answer="A callable that wraps a function; generator functions can be decorated too.",
+        )
+        self.service.add_card(
+            user_id=self.user.id, deck_id=self.history.id, question="Who built the first generator?",
+            answer="Michael Faraday.",
+        )
+
+    def ids(self, **kwargs) -> list:
+        return [hit.id for hit in self.service.search_cards(user_id=self.user.id, **kwargs)]
+
+    def test_prefix_match_across_decks(self) -> None:
+        hits = self.service.search_cards(user_id=self.user.id, query="generat")
+        self.assertEqual(len(hits), 3)
+        self.assertEqual({hit.deck_name for hit in hits}, {"Python", "History"})
+        # Every word has to match.
+        self.assertEqual(self.ids(query="yield generator"), [self.generators.id])
+
+    def test_better_match_ranks_first(self) -> None:
+        # bm25: "faraday" occurs once, in a short card, so that card must lead.
+        self.service.add_card(
+            user_id=self.user.id, deck_id=self.history.id, question="Faraday?",
+            answer="Faraday, Faraday, Faraday.",
+        )
+        hits = self.service.search_cards(user_id=self.user.id, query="faraday")
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(hits[0].question, "Faraday?")
+
+    def test_deck_filter_and_pagination(self) -> None:
+        in_deck = self.ids(query="generator", deck_id=self.python.id)
+        self.assertEqual(set(in_deck), {self.generators.id, self.decorators.id})
+        first = self.ids(query="generator", deck_id=self.python.id, limit=1)
+        second = self.ids(query="generator", deck_id=self.python.id, limit=1, offset=1)
+        self.assertEqual(first + second, in_deck)
+
+    def test_index_follows_edits_and_deletes(self) -> None:
+        self.service.update_card(user_id=self.user.id, card_id=self.generators.id, question="What does await do?")
+        self.assertIn(self.generators.id, self.ids(query="await"))
+        self.assertNotIn(self.generators.id, self.ids(query="yield"))
+
+        self.service.delete_card(user_id=self.user.id, card_id=self.decorators.id)
+        self.assertEqual(self.ids(query="decorator"), [])
+
+    def test_other_users_cards_hidden(self) -> None:
+        other = self.create_user(username="other")
+        self.assertEqual(self.service.search_cards(user_id=other.id, query="generator"), [])
+
+    def test_punctuation_does_not_break_queries(self) -> None:
+        self.assertEqual(self.ids(query='yield" OR (*'), [])
+        self.assertEqual(self.ids(query="   "), [])
+        self.assertEqual(self.ids(query="yield?"), [self.generators.id])
+        self.assertEqual(self.ids(query="YIELD"), [self.generators.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
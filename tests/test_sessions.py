@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sqlalchemy import exc, select, text
+
+from models.cache import DeckCache
+from models.deck import DeckRecord, DeckService
+from models.migrations import migrate
+from models.storage import SessionManager, StorageSettings, PROFILES, build_engine
+from models.user import UserRecord
+
+
+__author__ = 'fenzl'
+
+
+class SessionManagerTests(unittest.TestCase):
+    """Writer/reader routing, units of work and pool metrics on a file database."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        settings = StorageSettings(
+            path=os.path.join(self.directory.name, "app.db"), profile_name="durable", profile=PROFILES["durable"],
+            readers=2, pool_timeout=0.2,
+        )
+        self.writer = build_engine(settings=settings)
+        self.reader = build_engine(settings=settings, reader=True)
+        migrate(bind=self.writer)
+        self.manager = SessionManager(writer=self.writer, reader=self.reader)
+        with self.manager() as session:
+            session.add(UserRecord(id=1, username="test", full_name="Test", password_hash="x"))
+            session.commit()
+        self.service = DeckService(session_factory=self.manager, cache=DeckCache())
+
+    def tearDown(self) -> None:
+        self.writer.dispose()
+        self.reader.dispose()
+        self.directory.cleanup()
+
+    def test_reads_use_reader_pool_and_writes_use_writer(self) -> None:
+        before = self.manager.pool_metrics()
+        self.service.list_decks(user_id=1)
+        middle = self.manager.pool_metrics()
+        self.assertEqual(middle["reader"]["checkouts"], before["reader"]["checkouts"] + 1)
+        self.assertEqual(middle["writer"]["checkouts"], before["writer"]["checkouts"])
+
+        self.service.create_deck(user_id=1, name="Routed")
+        after = self.manager.pool_metrics()
+        # The refresh after commit stays on the writer so it sees the insert.
+        self.assertGreater(after["writer"]["checkouts"], middle["writer"]["checkouts"])
+        self.assertEqual(after["reader"]["checkouts"], middle["reader"]["checkouts"])
+        self.assertEqual(after["writer"]["in_use"], 0)
+
+    def test_reader_connections_are_read_only(self) -> None:
+        with self.reader.connect() as connection:
+            with self.assertRaises(exc.OperationalError):
+                connection.execute(text("INSERT INTO decks (name, user_id) VALUES ('x', 1)"))
+
+    def test_raw_text_writes_go_to_the_writer(self) -> None:
+        with self.manager() as session:
+            session.execute(text("INSERT INTO decks (name, user_id) VALUES ('Raw', 1)"))
+            # Later reads stay on the writer and see the uncommitted insert.
+            self.assertEqual(session.execute(select(DeckRecord.name)).scalars().all(), ["Raw"])
+            session.commit()
+        self.assertEqual([deck.name for deck in self.service.list_decks(user_id=1)], ["Raw"])
+
+    def test_deck_stats_repair_runs_on_the_writer(self) -> None:
+        deck = self.service.create_deck(user_id=1, name="Stats")
+        self.service.add_card(user_id=1, deck_id=deck.id, question="Q", answer="A")
+        with self.writer.begin() as connection:
+            connection.execute(text("UPDATE deck_stats SET card_count = 99"))
+        self.assertEqual(self.service.check_deck_stats(), [deck.id])
+        self.assertEqual(self.service.check_deck_stats(), [])
+        self.assertEqual(self.service.get_deck_stats(user_id=1, deck_id=deck.id).card_count, 1)
+
+    def test_rolled_back_ratings_leave_no_review_rows(self) -> None:
+        deck = self.service.create_deck(user_id=1, name="Rolled back")
+        with self.assertRaises(RuntimeError):
+            with self.manager.unit_of_work():
+                card = self.service.add_card(user_id=1, deck_id=deck.id, question="Q", answer="A")
+                self.service.update_score(user_id=1, card_id=card.id, delta=-1)
+                raise RuntimeError("abort")
+        self.assertEqual(self.service.pending_review_count, 0)
+        self.assertEqual(self.service.get_deck_stats(user_id=1, deck_id=deck.id).card_count, 0)
+        with self.writer.connect() as connection:
+            self.assertEqual(connection.execute(text("SELECT count(*) FROM review_log")).scalar(), 0)
+
+    def test_unit_of_work_commits_all_calls_together(self) -> None:
+        with self.manager.unit_of_work():
+            deck = self.service.create_deck(user_id=1, name="Together")
+            self.service.add_card(user_id=1, deck_id=deck.id, question="Q", answer="A")
+            # Inside the block this thread sees its own uncommitted writes...
+            self.assertEqual(len(self.service.list_cards(user_id=1, deck_id=deck.id)), 1)
+            # ...while other connections do not.
+            with self.reader.connect() as connection:
+                self.assertEqual(connection.execute(text("SELECT count(*) FROM decks")).scalar(), 0)
+        self.assertEqual([d.name for d in self.service.list_decks(user_id=1)], ["Together"])
+
+    def test_unit_of_work_rolls_back_and_drops_memory_state(self) -> None:
+        deck = self.service.create_deck(user_id=1, name="Kept")
+        self.service.add_card(user_id=1, deck_id=deck.id, question="Q", answer="A")
+        self.service.list_cards(user_id=1, deck_id=deck.id)
+        with self.assertRaises(ValueError):
+            with self.manager.unit_of_work():
+                self.service.add_card(user_id=1, deck_id=deck.id, question="Q2", answer="A2")
+                self.service.update_deck(user_id=1, deck_id=deck.id, name="")  # fails validation
+        self.assertEqual([c.question for c in self.service.list_cards(user_id=1, deck_id=deck.id)], ["Q"])
+        self.assertEqual(len(self.service.cache), 1)  # only the fresh read above
+
+    def test_sessions_are_thread_scoped_inside_unit_of_work(self) -> None:
+        seen = []
+        with self.manager.unit_of_work() as session:
+            self.assertIs(self.manager(), session)
+            with self.manager.unit_of_work() as nested:
+                self.assertIs(nested, session)
+            worker = threading.Thread(target=lambda: seen.append(self.manager()))
+            worker.start()
+            worker.join()
+        self.assertIsNot(seen[0], session)
+        seen[0].close()
+
+    def test_pool_timeout_is_counted(self) -> None:
+        errors = []
+        with self.manager.unit_of_work():
+            # The single writer connection is held by this thread's unit of work.
+            worker = threading.Thread(target=lambda: self._try_write(errors=errors))
+            worker.start()
+            worker.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.manager.pool_metrics()["writer"]["timeouts"], 1)
+
+    def test_flush_waiting_for_the_writer_does_not_hold_the_service_lock(self) -> None:
+        deck = self.service.create_deck(user_id=1, name="Flush")
+        first = self.service.add_card(user_id=1, deck_id=deck.id, question="Q1", answer="A")
+        second = self.service.add_card(user_id=1, deck_id=deck.id, question="Q2", answer="A")
+        self.service.buffer_score(user_id=1, card_id=first.id, delta=2)
+        errors = []
+        with self.manager.unit_of_work():
+            self.service.update_score(user_id=1, card_id=second.id, delta=1)  # holds the writer from here on
+            worker = threading.Thread(target=lambda: self._try_flush(errors=errors))
+            worker.start()
+            time.sleep(0.05)  # let the flush block on the writer connection
+            # Needs the service lock; a flush holding it while waiting would stall both until the pool timeout.
+            self.service.update_score(user_id=1, card_id=second.id, delta=1)
+        worker.join()
+        self.assertEqual(errors, [])
+        scores = {card.id: card.score for card in self.service.list_cards(user_id=1, deck_id=deck.id)}
+        self.assertEqual(scores, {first.id: 2, second.id: 2})
+        self.assertEqual(self.service.pending_score_count, 0)
+
+    def _try_flush(self, errors: list) -> None:
+        try:
+            self.service.flush_scores()
+        except exc.TimeoutError as exception:
+            errors.append(exception)
+
+    def _try_write(self, errors: list) -> None:
+        try:
+            self.service.create_deck(user_id=1, name="Blocked")
+        except exc.TimeoutError as exception:
+            errors.append(exception)
+
+
+if __name__ == "__main__":
+    unittest.main()
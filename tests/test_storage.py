@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from models.storage import PROFILES, build_engine, load_settings
+
+
+__author__ = 'fenzl'
+
+
+class StorageSettingsTests(unittest.TestCase):
+    """Storage profile/path resolution and PRAGMA application."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.directory.name, "flashcards.ini")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_defaults_to_durable_app_db(self) -> None:
+        settings = load_settings(environ={"FLASHCARDS_CONFIG": self.config_path})
+        self.assertEqual(settings.profile_name, "durable")
+        self.assertEqual(settings.path, "app.db")
+        self.assertEqual(settings.profile, PROFILES["durable"])
+
+    def test_config_file_with_env_override(self) -> None:
+        with open(self.config_path, "w", encoding="utf-8") as handle:
+            handle.write("[storage]\nprofile = fast\npath = from_file.db\ncache_size = -1000\n")
+        environ = {"FLASHCARDS_CONFIG": self.config_path, "FLASHCARDS_DB_PATH": "from_env.db"}
+        settings = load_settings(environ=environ)
+        self.assertEqual(settings.profile_name, "fast")
+        self.assertEqual(settings.profile.cache_size, -1000)
+        self.assertEqual(settings.profile.journal_mode, "WAL")
+        self.assertEqual(settings.path, "from_env.db")
+
+    def test_unknown_profile_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            load_settings(environ={"FLASHCARDS_CONFIG": self.config_path, "FLASHCARDS_DB_PROFILE": "turbo"})
+
+    def test_reader_pool_settings(self) -> None:
+        with open(self.config_path, "w", encoding="utf-8") as handle:
+            handle.write("[storage]\nreaders = 2\npool_timeout = 5\n")
+        settings = load_settings(environ={"FLASHCARDS_CONFIG": self.config_path, "FLASHCARDS_DB_READERS": "6"})
+        self.assertEqual(settings.readers, 6)
+        self.assertEqual(settings.pool_timeout, 5.0)
+        with self.assertRaises(ValueError):
+            load_settings(environ={"FLASHCARDS_CONFIG": self.config_path, "FLASHCARDS_DB_READERS": "0"})
+
+    def test_pragmas_applied_on_connect(self) -> None:
+        environ = {
+            "FLASHCARDS_CONFIG": self.config_path,
+            "FLASHCARDS_DB_PROFILE": "fast",
+            "FLASHCARDS_DB_PATH": os.path.join(self.directory.name, "fast.db"),
+        }
+        engine = build_engine(settings=load_settings(environ=environ))
+        try:
+            with engine.connect() as connection:
+                self.assertEqual(connection.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+                self.assertEqual(connection.execute(text("PRAGMA synchronous")).scalar(), 1)  # NORMAL
+                self.assertEqual(connection.execute(text("PRAGMA temp_store")).scalar(), 2)  # MEMORY
+                self.assertEqual(connection.execute(text("PRAGMA cache_size")).scalar(), -64000)
+                self.assertEqual(connection.execute(text("PRAGMA foreign_keys")).scalar(), 1)
+        finally:
+            engine.dispose()
+
+
+class LazyStartupTests(unittest.TestCase):
+    """Importing the model layer must not build the engine or load bcrypt."""
+
+    def test_import_is_lazy(self) -> None:
+        code = (
+            "import sys, models.main, models.storage as storage; "
+            "assert storage._engine is None, 'engine built at import'; "
+            "assert 'bcrypt' not in sys.modules, 'bcrypt imported eagerly'"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+    def test_in_memory_reader_is_resolved_once(self) -> None:
+        code = (
+            "import models.storage as storage; "
+            "reader = storage.get_reader_engine(); "
+            "assert reader is storage.get_engine(), 'in-memory reads must share the writer'; "
+            "storage.load_settings = None; "
+            "assert storage.get_reader_engine() is reader"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        environ = dict(os.environ, FLASHCARDS_DB_PATH=":memory:", FLASHCARDS_CONFIG=os.devnull)
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, env=environ, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+from threading import Event
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.exc import OperationalError
+
+from controllers.study import POLL_INTERVAL_MS, PREFETCH_DEPTH, StudyController
+from models.deck import CardData
+from models.user import UserData
+
+
+__author__ = 'fenzl'
+
+
+class FakeStudyFrame:
+    """Records what the controller shows; after() only queues, the test pumps the poll callbacks."""
+
+    def __init__(self):
+        self.scheduled: List[Tuple[int, Callable[[], None]]] = []
+        self.questions: List[str] = []
+        self.messages: List[str] = []
+        self.fail_next_question = False
+
+    def after(self, delay_ms: int, callback: Callable[[], None]) -> str:
+        self.scheduled.append((delay_ms, callback))
+        return f"after#{len(self.scheduled)}"
+
+    def after_cancel(self, _job: str) -> None:
+        pass
+
+    def set_question(self, text: str) -> None:
+        if self.fail_next_question:
+            self.fail_next_question = False
+            raise RuntimeError("widget gone")
+        self.questions.append(text)
+
+    def set_message(self, message: str) -> None:
+        self.messages.append(message)
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        # set_answer, clear_card, set_deck_title and the set_*_command binders.
+        return lambda *args, **kwargs: None
+
+
+class FakeRoot:
+    def __init__(self):
+        self.reported: List[BaseException] = []
+
+    def report_callback_exception(self, _exc_type, exc_value, _traceback) -> None:
+        self.reported.append(exc_value)
+
+
+class FakeMainView:
+    def __init__(self):
+        self.root = FakeRoot()
+        self.frames = {"study": FakeStudyFrame()}
+
+
+class FakeUsers:
+    current_user = UserData(id=1, username="learner", full_name="Learner")
+
+
+class FakeDecks:
+    """Draws hand out scripted cards; ``gate`` holds the worker so several draws can be in flight."""
+
+    study_mode = "weighted"
+    pending_score_count = 0
+    pending_review_count = 0
+
+    def __init__(self, card_ids: List[int]):
+        self.card_ids = list(card_ids)
+        self.draws = 0
+        self.failure: Optional[Exception] = None
+        self.gate = Event()
+        self.gate.set()
+
+    def next_card_for_study(self, user_id: int, deck_id: int) -> Optional[CardData]:
+        self.gate.wait()
+        self.draws += 1
+        if self.failure is not None:
+            raise self.failure
+        if not self.card_ids:
+            return None
+        card_id = self.card_ids.pop(0)
+        return CardData(id=card_id, question=f"Q{card_id}", answer=None, score=0)
+
+    def buffer_score(self, user_id: int, card_id: int, delta: int, response_ms: int) -> CardData:
+        return CardData(id=card_id, question=f"Q{card_id}", answer=None, score=delta)
+
+    def flush_scores(self) -> int:
+        return 0
+
+
+class FakeModel:
+    def __init__(self, card_ids: List[int]):
+        self.users = FakeUsers()
+        self.decks = FakeDecks(card_ids=card_ids)
+
+
+class StudyQueueTests(unittest.TestCase):
+    """Prefetch queue: in-flight accounting, stale draws after a rating, and poll robustness."""
+
+    def setUp(self) -> None:
+        self.model = FakeModel(card_ids=[1, 2, 3, 4, 5, 6, 7])
+        self.view = FakeMainView()
+        self.frame = self.view.frames["study"]
+        self.controller = StudyController(main_model=self.model, main_view=self.view)  # type: ignore[arg-type]
+
+    def tearDown(self) -> None:
+        self.model.decks.gate.set()
+        self.controller._worker.shutdown(wait=True)
+
+    def pump(self, timeout: float = 5.0) -> None:
+        """Run the poll callbacks until nothing is left in flight (the flush timer is left alone)."""
+        deadline = time.monotonic() + timeout
+        while any(delay == POLL_INTERVAL_MS for delay, _ in self.frame.scheduled):
+            if time.monotonic() > deadline:
+                self.fail("study worker did not finish")
+            polls = [callback for delay, callback in self.frame.scheduled if delay == POLL_INTERVAL_MS]
+            self.frame.scheduled = [entry for entry in self.frame.scheduled if entry[0] != POLL_INTERVAL_MS]
+            for callback in polls:
+                callback()
+            time.sleep(0.001)
+
+    def queued_ids(self) -> List[int]:
+        return [card.id for card in self.controller._queue]
+
+    def test_fill_queue_keeps_prefetch_depth_in_flight(self) -> None:
+        self.model.decks.gate.clear()
+        self.controller.start(deck_id=1, deck_name="Deck")
+        self.assertEqual(self.controller._inflight_draws, PREFETCH_DEPTH)
+        self.controller._fill_queue()  # already topped up: nothing more is submitted
+        self.assertEqual(len(self.controller._pending), PREFETCH_DEPTH)
+
+        self.model.decks.gate.set()
+        self.pump()
+        self.assertEqual(self.controller.current_card.id, 1)
+        self.assertEqual(self.frame.questions, ["Q: Q1"])
+        # Showing card 1 took it off the queue; the next rating tops the queue up again.
+        self.assertEqual(self.queued_ids(), [2, 3])
+        self.assertEqual(self.controller._inflight_draws, 0)
+
+    def test_draw_made_before_a_rating_of_its_card_is_redrawn(self) -> None:
+        self.controller.start(deck_id=1, deck_name="Deck")
+        self.pump()
+        self.model.decks.gate.clear()
+
+        self.controller.rate_card(delta=1)  # rates 1, shows 2 and tops the queue up with two draws
+        self.assertEqual(self.controller.current_card.id, 2)
+        self.assertEqual(self.controller._inflight_draws, 2)
+        # The first of those draws returns card 3, which is rated before the result arrives.
+        self.model.decks.card_ids = [3, 5, 6, 7]
+        self.controller.rate_card(delta=-1)  # rates 2, shows 3
+        self.controller.rate_card(delta=1)  # rates 3, shows nothing queued yet
+        self.assertIsNone(self.controller.current_card)
+        self.assertEqual(self.controller._inflight_draws, PREFETCH_DEPTH)
+
+        self.model.decks.gate.set()
+        self.pump()
+        self.assertNotIn(3, self.queued_ids())
+        self.assertEqual(self.controller.current_card.id, 5)
+        self.assertEqual(self.queued_ids(), [6, 7])
+        self.assertEqual(self.model.decks.draws, 3 + 4)
+        self.assertEqual(self.controller._inflight_draws, 0)
+
+    def test_failing_callback_does_not_stop_later_results(self) -> None:
+        self.frame.fail_next_question = True
+        self.controller.start(deck_id=1, deck_name="Deck")
+        self.pump()
+        self.assertEqual([str(error) for error in self.view.root.reported], ["widget gone"])
+        self.assertFalse(self.controller._polling)
+
+        self.controller.current_card = CardData(id=2, question="Q2", answer=None, score=0)
+        self.controller.rate_card(delta=1)
+        self.pump()
+        self.assertIn("Updated score: 1", self.frame.messages)
+        self.assertEqual(self.controller._inflight_draws, 0)
+
+
+    def test_draw_errors_are_shown(self) -> None:
+        self.model.decks.failure = OperationalError("SELECT", {}, Exception("disk I/O error"))
+        with self.assertLogs("flashcards.study", level="ERROR"):
+            self.controller.start(deck_id=1, deck_name="Deck")
+            self.pump()
+        self.assertIsNone(self.controller.current_card)
+        self.assertTrue(self.frame.messages[-1].startswith("Could not load the next card:"), self.frame.messages)
+        self.assertEqual(self.controller._inflight_draws, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from sqlalchemy import text
+
+from models.deck import DeckService
+from tests.base import DBTestCase
+
+
+__author__ = 'fenzl'
+
+
+class SingleStatementWriteTests(DBTestCase):
+    """Ownership-checked writes are one statement each (UPDATE/INSERT ... RETURNING, cascading DELETE)."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = DeckService(session_factory=self.session_factory)
+        self.user = self.create_user()
+        self.other = self.create_user(username="other")
+        self.deck = self.service.create_deck(user_id=self.user.id, name="Writes")
+        self.card = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q", answer="A")
+
+    def assert_single_statement(self, statements, verb: str) -> None:
+        self.assertEqual(len(statements), 1, statements)
+        self.assertTrue(statements[0].lstrip().upper().startswith(verb), statements[0])
+        self.assertIn("RETURNING", statements[0].upper())
+
+    def test_add_card(self) -> None:
+        with self.capture_statements() as statements:
+            card = self.service.add_card(user_id=self.user.id, deck_id=self.deck.id, question="Q2", answer="A2")
+        self.assert_single_statement(statements=statements, verb="INSERT")
+        self.assertEqual((card.question, card.answer, card.score), ("Q2", "A2", 0))
+        self.assertEqual(len(self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)), 2)
+
+    def test_update_card(self) -> None:
+        with self.capture_statements() as statements:
+            card = self.service.update_card(user_id=self.user.id, card_id=self.card.id, answer="Edited")
+        self.assert_single_statement(statements=statements, verb="UPDATE")
+        self.assertEqual((card.question, card.answer), ("Q", "Edited"))
+
+    def test_update_score(self) -> None:
+        with self.capture_statements() as statements:
+            card = self.service.update_score(user_id=self.user.id, card_id=self.card.id, delta=2)
+        # The review log row goes into the same transaction as the score.
+        self.assertTrue(statements[1].startswith("INSERT INTO review_log"), statements)
+        self.assert_single_statement(statements=statements[:1], verb="UPDATE")
+        self.assertEqual(card.score, 2)
+        floored = self.service.update_score(user_id=self.user.id, card_id=self.card.id, delta=-5)
+        self.assertEqual(floored.score, 0)
+
+    def test_writes_to_foreign_rows_change_nothing(self) -> None:
+        with self.capture_statements() as statements:
+            with self.assertRaises(ValueError):
+                self.service.add_card(user_id=self.other.id, deck_id=self.deck.id, question="Q", answer="A")
+            with self.assertRaises(ValueError):
+                self.service.update_card(user_id=self.other.id, card_id=self.card.id, question="Stolen")
+            with self.assertRaises(ValueError):
+                self.service.update_score(user_id=self.other.id, card_id=self.card.id, delta=3)
+        self.assertEqual(len(statements), 3)
+        (card,) = self.service.list_cards(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertEqual((card.question, card.score), ("Q", 0))
+
+    def test_delete_deck_cascades_in_one_statement(self) -> None:
+        self.service.update_score(user_id=self.user.id, card_id=self.card.id, delta=1)
+        self.service.flush_scores()
+        with self.session_factory() as session:
+            session.execute(
+                text("INSERT INTO import_checkpoints (user_id, deck_id, source, fingerprint, rows_done) "
+                     "VALUES (:user, :deck, 'cards.csv', 'f', 10)"),
+                {"user": self.user.id, "deck": self.deck.id},
+            )
+            session.commit()
+
+        with self.assertRaises(ValueError):
+            self.service.delete_deck(user_id=self.other.id, deck_id=self.deck.id)
+        with self.capture_statements() as statements:
+            self.service.delete_deck(user_id=self.user.id, deck_id=self.deck.id)
+        self.assertEqual(len(statements), 1, statements)
+        self.assertTrue(statements[0].lstrip().upper().startswith("DELETE FROM DECKS"), statements[0])
+
+        with self.engine.connect() as connection:
+            for table in ("decks", "cards", "review_log", "deck_stats", "import_checkpoints"):
+                self.assertEqual(connection.execute(text(f"SELECT count(*) FROM {table}")).scalar(), 0, table)
+        self.assertEqual(self.service.search_cards(user_id=self.user.id, query="Q"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
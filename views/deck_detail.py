@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
-from tkinter import Button, Frame, Label, Listbox, Scrollbar, StringVar
+from tkinter import Button, Entry, Frame, Label, Listbox, OptionMenu, Scrollbar, StringVar
+from typing import Callable, List
 
 
 __author__ = 'fenzl'
 
+# Fraction of the list scrolled past before the next page is requested.
+SCROLL_END_THRESHOLD = 0.95
+
 
 class DeckDetailView(Frame):
     """Deck detail view with card list and action controls."""
@@ -17,10 +21,18 @@ class DeckDetailView(Frame):
 
         self.title_var = StringVar()
         self.title_label = Label(self, textvariable=self.title_var)
-        self.title_label.grid(row=0, column=0, columnspan=2, padx=10, pady=10, sticky="ew")
-
-        # Monospace font keeps columns aligned for padded question/score display.
-        self.cards_list = Listbox(self, exportselection=False, font=("Courier New", 10))
+        self.title_label.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+
+        # Full-text search within this deck; an empty query shows all cards again.
+        self.search_var = StringVar()
+        self.search_entry = Entry(self, textvariable=self.search_var)
+        self.search_entry.grid(row=0, column=1, padx=(10, 0), pady=10, sticky="ew")
+        self.search_btn = Button(self, text="Search")
+        self.search_btn.grid(row=0, column=2, padx=(0, 10), pady=10, sticky="e")
+
+        # Monospace font keeps columns aligned for padded question/score display. Shift/Ctrl-click
+        # select several cards for the bulk actions.
+        self.cards_list = Listbox(self, exportselection=False, selectmode="extended", font=("Courier New", 10))
         self.cards_list.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
 
         self.scrollbar = Scrollbar(self, orient="vertical", command=self.cards_list.yview)
@@ -33,18 +45,39 @@ class DeckDetailView(Frame):
         self.update_card_btn = Button(self, text="Edit Card")
         self.update_card_btn.grid(row=2, column=1, padx=10, pady=10, sticky="e")
 
-        self.delete_card_btn = Button(self, text="Delete Card")
+        self.delete_card_btn = Button(self, text="Delete Selected")
         self.delete_card_btn.grid(row=3, column=0, padx=10, pady=10, sticky="w")
 
         self.study_btn = Button(self, text="Start Study")
         self.study_btn.grid(row=3, column=1, padx=10, pady=10, sticky="e")
 
+        self.import_btn = Button(self, text="Import…")
+        self.import_btn.grid(row=4, column=0, padx=10, pady=10, sticky="w")
+
+        self.export_btn = Button(self, text="Export…")
+        self.export_btn.grid(row=4, column=1, padx=10, pady=10, sticky="e")
+
+        self.reset_btn = Button(self, text="Reset Scores")
+        self.reset_btn.grid(row=5, column=0, padx=10, pady=10, sticky="w")
+
+        # Target deck for Move/Copy; entries are filled in by set_target_decks.
+        self.target_var = StringVar(value="Target deck")
+        self.target_menu = OptionMenu(self, self.target_var, "")
+        self.target_menu.grid(row=5, column=1, padx=10, pady=10, sticky="e")
+        self._target_index: int | None = None
+
+        self.move_btn = Button(self, text="Move to Deck")
+        self.move_btn.grid(row=6, column=0, padx=10, pady=10, sticky="w")
+
+        self.copy_btn = Button(self, text="Copy to Deck")
+        self.copy_btn.grid(row=6, column=1, padx=10, pady=10, sticky="e")
+
         self.back_btn = Button(self, text="Back to Decks")
-        self.back_btn.grid(row=4, column=0, columnspan=2, padx=10, pady=10, sticky="ew")
+        self.back_btn.grid(row=7, column=0, columnspan=2, padx=10, pady=10, sticky="ew")
 
         self.message_var = StringVar()
         self.message_label = Label(self, textvariable=self.message_var, fg="red")
-        self.message_label.grid(row=5, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
+        self.message_label.grid(row=8, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
 
     def set_title(self, name: str) -> None:
         self.title_var.set(f"Deck: {name}")
@@ -52,6 +85,26 @@ class DeckDetailView(Frame):
     def set_message(self, message: str) -> None:
         self.message_var.set(message)
 
+    def set_scroll_end_command(self, command) -> None:
+        """Call ``command`` whenever the list is scrolled near its end (used to load the next page)."""
+
+        def on_scroll(first, last) -> None:
+            self.scrollbar.set(first, last)
+            if float(last) >= SCROLL_END_THRESHOLD:
+                command()
+
+        self.cards_list.config(yscrollcommand=on_scroll)
+
+    def get_search_query(self) -> str:
+        return self.search_var.get()
+
+    def clear_search(self) -> None:
+        self.search_var.set("")
+
+    def set_search_command(self, command) -> None:
+        self.search_btn.config(command=command)
+        self.search_entry.bind("<Return>", lambda _event: command())
+
     def set_add_card_command(self, command) -> None:
         self.add_card_btn.config(command=command)
 
@@ -61,9 +114,49 @@ class DeckDetailView(Frame):
     def set_delete_card_command(self, command) -> None:
         self.delete_card_btn.config(command=command)
 
+    def set_reset_scores_command(self, command) -> None:
+        self.reset_btn.config(command=command)
+
+    def set_move_command(self, command) -> None:
+        self.move_btn.config(command=command)
+
+    def set_copy_command(self, command) -> None:
+        self.copy_btn.config(command=command)
+
+    def set_target_decks(self, names: List[str]) -> None:
+        """Offer ``names`` as Move/Copy targets; get_target_index returns the chosen position."""
+        menu = self.target_menu["menu"]
+        menu.delete(0, "end")
+        for index, name in enumerate(names):
+            menu.add_command(label=name, command=self._choose_target(index=index, name=name))
+        self._target_index = None
+        self.target_var.set("Target deck")
+
+    def _choose_target(self, index: int, name: str) -> Callable[[], None]:
+        def choose() -> None:
+            self._target_index = index
+            self.target_var.set(name)
+
+        return choose
+
+    def get_target_index(self) -> int | None:
+        return self._target_index
+
     def set_study_command(self, command) -> None:
         self.study_btn.config(command=command)
 
+    def set_import_command(self, command) -> None:
+        self.import_btn.config(command=command)
+
+    def set_export_command(self, command) -> None:
+        self.export_btn.config(command=command)
+
+    def set_transfer_enabled(self, enabled: bool) -> None:
+        # Import and export share one background worker; only one runs at a time.
+        state = "normal" if enabled else "disabled"
+        self.import_btn.config(state=state)
+        self.export_btn.config(state=state)
+
     def set_back_command(self, command) -> None:
         self.back_btn.config(command=command)
 
@@ -73,8 +166,23 @@ class DeckDetailView(Frame):
     def insert_card(self, display_text: str) -> None:
         self.cards_list.insert("end", display_text)
 
+    def replace_card(self, index: int, display_text: str) -> None:
+        selected = self.cards_list.selection_includes(index)
+        self.cards_list.delete(index)
+        self.cards_list.insert(index, display_text)
+        if selected:
+            self.cards_list.selection_set(index)
+
+    def remove_cards(self, indices: List[int]) -> None:
+        # From the end, so the remaining positions stay valid.
+        for index in sorted(indices, reverse=True):
+            self.cards_list.delete(index)
+
     def get_selected_index(self) -> int | None:
         selection = self.cards_list.curselection()
         if not selection:
             return None
         return selection[0]
+
+    def get_selected_indices(self) -> List[int]:
+        return list(self.cards_list.curselection())
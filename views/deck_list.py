@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
-from tkinter import Button, Frame, Label, Listbox, Scrollbar, StringVar
+from tkinter import Button, Entry, Frame, Label, Listbox, Scrollbar, StringVar
 
 
 __author__ = 'fenzl'
 
+# Fraction of the list scrolled past before the next page is requested.
+SCROLL_END_THRESHOLD = 0.95
+
 
 class DeckListView(Frame):
     """List decks with grouped actions for CRUD and navigation."""
@@ -16,7 +19,14 @@ class DeckListView(Frame):
         self.grid_rowconfigure(1, weight=1)
 
         self.header = Label(self, text="Your Decks")
-        self.header.grid(row=0, column=0, columnspan=3, padx=10, pady=10, sticky="w")
+        self.header.grid(row=0, column=0, padx=10, pady=10, sticky="w")
+
+        # Full-text search over the cards of all decks; an empty query lists decks again.
+        self.search_var = StringVar()
+        self.search_entry = Entry(self, textvariable=self.search_var)
+        self.search_entry.grid(row=0, column=1, padx=(10, 0), pady=10, sticky="ew")
+        self.search_btn = Button(self, text="Search")
+        self.search_btn.grid(row=0, column=2, padx=(0, 10), pady=10, sticky="e")
 
         # Monospace font keeps padded name/description columns aligned.
         self.deck_list = Listbox(self, exportselection=False, font=("Courier New", 10))
@@ -48,9 +58,29 @@ class DeckListView(Frame):
     def set_message(self, message: str) -> None:
         self.message_var.set(message)
 
+    def set_scroll_end_command(self, command) -> None:
+        """Call ``command`` whenever the list is scrolled near its end (used to load the next page)."""
+
+        def on_scroll(first, last) -> None:
+            self.scrollbar.set(first, last)
+            if float(last) >= SCROLL_END_THRESHOLD:
+                command()
+
+        self.deck_list.config(yscrollcommand=on_scroll)
+
     def clear_inputs(self) -> None:
         pass
 
+    def get_search_query(self) -> str:
+        return self.search_var.get()
+
+    def clear_search(self) -> None:
+        self.search_var.set("")
+
+    def set_search_command(self, command) -> None:
+        self.search_btn.config(command=command)
+        self.search_entry.bind("<Return>", lambda _event: command())
+
     def set_create_command(self, command) -> None:
         self.create_btn.config(command=command)
 
@@ -17,6 +17,9 @@ class HomeView(Frame):
         self.greeting = Label(self, text="")
         self.greeting.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
 
+        self.stats = Label(self, text="")
+        self.stats.grid(row=4, column=0, padx=10, pady=10, sticky="ew")
+
         self.deck_btn = Button(self, text="Decks")
         self.deck_btn.grid(row=3, column=0, padx=10, pady=10)
 
@@ -26,6 +29,9 @@ class HomeView(Frame):
     def set_greeting(self, text: str) -> None:
         self.greeting.config(text=text)
 
+    def set_stats(self, text: str) -> None:
+        self.stats.config(text=text)
+
     def set_signout_command(self, command) -> None:
         self.signout_btn.config(command=command)
 
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from tkinter import Frame
-from typing import TypedDict
+from typing import Callable, List, TypedDict
 
 from views.card_form import CardFormView
 from views.deck_detail import DeckDetailView
@@ -33,6 +33,7 @@ class MainView:
         # Root Tk window that hosts all frames.
         self.root = Root()
         self.frames: Frames = {}  # type: ignore
+        self._switch_listeners: List[Callable[[str], None]] = []
 
         # Instantiate all frames up front and stack them
         # We can switch to the new active one by raising it to the top
@@ -60,6 +61,23 @@ class MainView:
         frame = self.frames[name]  # type: ignore
         # Raise the frame to the top to make it visible
         frame.tkraise()
+        for listener in self._switch_listeners:
+            listener(name)
+
+    def add_switch_listener(self, listener: Callable[[str], None]) -> None:
+        # Called with the frame name after every switch (used to cancel work for frames left behind).
+        self._switch_listeners.append(listener)
+
+    def set_busy(self, name: str, busy: bool) -> None:
+        # Child widgets without their own cursor inherit the frame's.
+        self.frames[name].config(cursor="watch" if busy else "")  # type: ignore
+
+    def set_close_command(self, command) -> None:
+        # Runs when the user closes the window, so controllers can persist state before exit.
+        self.root.protocol("WM_DELETE_WINDOW", command)
+
+    def close(self) -> None:
+        self.root.destroy()
 
     def start_mainloop(self) -> None:
         # Start the main Tk loop